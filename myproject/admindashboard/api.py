@@ -1,71 +1,126 @@
 from datetime import timedelta
+from django.urls import reverse
 from django.utils import timezone
-from django.db.models.functions import TruncDay
-from django.db.models import Count
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from admindashboard.premissions import IsStaff
-from .models import UserSessionLog, RegistrationLog
-from myapp.models import User, Post, Like, Comment  # adjust if your app label differs
+from myproject import querybudget, slowqueries
+from . import auditlog, cohorts, hll, rollups, sketches
+from .models import RequestProfile
+
+MAX_DAYS = 366
 
 class StaffOnlyMixin:
     permission_classes = [IsAuthenticated, IsStaff]
 
 def _range(request, default_days=30):
     end = timezone.now()
-    days = int(request.GET.get("days", default_days))
+    try:
+        days = int(request.GET.get("days", default_days))
+    except (TypeError, ValueError):
+        days = default_days
+    days = min(max(days, 1), MAX_DAYS)
     start = end - timedelta(days=days)
     return start, end
 
+def _granularity(request):
+    """?granularity=hour reads the hourly rollups (default: day)."""
+    g = request.GET.get("granularity", "day")
+    return g if g in rollups.GRANULARITY else "day"
+
+def _series(request, *metrics):
+    start, end = _range(request)
+    g = _granularity(request)
+    return {m: rollups.series(m, start, end, g) for m in metrics}
+
 class UsersSummary(StaffOnlyMixin, APIView):
     def get(self, request):
-        start, end = _range(request)
-        regs = (RegistrationLog.objects.filter(created_at__range=(start, end))
-                .annotate(day=TruncDay("created_at"))
-                .values("day").order_by("day")
-                .annotate(count=Count("id")))
-        logins = (UserSessionLog.objects.filter(created_at__range=(start, end), action=UserSessionLog.LOGIN)
-                  .annotate(day=TruncDay("created_at"))
-                  .values("day").order_by("day")
-                  .annotate(count=Count("id")))
-        return Response({"registrations": list(regs), "logins": list(logins)})
+        return Response(_series(request, "registrations", "logins"))
+
+def _top(request, stream, start, end, id_key, count_key, k=10):
+    """Heavy hitters from the day sketches; ?exact=0 skips re-counting the candidates."""
+    exact = request.GET.get("exact", "1") not in ("0", "false")
+    return [{id_key: item, count_key: n} for item, n in sketches.top(stream, start, end, k=k, exact=exact)]
 
 class PostsSummary(StaffOnlyMixin, APIView):
     def get(self, request):
         start, end = _range(request)
-        posts = (Post.objects.filter(created_at__range=(start, end))
-                 .annotate(day=TruncDay("created_at"))
-                 .values("day").order_by("day")
-                 .annotate(count=Count("id")))
-        top_authors = (Post.objects.filter(created_at__range=(start, end))
-                       .values("author_id").annotate(posts=Count("id")).order_by("-posts")[:10])
-        return Response({"posts": list(posts), "top_authors": list(top_authors)})
+        top_authors = _top(request, "authors", start, end, "author_id", "posts")
+        return Response({**_series(request, "posts"), "top_authors": top_authors})
 
 class LikesSummary(StaffOnlyMixin, APIView):
     def get(self, request):
         start, end = _range(request)
-        likes = (Like.objects.filter(created_at__range=(start, end))
-                 .annotate(day=TruncDay("created_at"))
-                 .values("day").order_by("day")
-                 .annotate(count=Count("id")))
-        top_posts = (Like.objects.filter(created_at__range=(start, end))
-                     .values("post_id").annotate(likes=Count("id")).order_by("-likes")[:10])
-        return Response({"likes": list(likes), "top_posts": list(top_posts)})
+        top_posts = _top(request, "posts", start, end, "post_id", "likes")
+        return Response({**_series(request, "likes"), "top_posts": top_posts})
 
 class CommentsSummary(StaffOnlyMixin, APIView):
     def get(self, request):
         start, end = _range(request)
-        comments = (Comment.objects.filter(created_at__range=(start, end))
-                    .annotate(day=TruncDay("created_at"))
-                    .values("day").order_by("day")
-                    .annotate(count=Count("id")))
-        return Response({"comments": list(comments)})
+        top_commenters = _top(request, "commenters", start, end, "author_id", "comments")
+        return Response({**_series(request, "comments"), "top_commenters": top_commenters})
 
 class AuthSummary(StaffOnlyMixin, APIView):
+    ACTIONS = (("login", "logins"), ("logout", "logouts"), ("login_failed", "failed_logins"))
+
     def get(self, request):
         start, end = _range(request)
-        totals = (UserSessionLog.objects.filter(created_at__range=(start, end))
-                  .values("action").annotate(count=Count("id")))
-        return Response({"auth": list(totals)})
+        sums = rollups.window_totals(start, end, *(m for _a, m in self.ACTIONS))
+        return Response({"auth": [{"action": a, "count": sums[m]} for a, m in self.ACTIONS]})
+
+class ActiveUsersSummary(StaffOnlyMixin, APIView):
+    """Distinct active users per day (DAU) and over trailing 7/30 days (WAU/MAU), from HyperLogLog sketches."""
+    def get(self, request):
+        start, end = _range(request)
+        return Response(hll.active_series(rollups.day_bucket(start), rollups.day_bucket(end)))
+
+class CohortRetention(StaffOnlyMixin, APIView):
+    """Weekly cohort retention heatmap data; ?weeks=12&activity=logins,posts,likes."""
+    def get(self, request):
+        try:
+            weeks = min(max(int(request.GET.get("weeks", 12)), 1), 53)
+        except (TypeError, ValueError):
+            weeks = 12
+        activity = [a for a in request.GET.get("activity", "").split(",") if a in cohorts.ACTIVITY_SOURCES]
+        return Response(cohorts.cohorts(weeks, activity or cohorts.ACTIVITY_SOURCES))
+
+class AuditLogStats(StaffOnlyMixin, APIView):
+    """Counters of this worker's buffered UserSessionLog/RegistrationLog writer."""
+    def get(self, request):
+        return Response(auditlog.buffer.stats())
+
+class QueryStats(StaffOnlyMixin, APIView):
+    """This worker's per-view query counts, DB time and repeated query fingerprints (?reset=1 clears)."""
+    def get(self, request):
+        views = querybudget.stats.snapshot()
+        if request.GET.get("reset") == "1":
+            querybudget.stats.reset()
+        return Response({"views": views})
+
+class SlowQueries(StaffOnlyMixin, APIView):
+    """This worker's slow statements: top fingerprints by total time and the latest ones (?reset=1 clears)."""
+    def get(self, request):
+        data = {"top": slowqueries.log.top(), "latest": slowqueries.log.latest()}
+        if request.GET.get("reset") == "1":
+            slowqueries.log.reset()
+        return Response(data)
+
+class RequestProfiles(StaffOnlyMixin, APIView):
+    """Newest captured request profiles (?view=<url name>&limit=50); stacks via profile-collapsed."""
+    def get(self, request):
+        try:
+            limit = min(max(int(request.GET.get("limit", 50)), 1), 500)
+        except (TypeError, ValueError):
+            limit = 50
+        qs = RequestProfile.objects.all()
+        if request.GET.get("view"):
+            qs = qs.filter(view_name=request.GET["view"])
+        rows = list(qs.values(
+            "id", "created_at", "method", "path", "view_name", "status",
+            "duration_ms", "mode", "trigger", "samples", "user_id",
+        )[:limit])
+        for row in rows:
+            row["collapsed_url"] = reverse("admindashboard:profile-collapsed", args=[row["id"]])
+        return Response({"profiles": rows})
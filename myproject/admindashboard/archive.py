@@ -0,0 +1,307 @@
+# admindashboard/archive.py
+"""
+Cold storage for activity logs: monthly-partitioned Parquet files.
+
+    <ARCHIVE_ROOT>/<dataset>/month=YYYY-MM/part-<run id>.parquet
+
+`archive()` copies rows older than N days into the archive in id-ordered
+chunks, publishes the files (write to a temp name, then rename), moves the
+dataset's ArchiveWatermark forward, and only then deletes the copied rows
+chunk by chunk. The watermark also records the highest id copied: rows
+below it up to that id are never copied again (if a delete fails, the
+next run deletes them instead), while rows inserted below it later, such
+as a backfill, are copied by the next run. Likes are live state (a post
+is liked until it is unliked), so they are copied but never deleted; the
+watermark still decides which side answers a query.
+
+Readers split a date range at the watermark: [start, watermark) is a
+vectorized pyarrow scan (partition-pruned by month), [watermark, end] is
+the usual indexed query, and the two results are added -- see count_by().
+"""
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except Exception:
+    pa = pc = ds = pq = None
+    HAS_PYARROW = False
+
+from .models import ArchiveWatermark
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    model_path: str           # "app_label.Model"
+    columns: tuple            # (column, arrow type name)
+    delete: bool = True       # False: copy only (rows are live state)
+    default_days: int = 90
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    def schema(self):
+        types = {"int": pa.int64(), "str": pa.string(), "bool": pa.bool_(),
+                 "ts": pa.timestamp("us", tz="UTC"), "json": pa.string()}
+        return pa.schema([(c, types[t]) for c, t in self.columns])
+
+
+DATASETS = {
+    d.name: d for d in (
+        Dataset("session_logs", "admindashboard.UserSessionLog",
+                (("id", "int"), ("user_id", "int"), ("action", "str"), ("ip", "str"),
+                 ("user_agent", "str"), ("created_at", "ts"))),
+        Dataset("registration_logs", "admindashboard.RegistrationLog",
+                (("id", "int"), ("user_id", "int"), ("source", "str"), ("created_at", "ts")),
+                default_days=365),
+        Dataset("likes", "myapp.Like",
+                (("id", "int"), ("user_id", "int"), ("post_id", "int"), ("created_at", "ts")),
+                delete=False),
+        Dataset("notifications", "myapp.Notification",
+                (("id", "int"), ("actor_id", "int"), ("recipient_id", "int"), ("verb", "str"),
+                 ("extra", "json"), ("is_read", "bool"), ("created_at", "ts")),
+                default_days=180),
+    )
+}
+
+
+def _root():
+    return os.fspath(getattr(settings, "ARCHIVE_ROOT", settings.BASE_DIR / "archive"))
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise RuntimeError("The Parquet archive requires the pyarrow package.")
+
+def watermark(name):
+    return (ArchiveWatermark.objects.filter(dataset=name)
+            .values_list("archived_before", flat=True).first())
+
+
+# ----------------------------
+# Writing
+# ----------------------------
+class _MonthWriters:
+    """One ParquetWriter per month partition for the current run."""
+
+    def __init__(self, dataset, run_id):
+        self.dataset, self.run_id = dataset, run_id
+        self.schema = dataset.schema()
+        self.writers = {}  # month -> (writer, tmp path, final path)
+
+    def write(self, month, table):
+        entry = self.writers.get(month)
+        if entry is None:
+            part_dir = os.path.join(_root(), self.dataset.name, f"month={month}")
+            os.makedirs(part_dir, exist_ok=True)
+            final = os.path.join(part_dir, f"part-{self.run_id}.parquet")
+            tmp = os.path.join(part_dir, f".part-{self.run_id}.parquet.tmp")
+            entry = self.writers[month] = (pq.ParquetWriter(tmp, self.schema, compression="zstd"), tmp, final)
+        entry[0].write_table(table)
+
+    def publish(self):
+        for writer, tmp, final in self.writers.values():
+            writer.close()
+            os.replace(tmp, final)
+        return sorted(self.writers)
+
+    def abort(self):
+        for writer, tmp, _final in self.writers.values():
+            writer.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def _to_table(dataset, rows):
+    cols = [c for c, _t in dataset.columns]
+    data = {c: [r[i] for r in rows] for i, c in enumerate(cols)}
+    for c, t in dataset.columns:
+        if t == "json":
+            data[c] = [None if v is None else json.dumps(v) for v in data[c]]
+    return pa.Table.from_pydict(data, schema=dataset.schema())
+
+
+def archive(name, older_than_days=None, chunk_size=5000, dry_run=False):
+    """Archive (and, for deletable datasets, remove) rows older than the cutoff. Returns stats."""
+    _require_pyarrow()
+    dataset = DATASETS[name]
+    model = dataset.model
+    cutoff = timezone.now() - timedelta(days=older_than_days or dataset.default_days)
+    mark = (ArchiveWatermark.objects.filter(dataset=name)
+            .values_list("archived_before", "archived_through_id").first())
+    previous, through = mark or (None, 0)
+    if previous and cutoff < previous:
+        cutoff = previous  # never move the watermark back, but still pick up late rows below it
+
+    qs = model.objects.filter(created_at__lt=cutoff)
+    if previous:
+        # already in Parquet: below the previous watermark and at most its last copied id. Rows
+        # inserted below the watermark since (backfills, buffered audit flushes) have larger ids
+        qs = qs.exclude(created_at__lt=previous, id__lte=through)
+    cols = [c for c, _t in dataset.columns]
+
+    writers = _MonthWriters(dataset, f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}")
+    chunks, total, last_id = [], 0, 0
+    try:
+        while True:
+            rows = list(qs.filter(id__gt=last_id).order_by("id").values_list(*cols)[:chunk_size])
+            if not rows:
+                break
+            first_id, last_id = rows[0][0], rows[-1][0]
+            chunks.append((first_id, last_id))
+            total += len(rows)
+            if dry_run:
+                continue
+            table = _to_table(dataset, rows)
+            months = pc.strftime(table["created_at"], format="%Y-%m")
+            for month in pc.unique(months).to_pylist():
+                writers.write(month, table.filter(pc.equal(months, month)))
+    except BaseException:
+        writers.abort()
+        raise
+    if dry_run:
+        writers.abort()
+        return {"dataset": name, "rows": total, "months": [], "deleted": 0, "cutoff": cutoff}
+
+    months = writers.publish()
+    mark, _ = ArchiveWatermark.objects.get_or_create(dataset=name, defaults={"archived_before": cutoff})
+    ArchiveWatermark.objects.filter(pk=mark.pk).update(
+        archived_before=cutoff, archived_through_id=max(through, last_id), rows=F("rows") + total,
+    )
+
+    deleted = 0
+    if dataset.delete:
+        if previous:
+            deleted += _delete_archived(dataset, previous, through, chunk_size)
+        for first_id, last_id in chunks:
+            with transaction.atomic():
+                deleted += qs.filter(id__gte=first_id, id__lte=last_id).delete()[0]
+    return {"dataset": name, "rows": total, "months": months, "deleted": deleted, "cutoff": cutoff}
+
+
+def _delete_archived(dataset, before, through_id, chunk_size):
+    """Delete rows a previous run copied but failed to delete (below its watermark, id <= its last copied id)."""
+    leftover = dataset.model.objects.filter(created_at__lt=before, id__lte=through_id)
+    deleted = 0
+    while True:
+        ids = list(leftover.order_by("id").values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += dataset.model.objects.filter(id__in=ids).delete()[0]
+
+
+# ----------------------------
+# Reading
+# ----------------------------
+def scan(name, start, end, columns=None, filter=None):
+    """
+    pyarrow Table of archived rows with start <= created_at < end. Only the
+    month partitions overlapping the range are opened.
+    """
+    _require_pyarrow()
+    base = os.path.join(_root(), name)
+    schema = DATASETS[name].schema()
+    if not os.path.isdir(base):
+        return schema.empty_table().select(columns or schema.names)
+    part = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+    dataset = ds.dataset(base, format="parquet", partitioning=part, schema=schema.append(pa.field("month", pa.string())),
+                         exclude_invalid_files=True)
+    lo, hi = pa.scalar(start, pa.timestamp("us", tz="UTC")), pa.scalar(end, pa.timestamp("us", tz="UTC"))
+    expr = ((ds.field("month") >= f"{start.astimezone(dt_timezone.utc):%Y-%m}")
+            & (ds.field("month") <= f"{end.astimezone(dt_timezone.utc):%Y-%m}")
+            & (ds.field("created_at") >= lo) & (ds.field("created_at") < hi))
+    if filter is not None:
+        expr = expr & filter
+    return dataset.to_table(columns=columns or schema.names, filter=expr)
+
+
+def earliest(name):
+    """Oldest archived created_at of a dataset (None when nothing is archived)."""
+    if not HAS_PYARROW or not watermark(name):
+        return None
+    base = os.path.join(_root(), name)
+    months = sorted(d for d in os.listdir(base) if d.startswith("month=")) if os.path.isdir(base) else []
+    for month in months:
+        files = [os.path.join(base, month, f) for f in os.listdir(os.path.join(base, month))
+                 if f.endswith(".parquet")]
+        if files:
+            oldest = pc.min(pq.read_table(files, columns=["created_at"])["created_at"]).as_py()
+            if oldest:
+                return oldest
+    return None
+
+
+def _cold_counts(name, key, start, end, values=None, where=None):
+    """{key value: n} over the archive; key may be "day"/"hour" to bucket created_at locally."""
+    filt = None
+    for field, value in (where or {}).items():
+        cond = ds.field(field) == value
+        filt = cond if filt is None else filt & cond
+    if values is not None and key not in ("day", "hour"):
+        cond = ds.field(key).isin(list(values))
+        filt = cond if filt is None else filt & cond
+    table = scan(name, start, end, columns=["created_at"] if key in ("day", "hour") else [key], filter=filt)
+    if key in ("day", "hour"):
+        local = pc.local_timestamp(table["created_at"].cast(pa.timestamp("us", tz=timezone.get_current_timezone_name())))
+        buckets = pc.floor_temporal(local, unit=key)
+        table = pa.table({key: buckets})
+    counts = table.group_by(key).aggregate([([], "count_all")])
+    out = {}
+    tz = timezone.get_current_timezone()
+    for k, n in zip(counts[key].to_pylist(), counts["count_all"].to_pylist()):
+        if key == "day":
+            k = k.date()
+        elif key == "hour":
+            k = timezone.make_aware(k, tz)
+        out[k] = n
+    return out
+
+
+def count_by(name, key, start, end, values=None, where=None, queryset=None):
+    """
+    Row counts grouped by `key` for start <= created_at < end, from the
+    database above the dataset's watermark and the Parquet archive below it.
+    `key` is a column, or "day"/"hour" for local created_at buckets;
+    `values` restricts a column key to those values, `where` adds equality
+    filters, and `queryset` narrows the hot side (defaults to all rows).
+    """
+    dataset = DATASETS[name]
+    mark = watermark(name)
+    qs = queryset if queryset is not None else dataset.model.objects.all()
+    if where:
+        qs = qs.filter(**where)
+
+    out = {}
+    hot_start = max(start, mark) if mark else start
+    if hot_start < end:
+        hot = qs.filter(created_at__gte=hot_start, created_at__lt=end)
+        if key in ("day", "hour"):
+            trunc = TruncDate if key == "day" else TruncHour
+            hot = hot.annotate(**{f"{key}_bucket": trunc("created_at")})
+            group = f"{key}_bucket"
+        else:
+            if values is not None:
+                hot = hot.filter(**{f"{key}__in": list(values)})
+            group = key
+        out = dict(hot.order_by().values(group).annotate(n=Count("pk")).values_list(group, "n"))
+
+    if mark and start < mark and HAS_PYARROW:
+        for k, n in _cold_counts(name, key, start, min(end, mark), values, where).items():
+            out[k] = out.get(k, 0) + n
+    return out
@@ -0,0 +1,168 @@
+# admindashboard/auditlog.py
+"""
+Buffered writer for UserSessionLog / RegistrationLog.
+
+Auth signals used to INSERT one row per login, logout and failed login, so
+a credential-stuffing burst turned into a write storm on the primary. Now
+the signal handlers only append to a bounded in-process queue; a writer
+thread drains it with bulk_create when FLUSH_SIZE rows are waiting or
+FLUSH_SECONDS have passed, and whatever is left is written at exit.
+
+Overload handling, in order:
+  * above SAMPLE_HIGH_WATER of MAX_QUEUE, failed-login rows are sampled
+    (keep probability falls linearly to MIN_SAMPLE_RATE as the queue fills);
+  * at MAX_QUEUE every new row is dropped.
+The dashboard rollups still count every event -- counting is an in-memory
+increment folded into one UPDATE per bucket at flush time -- so only the
+per-event detail rows are lost. stats() reports queued / written /
+sampled_out / dropped / errors.
+"""
+import atexit
+import random
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from myproject import metrics
+
+from . import rollups
+from .models import UserSessionLog, RegistrationLog
+
+DEFAULTS = {
+    "enabled": True,
+    "max_queue": 10000,
+    "flush_size": 500,
+    "flush_seconds": 2.0,
+    "sample_high_water": 0.5,
+    "min_sample_rate": 0.01,
+}
+
+_ROLLUP_METRIC = {
+    UserSessionLog.LOGIN: "logins",
+    UserSessionLog.LOGOUT: "logouts",
+    UserSessionLog.LOGIN_FAILED: "failed_logins",
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "AUDIT_LOG_BUFFER", {})}
+
+
+class AuditLogBuffer:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._counts = Counter()  # (metric, hour bucket) -> events not yet added to the rollups
+        self._thread = None
+        self._flush_lock = threading.Lock()
+        self.stats_counters = Counter()
+
+    # ---------- producers (signal handlers) ----------
+    def log_session(self, action, user=None, ip=None, user_agent=""):
+        row = UserSessionLog(user=user, action=action, ip=ip, user_agent=user_agent)
+        with self._cond:
+            self._counts[(_ROLLUP_METRIC[action], rollups.hour_bucket(row.created_at))] += 1
+        self._enqueue(row, sampleable=action == UserSessionLog.LOGIN_FAILED)
+
+    def log_registration(self, user, source="post_save"):
+        self._enqueue(RegistrationLog(user=user, source=source), sampleable=False)
+
+    def _enqueue(self, row, sampleable):
+        cfg = _config()
+        if not cfg["enabled"]:
+            with self._cond:
+                self._queue.append(row)
+            self.flush()
+            return
+
+        with self._cond:
+            depth, limit = len(self._queue), cfg["max_queue"]
+            if depth >= limit:
+                self.stats_counters["dropped"] += 1
+                return
+            high = cfg["sample_high_water"] * limit
+            if sampleable and depth >= high:
+                keep = max(cfg["min_sample_rate"], (limit - depth) / max(limit - high, 1))
+                if random.random() >= keep:
+                    self.stats_counters["sampled_out"] += 1
+                    return
+            self._queue.append(row)
+            self.stats_counters["queued"] += 1
+            if len(self._queue) >= cfg["flush_size"]:
+                self._cond.notify()
+        self._ensure_writer()
+
+    # ---------- writer ----------
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():  # not started yet, or lost in a fork
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=_config()["flush_seconds"])
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write everything queued so far. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._queue = list(self._queue), deque()
+                counts, self._counts = self._counts, Counter()
+            if not rows and not counts:
+                return 0
+            started = time.perf_counter()
+            sessions = [r for r in rows if isinstance(r, UserSessionLog)]
+            registrations = [r for r in rows if isinstance(r, RegistrationLog)]
+            try:
+                with transaction.atomic():
+                    UserSessionLog.objects.bulk_create(sessions)
+                    RegistrationLog.objects.bulk_create(registrations)
+                    for (metric, hour), n in counts.items():
+                        rollups.bump(metric, hour, delta=n)
+                self.stats_counters["written"] += len(rows)
+            except DatabaseError:
+                # e.g. a logged user was deleted before the flush; keep what we can row by row
+                self.stats_counters["errors"] += 1
+                self._write_one_by_one(rows, counts)
+            self.stats_counters["flushes"] += 1
+            self.stats_counters["last_flush_ms"] = int((time.perf_counter() - started) * 1000)
+            return len(rows)
+
+    def _write_one_by_one(self, rows, counts):
+        for metric_hour, n in counts.items():
+            try:
+                rollups.bump(metric_hour[0], metric_hour[1], delta=n)
+            except DatabaseError:
+                self.stats_counters["dropped"] += n
+        for row in rows:
+            try:
+                row.save(force_insert=True)
+                self.stats_counters["written"] += 1
+            except DatabaseError:
+                self.stats_counters["dropped"] += 1
+
+    # ---------- metrics ----------
+    def stats(self):
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            "queue_depth": depth,
+            "max_queue": _config()["max_queue"],
+            **{k: self.stats_counters[k] for k in
+               ("queued", "written", "sampled_out", "dropped", "errors", "flushes", "last_flush_ms")},
+        }
+
+
+buffer = AuditLogBuffer()
+atexit.register(buffer.flush)
+metrics.register_queue("audit_log", lambda: len(buffer._queue))
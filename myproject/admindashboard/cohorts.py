@@ -0,0 +1,165 @@
+# admindashboard/cohorts.py
+"""
+Weekly cohort retention.
+
+A user's cohort is the local week (Monday start) of their RegistrationLog
+row; they count as retained in week k when they have any activity -- a
+login (UserSessionLog), a post or a like -- k weeks after that. Everything
+is loaded once as int64 arrays (user id, epoch seconds computed in SQL)
+and reduced with NumPy: events are mapped to (user, age) pairs,
+de-duplicated with np.unique, and counted per (cohort, age) with one
+bincount. No per-user Python loops, so a year of logs takes seconds.
+
+Archived log rows (admindashboard/archive.py) are read from Parquet.
+Results are cached per (first week, number of weeks, activity set); the
+key changes every week, so a new week starts a fresh matrix.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import BigIntegerField, Func
+from django.utils import timezone
+
+from . import archive
+from .models import RegistrationLog, UserSessionLog
+
+ACTIVITY_SOURCES = ("logins", "posts", "likes")
+CACHE_SECONDS = 15 * 60
+WEEK = 7 * 24 * 3600
+
+
+def _epoch(dt):
+    return int(dt.timestamp())
+
+class EpochSeconds(Func):
+    """Unix seconds of a datetime column, computed in SQL so no datetime objects are built."""
+    output_field = BigIntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra):
+        # '%%%%s' -> '%%s' after the template -> '%s' after the driver's %s -> ? rewrite; the
+        # fraction is cut off first because strftime() rounds it to milliseconds (x.9996 -> x+1)
+        return self.as_sql(compiler, connection,
+                           template="CAST(strftime('%%%%s', substr(%(expressions)s, 1, 19)) AS INTEGER)", **extra)
+
+    def as_postgresql(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template="CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT)",
+                           **extra)
+
+    def as_mysql(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)", **extra)
+
+def _from_archive(name, user_col, start, end, where=None):
+    if not archive.HAS_PYARROW or not archive.watermark(name):
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    filt = None
+    for field, value in (where or {}).items():
+        cond = archive.ds.field(field) == value
+        filt = cond if filt is None else filt & cond
+    table = archive.scan(name, start, min(end, archive.watermark(name)),
+                         columns=[user_col, "created_at"], filter=filt)
+    table = table.filter(archive.pc.is_valid(table[user_col]))
+    ts = archive.pc.cast(table["created_at"], archive.pa.int64()).to_numpy() // 1_000_000  # us -> s
+    return table[user_col].to_numpy().astype(np.int64), ts.astype(np.int64)
+
+def _load(qs, user_field, start, end):
+    """(int64 user ids, int64 epoch seconds) of the rows in [start, end)."""
+    rows = (qs.filter(created_at__gte=start, created_at__lt=end, **{f"{user_field}__isnull": False})
+            .order_by().values_list(user_field, EpochSeconds("created_at")).iterator(chunk_size=20000))
+    pairs = np.fromiter(rows, dtype=[("user", np.int64), ("ts", np.int64)])
+    return pairs["user"], pairs["ts"]
+
+def load_events(start, end, sources=ACTIVITY_SOURCES):
+    """(registration ids, ts), (activity ids, ts) for [start, end)."""
+    from myapp.models import Post, Like
+
+    def hot_and_cold(name, qs, user_field, where=None):
+        mark = archive.watermark(name)
+        hot_start = max(start, mark) if mark else start
+        hot = _load(qs, user_field, hot_start, end)
+        cold = _from_archive(name, user_field, start, end, where)
+        return np.concatenate([hot[0], cold[0]]), np.concatenate([hot[1], cold[1]])
+
+    regs = hot_and_cold("registration_logs", RegistrationLog.objects.all(), "user_id")
+    parts = []
+    if "logins" in sources:
+        parts.append(hot_and_cold("session_logs", UserSessionLog.objects.filter(action=UserSessionLog.LOGIN),
+                                  "user_id", {"action": UserSessionLog.LOGIN}))
+    if "posts" in sources:
+        parts.append(_load(Post.objects.all(), "author_id", start, end))
+    if "likes" in sources:
+        parts.append(_load(Like.objects.all(), "user_id", start, end))
+    ids = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, np.int64)
+    ts = np.concatenate([p[1] for p in parts]) if parts else np.empty(0, np.int64)
+    return regs, (ids, ts)
+
+
+def retention_matrix(reg_ids, reg_ts, act_ids, act_ts, origin, weeks):
+    """
+    counts[c, k] = users of cohort week c active k weeks after registering,
+    for c, k in [0, weeks). Returns (sizes, counts).
+    """
+    # one cohort per user: earliest registration
+    order = np.lexsort((reg_ts, reg_ids))
+    reg_ids, reg_ts = reg_ids[order], reg_ts[order]
+    first = np.ones(len(reg_ids), bool)  # stays empty when nobody registered
+    first[1:] = reg_ids[1:] != reg_ids[:-1]
+    users, cohort = reg_ids[first], (reg_ts[first] - origin) // WEEK
+    keep = (cohort >= 0) & (cohort < weeks)
+    users, cohort = users[keep], cohort[keep]
+    sizes = np.bincount(cohort, minlength=weeks)[:weeks]
+
+    # events -> (user index, age in weeks)
+    pos = np.searchsorted(users, act_ids)
+    pos = np.clip(pos, 0, max(len(users) - 1, 0))
+    known = (users[pos] == act_ids) if len(users) else np.zeros(len(act_ids), bool)
+    u_idx = pos[known]
+    age = (act_ts[known] - origin) // WEEK - cohort[u_idx]
+    ok = (age >= 0) & (age < weeks)
+    pairs = np.unique(u_idx[ok] * weeks + age[ok])
+
+    cells = cohort[pairs // weeks] * weeks + pairs % weeks
+    counts = np.bincount(cells, minlength=weeks * weeks).reshape(weeks, weeks)
+    return sizes, counts
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+def cohorts(weeks=12, sources=ACTIVITY_SOURCES, use_cache=True):
+    """
+    Retention for the last `weeks` registration weeks (current week included):
+    {"weeks": n, "activity": [...], "cohorts": [{"week", "size", "active", "retention"}, ...]}
+    """
+    sources = tuple(s for s in ACTIVITY_SOURCES if s in sources)
+    first_week = week_start(timezone.localdate()) - timedelta(weeks=weeks - 1)
+    key = f"cohorts:v1:{first_week.isoformat()}:{weeks}:{','.join(sources)}"
+    if use_cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    start = timezone.make_aware(datetime.combine(first_week, time.min))
+    end = start + timedelta(weeks=weeks)
+    (reg_ids, reg_ts), (act_ids, act_ts) = load_events(start, end, sources)
+    sizes, counts = retention_matrix(reg_ids, reg_ts, act_ids, act_ts, _epoch(start), weeks)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(sizes[:, None] > 0, counts / sizes[:, None], 0.0)
+
+    elapsed = weeks - np.arange(weeks)  # cohort c has only seen weeks - c weeks so far
+    result = {
+        "weeks": weeks,
+        "activity": list(sources),
+        "cohorts": [
+            {
+                "week": first_week + timedelta(weeks=c),
+                "size": int(sizes[c]),
+                "active": counts[c, :elapsed[c]].tolist(),
+                "retention": np.round(rates[c, :elapsed[c]], 4).tolist(),
+            }
+            for c in range(weeks)
+        ],
+    }
+    if use_cache:
+        cache.set(key, result, CACHE_SECONDS)
+    return result
@@ -0,0 +1,270 @@
+# admindashboard/exports.py
+"""
+Streaming exports (CSV / NDJSON / Parquet) for users, posts and auth logs.
+
+Rows are read in id order, one keyset window at a time
+(`id > last_id ORDER BY id LIMIT WINDOW`), and each window is consumed with
+QuerySet.iterator(chunk_size=...). Every window is its own short
+autocommit query, so a million-row export never holds a read transaction
+(or, on SQLite, a shared lock that blocks writers) for the whole download,
+and memory stays at one window regardless of the export size.
+
+Parquet is streamed too: each window becomes one row group written to a
+sink that hands the bytes to the response as soon as they are produced.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from django.contrib.auth import get_user_model
+
+from myapp.models import Post
+from .models import UserSessionLog, RegistrationLog
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except Exception:
+    pa = pq = None
+    HAS_PYARROW = False
+
+WINDOW = 5000
+CHUNK_SIZE = 1000
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# ----------------------------
+# Datasets: output column -> values() path
+# ----------------------------
+def _datasets():
+    User = get_user_model()
+    return {
+        "users": (User.objects.all(), "date_joined", {
+            "id": "id",
+            "email": "email",
+            "full_name": "profile__full_name",
+            "major": "profile__major",
+            "year": "profile__year",
+            "date_joined": "date_joined",
+            "is_active": "is_active",
+            "is_staff": "is_staff",
+            "posts_count": "profile__posts_count",
+            "followers_count": "profile__followers_count",
+            "following_count": "profile__following_count",
+        }),
+        "posts": (Post.objects.all(), "created_at", {
+            "id": "id",
+            "author_id": "author_id",
+            "author_email": "author__email",
+            "text": "text",
+            "is_edited": "is_edited",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+            "likes_count": "likes_count",
+            "comments_count": "comments_count",
+            "saves_count": "saves_count",
+        }),
+        "session_logs": (UserSessionLog.objects.all(), "created_at", {
+            "id": "id",
+            "user_id": "user_id",
+            "action": "action",
+            "ip": "ip",
+            "user_agent": "user_agent",
+            "created_at": "created_at",
+        }),
+        "registration_logs": (RegistrationLog.objects.all(), "created_at", {
+            "id": "id",
+            "user_id": "user_id",
+            "source": "source",
+            "created_at": "created_at",
+        }),
+    }
+
+DATASETS = ("users", "posts", "session_logs", "registration_logs")
+
+
+class ExportError(ValueError):
+    pass
+
+
+def prepare(dataset, columns=None, since=None, until=None):
+    """
+    Validate the request and return (queryset, output columns, values() paths).
+    `since`/`until` are aware datetimes bounding the dataset's date field.
+    """
+    specs = _datasets()
+    if dataset not in specs:
+        raise ExportError(f"unknown dataset '{dataset}'")
+    qs, date_field, available = specs[dataset]
+    columns = columns or list(available)
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        raise ExportError(f"unknown column(s): {', '.join(unknown)}; available: {', '.join(available)}")
+    if "id" not in columns:
+        columns = ["id"] + columns  # the keyset needs it; dropped again on output
+        keep_id = False
+    else:
+        keep_id = True
+    if since:
+        qs = qs.filter(**{f"{date_field}__gte": since})
+    if until:
+        qs = qs.filter(**{f"{date_field}__lt": until})
+    paths = [available[c] for c in columns]
+    out_cols = columns if keep_id else columns[1:]
+    return qs, out_cols, paths
+
+
+def iter_rows(qs, paths, window=WINDOW, chunk_size=CHUNK_SIZE, key=0):
+    """Tuples in id order, one short keyset query per window; `key` is the position of id in `paths`."""
+    last_id = 0
+    while True:
+        n = 0
+        rows = qs.filter(id__gt=last_id).order_by("id").values_list(*paths)[:window]
+        for row in rows.iterator(chunk_size=chunk_size):
+            n += 1
+            last_id = row[key]
+            yield row
+        if n < window:
+            return
+
+
+def _windows(rows, size=WINDOW):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+# ----------------------------
+# Encoders (generators of bytes/str)
+# ----------------------------
+class _Echo:
+    """File-like object for csv.writer that returns what it is given."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, columns, drop_id):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_plain(v) for v in (row[1:] if drop_id else row)])
+
+
+def stream_ndjson(rows, columns, drop_id):
+    if HAS_ORJSON:
+        def dumps(obj):
+            return orjson.dumps(obj, default=str) + b"\n"
+    else:
+        def dumps(obj):
+            return (json.dumps(obj, default=str) + "\n").encode()
+    for row in rows:
+        values = row[1:] if drop_id else row
+        yield dumps(dict(zip(columns, (_plain(v) for v in values))))
+
+
+class _ParquetSink:
+    """Write-only, non-seekable sink: the bytes pyarrow writes are collected until drained."""
+
+    def __init__(self):
+        self.parts, self.pos, self.closed = [], 0, False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+
+def _arrow_type(model, path):
+    """Arrow type of a values() path such as "author__email" or "user_id"."""
+    *relations, name = path.split("__")
+    for rel in relations:
+        model = model._meta.get_field(rel).related_model
+    field = model._meta.get_field(name[:-3] if name.endswith("_id") and name != "id" else name)
+    kind = field.get_internal_type()
+    if field.is_relation or kind in ("AutoField", "BigAutoField", "IntegerField", "BigIntegerField",
+                                     "PositiveIntegerField", "PositiveBigIntegerField", "SmallIntegerField"):
+        return pa.int64()
+    if kind == "DateTimeField":
+        return pa.timestamp("us", tz="UTC")
+    if kind == "DateField":
+        return pa.date32()
+    if kind == "BooleanField":
+        return pa.bool_()
+    if kind == "FloatField":
+        return pa.float64()
+    return pa.string()
+
+
+def stream_parquet(rows, columns, drop_id, model=None, paths=None):
+    if not HAS_PYARROW:
+        raise ExportError("Parquet export requires the pyarrow package.")
+    if drop_id:
+        paths = paths[1:]
+    schema = pa.schema([(c, _arrow_type(model, p)) for c, p in zip(columns, paths)])
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    for batch in _windows(rows):
+        if drop_id:
+            batch = [r[1:] for r in batch]
+        writer.write_table(pa.Table.from_pydict(
+            {c: [r[i] for r in batch] for i, c in enumerate(columns)}, schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export(dataset, fmt, columns=None, since=None, until=None):
+    """Returns (byte/str generator, content type); raises ExportError on bad input."""
+    if fmt not in FORMATS:
+        raise ExportError(f"unknown format '{fmt}'; use one of: {', '.join(FORMATS)}")
+    if fmt == "parquet" and not HAS_PYARROW:
+        raise ExportError("Parquet export requires the pyarrow package.")
+    qs, out_cols, paths = prepare(dataset, columns, since, until)
+    drop_id = len(paths) != len(out_cols)
+    rows = iter_rows(qs, paths, key=paths.index("id"))  # the caller may list id anywhere
+    if fmt == "csv":
+        stream = stream_csv(rows, out_cols, drop_id)
+    elif fmt == "ndjson":
+        stream = stream_ndjson(rows, out_cols, drop_id)
+    else:
+        stream = stream_parquet(rows, out_cols, drop_id, model=qs.model, paths=paths)
+    return stream, FORMATS[fmt]
@@ -0,0 +1,183 @@
+# admindashboard/hll.py
+"""
+Distinct active users (DAU / WAU / MAU) with HyperLogLog.
+
+Every login and every authenticated request adds the user id to the
+"active_users" sketch of the current local day. A sketch is 2**PRECISION
+one-byte registers (4 KB, ~1.6% standard error) whatever the number of
+users, and two sketches merge by taking the register-wise max -- so WAU/MAU
+for any day is the merge of the 7/30 day sketches before it, with no
+COUNT(DISTINCT) over UserSessionLog.
+
+As with the heavy-hitter sketches, each process keeps its own registers in
+memory and folds them into the CardinalitySketch rows every
+HLL_FLUSH_SECONDS and at exit. Reads merge in this process's unflushed
+registers instead of flushing, so a dashboard GET never writes.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from myproject.querybudget import unbudgeted
+
+from .models import CardinalitySketch
+from .rollups import day_bucket
+
+logger = logging.getLogger(__name__)
+
+PRECISION = 12
+M = 1 << PRECISION
+ACTIVE_USERS = "active_users"
+
+
+class HyperLogLog:
+    def __init__(self, registers=None):
+        if registers:
+            self.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+        else:
+            self.registers = np.zeros(M, dtype=np.uint8)
+
+    def add(self, item):
+        h = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "little")
+        idx = h & (M - 1)
+        rest = h >> PRECISION
+        rank = (64 - PRECISION) - rest.bit_length() + 1  # leading zeros of the remaining bits + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        return estimate(self.registers)
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+
+def estimate(registers):
+    """Cardinality estimate for one register array (Flajolet et al., small-range corrected)."""
+    alpha = 0.7213 / (1 + 1.079 / M)
+    raw = alpha * M * M / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * M and zeros:
+        return int(round(M * np.log(M / zeros)))  # linear counting
+    return int(round(raw))
+
+
+# ----------------------------
+# Per-process buffer
+# ----------------------------
+class ActivityBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (name, day) -> HyperLogLog
+        self._last_flush = time.monotonic()
+
+    def record(self, user_id, name=ACTIVE_USERS, when=None):
+        key = (name, day_bucket(when or timezone.now()))
+        with self._lock:
+            sketch = self._pending.get(key)
+            if sketch is None:
+                sketch = self._pending[key] = HyperLogLog()
+            sketch.add(user_id)
+            due = time.monotonic() - self._last_flush >= getattr(settings, "HLL_FLUSH_SECONDS", 30)
+        if due:
+            self.flush()
+
+    def snapshot(self, name, first_day, last_day):
+        """{day: copy of this process's unflushed registers} of `name` in the day range."""
+        with self._lock:
+            return {day: sketch.registers.copy() for (n, day), sketch in self._pending.items()
+                    if n == name and first_day <= day <= last_day}
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        with unbudgeted():  # runs inside whichever request happened to trigger it
+            for (name, day), sketch in pending.items():
+                try:
+                    merged = _merge_into_row(name, day, sketch)
+                except DatabaseError:  # e.g. "database is locked": not worth failing the request over
+                    logger.warning("could not flush the %s sketch of %s; kept for the next flush",
+                                   name, day, exc_info=True)
+                    merged = False
+                if not merged:
+                    self._requeue((name, day), sketch)
+
+    def _requeue(self, key, sketch):
+        with self._lock:
+            current = self._pending.get(key)
+            self._pending[key] = sketch if current is None else current.merge(sketch)
+
+
+def _merge_into_row(name, day, sketch):
+    """
+    Compare-and-swap: the UPDATE only lands if the registers are still the
+    ones the merge was computed from (select_for_update is a no-op on
+    SQLite, so a plain read-modify-write could lose a concurrent flush).
+    Returns False when it kept losing the race.
+    """
+    for _attempt in range(5):
+        with transaction.atomic():
+            row = (CardinalitySketch.objects.filter(name=name, day=day)
+                   .values_list("pk", "registers").first())
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        CardinalitySketch.objects.create(name=name, day=day, registers=sketch.to_bytes())
+                    return True
+                except IntegrityError:
+                    continue  # created concurrently; merge into that row
+            pk, stored = row[0], bytes(row[1])
+            registers = HyperLogLog(stored).merge(sketch).to_bytes()
+            if registers == stored:
+                return True
+            if (CardinalitySketch.objects.filter(pk=pk, registers=stored)
+                    .update(registers=registers, updated_at=timezone.now())):
+                return True
+    return False
+
+
+activity = ActivityBuffer()
+atexit.register(activity.flush)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def active_series(start_day, end_day, name=ACTIVE_USERS, windows=(("dau", 1), ("wau", 7), ("mau", 30))):
+    """
+    {"dau": [{"day": d, "count": n}, ...], "wau": [...], "mau": [...]} for
+    every local day in [start_day, end_day]. Reads the day sketches once
+    (plus the 29 days before start_day for the trailing windows).
+    """
+    longest = max(w for _k, w in windows)
+    first = start_day - timedelta(days=longest - 1)
+    n_days = (end_day - first).days + 1
+    regs = np.zeros((n_days, M), dtype=np.uint8)
+    for day, registers in (CardinalitySketch.objects
+                           .filter(name=name, day__range=(first, end_day))
+                           .values_list("day", "registers")):
+        regs[(day - first).days] = np.frombuffer(bytes(registers), dtype=np.uint8)
+    for day, registers in activity.snapshot(name, first, end_day).items():
+        np.maximum(regs[(day - first).days], registers, out=regs[(day - first).days])
+
+    out = {key: [] for key, _w in windows}
+    offset = (start_day - first).days
+    for i in range(offset, n_days):
+        day = first + timedelta(days=i)
+        for key, width in windows:
+            merged = regs[max(0, i - width + 1): i + 1].max(axis=0)
+            out[key].append({"day": day, "count": estimate(merged)})
+    return out
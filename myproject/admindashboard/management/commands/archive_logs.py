@@ -0,0 +1,28 @@
+# admindashboard/management/commands/archive_logs.py
+from django.core.management.base import BaseCommand, CommandError
+
+from admindashboard import archive
+
+
+class Command(BaseCommand):
+    help = ("Move old activity rows into monthly Parquet files under ARCHIVE_ROOT "
+            "(likes are copied, not deleted).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", action="append", choices=sorted(archive.DATASETS),
+                            help="dataset to archive (repeatable; default: all)")
+        parser.add_argument("--older-than", type=int, metavar="DAYS",
+                            help="override the per-dataset age threshold")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="only count what would be archived")
+
+    def handle(self, *args, **opts):
+        if not archive.HAS_PYARROW:
+            raise CommandError("pyarrow is not installed.")
+        for name in opts["dataset"] or sorted(archive.DATASETS):
+            stats = archive.archive(name, opts["older_than"], opts["chunk_size"], opts["dry_run"])
+            verb = "would archive" if opts["dry_run"] else "archived"
+            self.stdout.write(
+                f"{name}: {verb} {stats['rows']} rows before {stats['cutoff']:%Y-%m-%d %H:%M} "
+                f"({', '.join(stats['months']) or 'no files'}), deleted {stats['deleted']}"
+            )
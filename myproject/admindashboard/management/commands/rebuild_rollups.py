@@ -0,0 +1,50 @@
+# admindashboard/management/commands/rebuild_rollups.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admindashboard import rollups, sketches
+
+
+class Command(BaseCommand):
+    help = ("Recompute dashboard rollups and heavy-hitter sketches from the raw tables. Run with "
+            "--all --include-auth once after deploying (the first backfill of logins/failed logins), then e.g. "
+            "nightly with the default --days to catch up; later --all runs keep the live auth counters.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="rebuild the last N local days (default 2)")
+        parser.add_argument("--since", help="rebuild from this date (YYYY-MM-DD) up to today")
+        parser.add_argument("--all", action="store_true", help="rebuild everything since the first activity")
+        parser.add_argument("--include-auth", action="store_true",
+                            help="also recount logins/logouts/failed logins from UserSessionLog; use it for the "
+                                 "first backfill only (undercounts periods where the audit-log buffer sampled)")
+        parser.add_argument("--keep-hourly", type=int, default=30, metavar="DAYS",
+                            help="drop hourly buckets older than this (0 keeps all)")
+
+    def handle(self, *args, **opts):
+        today = timezone.localdate()
+        if opts["all"]:
+            start = rollups.earliest_day() or today
+        elif opts["since"]:
+            try:
+                start = date.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+        else:
+            start = today - timedelta(days=max(opts["days"], 1) - 1)
+
+        # the live auth counters are exact; a recount from the sampled audit log is only for the first backfill
+        metrics = rollups.METRICS if opts["include_auth"] else None
+        daily, hourly = rollups.rebuild(start, today, metrics)
+        sketch_rows = sketches.rebuild(start, today)
+        if opts["all"]:
+            rollups.mark_built(start)
+        self.stdout.write(self.style.SUCCESS(
+            f"{start}..{today}: {daily} daily and {hourly} hourly buckets, "
+            f"{sketch_rows} heavy-hitter sketches written"
+        ))
+        if opts["keep_hourly"]:
+            pruned = rollups.prune_hourly(opts["keep_hourly"])
+            if pruned:
+                self.stdout.write(f"pruned {pruned} hourly buckets")
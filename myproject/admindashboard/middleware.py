@@ -0,0 +1,16 @@
+# admindashboard/middleware.py
+from .hll import activity
+
+
+class ActiveUserMiddleware:
+    """Adds the authenticated user of every request to today's active-users HyperLogLog."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            activity.record(user.pk)
+        return response
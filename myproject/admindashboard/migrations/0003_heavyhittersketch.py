@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0002_dailyrollup_hourlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyHitterSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('summary', models.JSONField(default=list)),
+                ('countmin', models.BinaryField(default=b'')),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('stream', 'day'), name='unique_sketch_per_stream_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0003_heavyhittersketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardinalitySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30)),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'day'), name='unique_cardinality_sketch_per_day')],
+            },
+        ),
+    ]
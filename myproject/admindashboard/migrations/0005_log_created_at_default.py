@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0004_cardinalitysketch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registrationlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='usersessionlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
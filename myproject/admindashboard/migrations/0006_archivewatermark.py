@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0005_log_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=30, unique=True)),
+                ('archived_before', models.DateTimeField()),
+                ('rows', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:26
+
+from django.db import migrations, models
+from django.db.models import Max
+
+# dataset -> model, as in admindashboard/archive.py
+DATASET_MODELS = {
+    "session_logs": ("admindashboard", "UserSessionLog"),
+    "registration_logs": ("admindashboard", "RegistrationLog"),
+    "likes": ("myapp", "Like"),
+    "notifications": ("myapp", "Notification"),
+}
+
+
+def mark_existing(apps, schema_editor):
+    # runs so far treated every row below the watermark as archived
+    ArchiveWatermark = apps.get_model("admindashboard", "ArchiveWatermark")
+    for mark in ArchiveWatermark.objects.all():
+        if mark.dataset not in DATASET_MODELS:
+            continue
+        model = apps.get_model(*DATASET_MODELS[mark.dataset])
+        top = model.objects.aggregate(top=Max("id"))["top"] or 0
+        ArchiveWatermark.objects.filter(pk=mark.pk).update(archived_through_id=top)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0007_requestprofile'),
+        ('myapp', '0007_restore_notification_recipient_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivewatermark',
+            name='archived_through_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_existing, migrations.RunPython.noop),
+    ]
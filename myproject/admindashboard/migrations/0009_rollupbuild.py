@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admindashboard', '0008_archivewatermark_archived_through_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_day', models.DateField()),
+                ('built_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class UserSessionLog(models.Model):
     LOGIN = "login"
@@ -15,7 +16,8 @@ class UserSessionLog(models.Model):
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     ip = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True, default="")
-    created_at = models.DateTimeField(auto_now_add=True)
+    # set when the event happens, not when the audit-log buffer writes it (admindashboard/auditlog.py)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -27,8 +29,98 @@ class UserSessionLog(models.Model):
 class RegistrationLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     source = models.CharField(max_length=50, blank=True, default="signup_form")
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [models.Index(fields=["created_at"])]
         ordering = ["-created_at"]
+
+
+class RollupCounters(models.Model):
+    """Counters shared by the daily and hourly rollup tables (see admindashboard/rollups.py)."""
+    posts = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    registrations = models.PositiveIntegerField(default=0)
+    logins = models.PositiveIntegerField(default=0)
+    logouts = models.PositiveIntegerField(default=0)
+    failed_logins = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class DailyRollup(RollupCounters):
+    day = models.DateField(unique=True)  # local date (settings.TIME_ZONE)
+
+    class Meta:
+        ordering = ["day"]
+
+class HourlyRollup(RollupCounters):
+    hour = models.DateTimeField(unique=True)  # start of the local hour
+
+    class Meta:
+        ordering = ["hour"]
+
+class RollupBuild(models.Model):
+    """One full `rebuild_rollups --all`; from then on the signals keep the all-time totals exact."""
+    first_day = models.DateField()
+    built_at = models.DateTimeField(auto_now_add=True)
+
+class HeavyHitterSketch(models.Model):
+    """Space-Saving summary + Count-Min table for one event stream and local day (admindashboard/sketches.py)."""
+    stream = models.CharField(max_length=20)  # "authors" | "posts" | "commenters"
+    day = models.DateField()
+    summary = models.JSONField(default=list)   # [[item, count, error], ...]
+    countmin = models.BinaryField(default=b"")
+    events = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["stream", "day"], name="unique_sketch_per_stream_day"),
+        ]
+
+class CardinalitySketch(models.Model):
+    """HyperLogLog registers for one named set of ids and local day (admindashboard/hll.py)."""
+    name = models.CharField(max_length=30)  # "active_users"
+    day = models.DateField()
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "day"], name="unique_cardinality_sketch_per_day"),
+        ]
+
+class ArchiveWatermark(models.Model):
+    """Rows of `dataset` created before `archived_before` are read from the Parquet archive (admindashboard/archive.py)."""
+    dataset = models.CharField(max_length=30, unique=True)
+    archived_before = models.DateTimeField()
+    archived_through_id = models.PositiveBigIntegerField(default=0)  # highest id copied so far
+    rows = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class RequestProfile(models.Model):
+    """One profiled request, as collapsed stacks (myproject/profiling.py)."""
+    view_name = models.CharField(max_length=200)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    mode = models.CharField(max_length=10)       # "sample" (weights: samples) | "cprofile" (weights: us)
+    trigger = models.CharField(max_length=10)    # "staff" | "sampled"
+    samples = models.PositiveIntegerField(default=0)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    stacks = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["view_name", "-created_at"])]
+        ordering = ["-id"]
+
+    @classmethod
+    def prune(cls, keep):
+        """Delete all but the newest `keep` profiles."""
+        cutoff = cls.objects.order_by("-id").values_list("id", flat=True)[keep:keep + 1].first()
+        if cutoff is not None:
+            cls.objects.filter(id__lte=cutoff).delete()
@@ -0,0 +1,186 @@
+# admindashboard/rollups.py
+"""
+Pre-aggregated dashboard counters.
+
+DailyRollup / HourlyRollup hold one row per local day / hour with the number
+of posts, likes, comments, registrations, logins, logouts and failed logins
+in that bucket. Signals bump the counters in the same transaction as the
+write they count; deletes decrement the bucket the row was created in, so a
+bucket always equals a GROUP BY over the live rows. The dashboard reads only
+these tables, so its cost depends on the number of days shown, not on the
+size of Post/Like/Comment/UserSessionLog.
+
+`manage.py rebuild_rollups` recomputes a range from the raw tables (backfill
+after deploying, or catch-up after bulk imports that skip signals). A full
+rebuild (--all) is recorded in RollupBuild; only after that are the
+all-time totals used in place of COUNT(*) (built_total()).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncHour
+from django.utils import timezone
+
+from . import archive
+from .models import DailyRollup, HourlyRollup, RollupBuild
+
+METRICS = ("posts", "likes", "comments", "registrations", "logins", "logouts", "failed_logins")
+
+GRANULARITY = {
+    "day": (DailyRollup, "day"),
+    "hour": (HourlyRollup, "hour"),
+}
+
+
+# ----------------------------
+# Buckets
+# ----------------------------
+def day_bucket(dt):
+    return timezone.localdate(dt)
+
+def hour_bucket(dt):
+    return timezone.localtime(dt).replace(minute=0, second=0, microsecond=0)
+
+
+# ----------------------------
+# Incremental updates (signals)
+# ----------------------------
+def _bump_row(model, key_field, key, metric, delta):
+    qs = model.objects.filter(**{key_field: key})
+    if delta < 0:
+        qs = qs.filter(**{f"{metric}__gte": -delta})  # never below zero
+    if qs.update(**{metric: F(metric) + delta}) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**{key_field: key, metric: delta})
+    except IntegrityError:  # another request created the bucket first
+        model.objects.filter(**{key_field: key}).update(**{metric: F(metric) + delta})
+
+def bump(metric, when=None, delta=1):
+    """Add `delta` to `metric` in the day and hour buckets containing `when`."""
+    when = when or timezone.now()
+    _bump_row(DailyRollup, "day", day_bucket(when), metric, delta)
+    _bump_row(HourlyRollup, "hour", hour_bucket(when), metric, delta)
+
+
+# ----------------------------
+# Reads (dashboard)
+# ----------------------------
+def totals(*metrics):
+    """All-time totals, summed over the daily rows."""
+    metrics = metrics or METRICS
+    return DailyRollup.objects.aggregate(**{m: Coalesce(Sum(m), Value(0)) for m in metrics})
+
+def built_total(metric):
+    """
+    All-time total of `metric`, or None until `rebuild_rollups --all` has
+    run: before that the buckets only hold what the signals saw since deploy.
+    """
+    if not RollupBuild.objects.exists():
+        return None
+    return totals(metric)[metric]
+
+def series(metric, start, end, granularity="day"):
+    """[{<granularity>: bucket, "count": n}, ...] for non-empty buckets in [start, end]."""
+    model, key = GRANULARITY[granularity]
+    if granularity == "day":
+        start, end = day_bucket(start), day_bucket(end)
+    rows = (model.objects.filter(**{f"{key}__range": (start, end), f"{metric}__gt": 0})
+            .order_by(key).values_list(key, metric))
+    return [{key: bucket, "count": n} for bucket, n in rows]
+
+def window_totals(start, end, *metrics):
+    metrics = metrics or METRICS
+    return (DailyRollup.objects.filter(day__range=(day_bucket(start), day_bucket(end)))
+            .aggregate(**{m: Coalesce(Sum(m), Value(0)) for m in metrics}))
+
+
+# ----------------------------
+# Catch-up / backfill
+# ----------------------------
+def _sources():
+    """metric -> (queryset, datetime field, archived dataset or None, archive filter)."""
+    from django.contrib.auth import get_user_model
+    from myapp.models import Post, Like, Comment
+    from .models import UserSessionLog
+
+    logs = UserSessionLog.objects
+    return {
+        "posts": (Post.objects.all(), "created_at", None, None),
+        "likes": (Like.objects.all(), "created_at", "likes", None),
+        "comments": (Comment.objects.all(), "created_at", None, None),
+        "registrations": (get_user_model().objects.all(), "date_joined", None, None),
+        "logins": (logs.all(), "created_at", "session_logs", {"action": UserSessionLog.LOGIN}),
+        "logouts": (logs.all(), "created_at", "session_logs", {"action": UserSessionLog.LOGOUT}),
+        "failed_logins": (logs.all(), "created_at", "session_logs", {"action": UserSessionLog.LOGIN_FAILED}),
+    }
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+# Auth events are logged through the sampling audit-log buffer (auditlog.py),
+# so after a failed-login storm the raw table undercounts; by default a
+# rebuild keeps the counters the signals maintained for these.
+AUTH_METRICS = ("logins", "logouts", "failed_logins")
+
+def rebuild(start_day, end_day, metrics=None):
+    """
+    Recompute `metrics` (default: all but AUTH_METRICS) for local days
+    start_day..end_day (inclusive) from the raw tables; other counters of
+    existing buckets are left alone. Returns the number of daily and hourly
+    rows written.
+    """
+    metrics = metrics or [m for m in METRICS if m not in AUTH_METRICS]
+    lo, hi = local_midnight(start_day), local_midnight(end_day + timedelta(days=1))
+    daily, hourly = {}, {}
+    for metric, (qs, field, dataset, where) in _sources().items():
+        if metric not in metrics:
+            continue
+        if dataset:
+            # hot rows above the archive watermark + Parquet below it
+            for key, acc in (("day", daily), ("hour", hourly)):
+                for bucket, n in archive.count_by(dataset, key, lo, hi, where=where, queryset=qs).items():
+                    acc.setdefault(bucket, {})[metric] = n
+            continue
+        window = qs.filter(**{f"{field}__gte": lo, f"{field}__lt": hi})
+        for trunc, acc in ((TruncDate, daily), (TruncHour, hourly)):
+            rows = (window.annotate(bucket=trunc(field)).order_by()
+                    .values("bucket").annotate(n=Count("pk")).values_list("bucket", "n"))
+            for bucket, n in rows:
+                acc.setdefault(bucket, {})[metric] = n
+
+    targets = (
+        (DailyRollup, "day", daily, {"day__range": (start_day, end_day)}),
+        (HourlyRollup, "hour", hourly, {"hour__gte": lo, "hour__lt": hi}),
+    )
+    with transaction.atomic():
+        for model, key, fresh, in_range in targets:
+            existing = {getattr(r, key): r for r in model.objects.filter(**in_range)}
+            for bucket, row in existing.items():
+                counts = fresh.get(bucket, {})
+                for m in metrics:
+                    setattr(row, m, counts.get(m, 0))
+            model.objects.bulk_update(list(existing.values()), metrics, batch_size=500)
+            model.objects.bulk_create(
+                [model(**{key: b}, **counts) for b, counts in fresh.items() if b not in existing]
+            )
+    return len(daily), len(hourly)
+
+def mark_built(first_day):
+    """Record a rebuild of every day since `first_day` (see built_total)."""
+    RollupBuild.objects.create(first_day=first_day)
+
+def earliest_day():
+    """First local day with any raw activity (None on an empty database)."""
+    firsts = []
+    for qs, field, dataset, _where in _sources().values():
+        first = (dataset and archive.earliest(dataset)) or qs.order_by(field).values_list(field, flat=True).first()
+        if first:
+            firsts.append(first)
+    return day_bucket(min(firsts)) if firsts else None
+
+def prune_hourly(keep_days):
+    cutoff = hour_bucket(timezone.now()) - timedelta(days=keep_days)
+    return HourlyRollup.objects.filter(hour__lt=cutoff).delete()[0]
@@ -1,8 +1,11 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from .models import UserSessionLog, RegistrationLog
+from django.db import transaction
+from myapp.models import Post, Like, Comment
+from . import auditlog, hll, rollups, sketches
+from .models import UserSessionLog
 
 def _meta_from_request(request):
     if not request:
@@ -15,19 +18,45 @@ def _meta_from_request(request):
 @receiver(user_logged_in)
 def on_logged_in(sender, request, user, **kwargs):
     ip, ua = _meta_from_request(request)
-    UserSessionLog.objects.create(user=user, action=UserSessionLog.LOGIN, ip=ip, user_agent=ua)
+    auditlog.buffer.log_session(UserSessionLog.LOGIN, user=user, ip=ip, user_agent=ua)
+    hll.activity.record(user.pk)
 
 @receiver(user_logged_out)
 def on_logged_out(sender, request, user, **kwargs):
     ip, ua = _meta_from_request(request)
-    UserSessionLog.objects.create(user=user, action=UserSessionLog.LOGOUT, ip=ip, user_agent=ua)
+    auditlog.buffer.log_session(UserSessionLog.LOGOUT, user=user, ip=ip, user_agent=ua)
 
 @receiver(user_login_failed)
 def on_login_failed(sender, credentials, request, **kwargs):
     ip, ua = _meta_from_request(request)
-    UserSessionLog.objects.create(user=None, action=UserSessionLog.LOGIN_FAILED, ip=ip, user_agent=ua)
+    auditlog.buffer.log_session(UserSessionLog.LOGIN_FAILED, ip=ip, user_agent=ua)
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def on_user_created(sender, instance, created, **kwargs):
     if created:
-        RegistrationLog.objects.create(user=instance, source="post_save")
+        # after commit: the buffered row must not reference a user that was rolled back
+        transaction.on_commit(lambda: auditlog.buffer.log_registration(instance, source="post_save"))
+        rollups.bump("registrations", instance.date_joined)
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def on_user_deleted(sender, instance, **kwargs):
+    rollups.bump("registrations", instance.date_joined, delta=-1)
+
+# ---- dashboard rollups: created rows count in their bucket, deletes take it back ----
+_ROLLUP_MODELS = {Post: "posts", Like: "likes", Comment: "comments"}
+# heavy-hitter streams (admindashboard/sketches.py): model -> (stream, item attribute)
+_SKETCH_STREAMS = {Post: ("authors", "author_id"), Like: ("posts", "post_id"), Comment: ("commenters", "author_id")}
+
+def on_rollup_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.bump(_ROLLUP_MODELS[sender], instance.created_at)
+        stream, attr = _SKETCH_STREAMS[sender]
+        item, when = getattr(instance, attr), instance.created_at
+        transaction.on_commit(lambda: sketches.buffer.record(stream, item, when))
+
+def on_rollup_deleted(sender, instance, **kwargs):
+    rollups.bump(_ROLLUP_MODELS[sender], instance.created_at, delta=-1)
+
+for _model in _ROLLUP_MODELS:
+    post_save.connect(on_rollup_saved, sender=_model, dispatch_uid=f"rollup-save-{_model.__name__}")
+    post_delete.connect(on_rollup_deleted, sender=_model, dispatch_uid=f"rollup-delete-{_model.__name__}")
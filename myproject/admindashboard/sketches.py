@@ -0,0 +1,316 @@
+# admindashboard/sketches.py
+"""
+Streaming top-K ("heavy hitters") for the dashboard.
+
+Three event streams are tracked per local day:
+
+    authors     one event per new Post, item = author id
+    posts       one event per new Like, item = post id
+    commenters  one event per new Comment, item = comment author id
+
+Each (stream, day) keeps a Space-Saving summary of the K_CAPACITY heaviest
+items (count is an over-estimate by at most `error`) and a Count-Min table
+that bounds any item's count from above independently. Both merge, so a
+date range is answered by merging its day sketches.
+
+Events are accumulated in memory per process and merged into the
+HeavyHitterSketch rows every FLUSH_EVENTS events / FLUSH_SECONDS (and at
+exit), so a like costs a dict update, not a blob rewrite. `top()` takes the
+top candidates from the merged summary and re-counts only those against
+the raw table, which turns the approximate list into an exact one in O(K)
+indexed lookups.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from myproject import metrics
+from myproject.querybudget import unbudgeted
+
+from . import archive
+from .models import HeavyHitterSketch
+from .rollups import day_bucket, local_midnight
+
+logger = logging.getLogger(__name__)
+
+K_CAPACITY = 64        # items kept per Space-Saving summary
+CM_WIDTH = 1024
+CM_DEPTH = 4
+CANDIDATE_FACTOR = 3   # re-verify CANDIDATE_FACTOR * k candidates
+
+
+# ----------------------------
+# Sketches
+# ----------------------------
+class SpaceSaving:
+    """Metwally et al. Space-Saving: k counters, count - error <= true <= count."""
+
+    def __init__(self, k=K_CAPACITY, rows=None):
+        self.k = k
+        self.counts = {}  # item -> [count, error]
+        for item, count, error in rows or ():
+            self.counts[item] = [count, error]
+
+    def add(self, item, weight=1):
+        c = self.counts.get(item)
+        if c is not None:
+            c[0] += weight
+        elif len(self.counts) < self.k:
+            self.counts[item] = [weight, 0]
+        else:
+            victim = min(self.counts, key=lambda i: self.counts[i][0])
+            floor = self.counts.pop(victim)[0]
+            self.counts[item] = [floor + weight, floor]
+
+    def _floor(self):
+        return min((c for c, _e in self.counts.values()), default=0) if len(self.counts) >= self.k else 0
+
+    def merge(self, other):
+        """Agarwal et al. merge: an item missing on one side may have up to that side's minimum."""
+        mine, theirs = self._floor(), other._floor()
+        merged = {}
+        for item in self.counts.keys() | other.counts.keys():
+            a = self.counts.get(item, [mine, mine])
+            b = other.counts.get(item, [theirs, theirs])
+            merged[item] = [a[0] + b[0], a[1] + b[1]]
+        keep = sorted(merged.items(), key=lambda kv: -kv[1][0])[: self.k]
+        self.counts = dict(keep)
+        return self
+
+    def top(self, n):
+        """[(item, count, error)] by descending count."""
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        return [(item, c, e) for item, (c, e) in ranked[:n]]
+
+    def rows(self):
+        return [[item, c, e] for item, (c, e) in self.counts.items()]
+
+
+class CountMin:
+    """Count-Min sketch (Cormode & Muthukrishnan); estimate() never under-counts."""
+
+    def __init__(self, width=CM_WIDTH, depth=CM_DEPTH, table=None):
+        self.width, self.depth = width, depth
+        if table:
+            self.table = np.frombuffer(table, dtype=np.int64).reshape(depth, width).copy()
+        else:
+            self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _cells(self, item):
+        # double hashing from one stable 128-bit digest (same cells in every process)
+        d = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item, weight=1):
+        self.table[np.arange(self.depth), self._cells(item)] += weight
+
+    def estimate(self, item):
+        return int(self.table[np.arange(self.depth), self._cells(item)].min())
+
+    def merge(self, other):
+        self.table += other.table
+        return self
+
+    def to_bytes(self):
+        return self.table.tobytes()
+
+
+# ----------------------------
+# Streams
+# ----------------------------
+def _streams():
+    """stream -> (raw queryset, item field, archived dataset) for re-verification and rebuilds."""
+    from myapp.models import Post, Like, Comment
+    return {
+        "authors": (Post.objects.all(), "author_id", None),
+        "posts": (Like.objects.all(), "post_id", "likes"),
+        "commenters": (Comment.objects.all(), "author_id", None),
+    }
+
+STREAMS = ("authors", "posts", "commenters")
+
+
+# ----------------------------
+# Per-process buffer
+# ----------------------------
+class SketchBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (stream, day) -> [SpaceSaving, CountMin, events]
+        self._events = 0
+        self._last_flush = time.monotonic()
+
+    def _limits(self):
+        return (getattr(settings, "SKETCH_FLUSH_EVENTS", 500),
+                getattr(settings, "SKETCH_FLUSH_SECONDS", 10))
+
+    def record(self, stream, item, when=None):
+        key = (stream, day_bucket(when or timezone.now()))
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = [SpaceSaving(), CountMin(), 0]
+            entry[0].add(item)
+            entry[1].add(item)
+            entry[2] += 1
+            self._events += 1
+            max_events, max_age = self._limits()
+            due = self._events >= max_events or time.monotonic() - self._last_flush >= max_age
+        if due:
+            self.flush()
+
+    def snapshot(self, stream, first_day, last_day):
+        """Copies of this process's unflushed (SpaceSaving, CountMin) of `stream` in the day range."""
+        with self._lock:
+            return [(SpaceSaving(rows=ss.rows()), CountMin(table=cm.to_bytes()))
+                    for (s, day), (ss, cm, _events) in self._pending.items()
+                    if s == stream and first_day <= day <= last_day]
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._events = 0
+            self._last_flush = time.monotonic()
+        with unbudgeted():  # runs inside whichever request happened to trigger it
+            for (stream, day), entry in pending.items():
+                try:
+                    merged = _merge_into_row(stream, day, *entry)
+                except DatabaseError:  # e.g. "database is locked": not worth failing the request over
+                    logger.warning("could not flush the %s sketch of %s; kept for the next flush",
+                                   stream, day, exc_info=True)
+                    merged = False
+                if not merged:
+                    self._requeue((stream, day), entry)
+
+    def _requeue(self, key, entry):
+        with self._lock:
+            current = self._pending.get(key)
+            if current is None:
+                self._pending[key] = entry
+            else:
+                current[0].merge(entry[0])
+                current[1].merge(entry[1])
+                current[2] += entry[2]
+            self._events += entry[2]
+
+
+def _merge_into_row(stream, day, ss, cm, events):
+    """
+    Compare-and-swap on (pk, events): `events` grows with every merge, so
+    the UPDATE only lands if nobody merged since the read (select_for_update
+    is a no-op on SQLite). Returns False when it kept losing the race.
+    """
+    for _attempt in range(5):
+        with transaction.atomic():
+            row = (HeavyHitterSketch.objects.filter(stream=stream, day=day)
+                   .values_list("pk", "summary", "countmin", "events").first())
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        HeavyHitterSketch.objects.create(stream=stream, day=day, summary=ss.rows(),
+                                                         countmin=cm.to_bytes(), events=events)
+                    return True
+                except IntegrityError:
+                    continue  # created concurrently; merge into that row
+            pk, summary, table, stored_events = row
+            updated = HeavyHitterSketch.objects.filter(pk=pk, events=stored_events).update(
+                summary=SpaceSaving(rows=summary).merge(ss).rows(),
+                countmin=CountMin(table=bytes(table)).merge(cm).to_bytes(),
+                events=stored_events + events,
+                updated_at=timezone.now(),
+            )
+            if updated:
+                return True
+    return False
+
+
+buffer = SketchBuffer()
+atexit.register(buffer.flush)
+metrics.register_queue("sketches", lambda: buffer._events)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def merged(stream, start, end):
+    """
+    Merge the day sketches of [start, end] (local days) into one
+    (SpaceSaving, CountMin), plus this process's unflushed events (read,
+    not written: a dashboard GET stays read-only).
+    """
+    ss, cm = SpaceSaving(), CountMin()
+    first_day, last_day = day_bucket(start), day_bucket(end)
+    rows = HeavyHitterSketch.objects.filter(
+        stream=stream, day__range=(first_day, last_day)
+    ).values_list("summary", "countmin")
+    for summary, table in rows:
+        ss.merge(SpaceSaving(rows=summary))
+        cm.merge(CountMin(table=bytes(table)))
+    for pending_ss, pending_cm in buffer.snapshot(stream, first_day, last_day):
+        ss.merge(pending_ss)
+        cm.merge(pending_cm)
+    return ss, cm
+
+def top(stream, start, end, k=10, exact=True):
+    """
+    [(item, count)] for the k heaviest items in [start, end]. With exact=True
+    the candidates are re-counted in the raw table (indexed IN lookup over at
+    most CANDIDATE_FACTOR * k ids); otherwise counts are sketch estimates.
+    """
+    ss, cm = merged(stream, start, end)
+    candidates = [(item, min(c, cm.estimate(item))) for item, c, _e in ss.top(CANDIDATE_FACTOR * k)]
+    if not exact or not candidates:
+        return sorted(candidates, key=lambda ic: -ic[1])[:k]
+
+    qs, field, dataset = _streams()[stream]
+    ids = [i for i, _c in candidates]
+    if dataset:
+        # long ranges: rows below the archive watermark are counted in Parquet
+        counts = archive.count_by(dataset, field, start, end, values=ids, queryset=qs)
+    else:
+        counts = dict(
+            qs.filter(**{f"{field}__in": ids, "created_at__range": (start, end)})
+            .order_by().values(field).annotate(n=Count("pk")).values_list(field, "n")
+        )
+    ranked = sorted(counts.items(), key=lambda ic: (-ic[1], ic[0]))
+    return ranked[:k]
+
+
+# ----------------------------
+# Catch-up / backfill (rebuild_rollups)
+# ----------------------------
+def rebuild(start_day, end_day):
+    """Rebuild the day sketches of start_day..end_day from the raw tables."""
+    buffer.flush()
+    lo, hi = local_midnight(start_day), local_midnight(end_day + timedelta(days=1))
+    rows = []
+    for stream, (qs, field, _dataset) in _streams().items():
+        per_day = {}
+        for item, created in (qs.filter(created_at__gte=lo, created_at__lt=hi)
+                              .order_by().values_list(field, "created_at").iterator(chunk_size=5000)):
+            day = day_bucket(created)
+            entry = per_day.get(day)
+            if entry is None:
+                entry = per_day[day] = [SpaceSaving(), CountMin(), 0]
+            entry[0].add(item)
+            entry[1].add(item)
+            entry[2] += 1
+        rows += [
+            HeavyHitterSketch(stream=stream, day=day, summary=ss.rows(),
+                              countmin=cm.to_bytes(), events=events)
+            for day, (ss, cm, events) in per_day.items()
+        ]
+    with transaction.atomic():
+        HeavyHitterSketch.objects.filter(day__range=(start_day, end_day)).delete()
+        HeavyHitterSketch.objects.bulk_create(rows)
+    return len(rows)
@@ -1,3 +1,61 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import archive
+from .models import UserSessionLog
+
+
+@skipUnless(archive.HAS_PYARROW, "pyarrow is not installed")
+class ArchiveTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(ARCHIVE_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.now = timezone.now()
+
+    def log(self, days):
+        return UserSessionLog.objects.create(action=UserSessionLog.LOGIN_FAILED,
+                                             created_at=self.now - timedelta(days=days))
+
+    def archived_ids(self):
+        table = archive.scan("session_logs", self.now - timedelta(days=1000), self.now)
+        return table["id"].to_pylist()
+
+    def test_backdated_row_after_a_run_is_archived(self):
+        for days in (100, 120, 140):
+            self.log(days)
+        archive.archive("session_logs", older_than_days=90)
+        late = self.log(110)  # e.g. a backfill, below the watermark
+
+        stats = archive.archive("session_logs", older_than_days=90)
+
+        self.assertEqual(stats["rows"], 1)
+        self.assertIn(late.id, self.archived_ids())
+        self.assertFalse(UserSessionLog.objects.filter(pk=late.pk).exists())
+
+    def test_failed_delete_is_finished_without_copying_twice(self):
+        logs = [self.log(days) for days in range(100, 130)]
+        real_delete = QuerySet.delete
+
+        def failing(qs):
+            if qs.model is UserSessionLog:
+                raise RuntimeError("delete failed")
+            return real_delete(qs)
+
+        with mock.patch.object(QuerySet, "delete", failing), self.assertRaises(RuntimeError):
+            archive.archive("session_logs", older_than_days=90, chunk_size=10)
+        late = self.log(105)
+
+        archive.archive("session_logs", older_than_days=80)
+
+        ids = self.archived_ids()
+        self.assertEqual(sorted(ids), sorted([log.id for log in logs] + [late.id]))
+        self.assertFalse(UserSessionLog.objects.filter(created_at__lt=self.now - timedelta(days=80)).exists())
@@ -1,6 +1,6 @@
 # admindashboard/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "admindashboard"
 
@@ -13,7 +13,30 @@ urlpatterns = [
     path("api/summary/likes/", views.likes_summary, name="likes-summary"),
     path("api/summary/comments/", views.comments_summary, name="comments-summary"),
 
+    # Chart series (DRF, read from the rollup tables; ?days=30&granularity=day|hour)
+    path("api/charts/users/", api.UsersSummary.as_view(), name="charts-users"),
+    path("api/charts/posts/", api.PostsSummary.as_view(), name="charts-posts"),
+    path("api/charts/likes/", api.LikesSummary.as_view(), name="charts-likes"),
+    path("api/charts/comments/", api.CommentsSummary.as_view(), name="charts-comments"),
+    path("api/charts/auth/", api.AuthSummary.as_view(), name="charts-auth"),
+    path("api/charts/active-users/", api.ActiveUsersSummary.as_view(), name="charts-active-users"),
+    path("api/charts/cohorts/", api.CohortRetention.as_view(), name="charts-cohorts"),
+    path("api/audit-log/stats/", api.AuditLogStats.as_view(), name="audit-log-stats"),
+    path("api/query-stats/", api.QueryStats.as_view(), name="query-stats"),
+    path("api/profiles/", api.RequestProfiles.as_view(), name="profiles-api"),
+    path("api/slow-queries/", api.SlowQueries.as_view(), name="slow-queries-api"),
+
+    # Slow statements with their plans (myproject/slowqueries.py)
+    path("slow-queries/", views.slow_queries, name="slow-queries"),
+
+    # Captured request profiles (?_profile=1 on any page as staff; see myproject/profiling.py)
+    path("profiles/", views.profiles, name="profiles"),
+    path("profiles/<int:pk>/collapsed.txt", views.profile_collapsed, name="profile-collapsed"),
+
     # List JSON endpoints (optional)
     path("api/users/", views.users_list_api, name="users-list-api"),
     path("api/posts/", views.posts_list_api, name="posts-list-api"),
+
+    # Streaming exports (?format=csv|ndjson|parquet&columns=&since=&until=)
+    path("api/export/<str:dataset>/", views.export_view, name="export"),
 ]
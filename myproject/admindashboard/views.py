@@ -1,21 +1,24 @@
 # admindashboard/views.py
+from datetime import datetime, timedelta
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Count, Sum, F, Value
-from django.db.models.functions import Coalesce
-from django.http import JsonResponse
-from django.shortcuts import render
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.functional import cached_property
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.timezone import localtime
 
+from myproject import slowqueries
+
+from . import exports, rollups
+from .models import RequestProfile
+
 # Adjust import path if models live elsewhere
-from myapp.models import Post
-try:
-    from myapp.models import Comment  # optional
-    HAS_COMMENT_MODEL = True
-except Exception:
-    Comment = None
-    HAS_COMMENT_MODEL = False
+from myapp.models import Post, Profile
 
 User = get_user_model()
 
@@ -47,8 +50,28 @@ def _name_or_email(user):
         pass
     return getattr(user, "email", "") or ""
 
-def _paginate(request, queryset, per_page=10, page_param="page"):
-    paginator = Paginator(queryset, per_page)
+class RollupPaginator(Paginator):
+    """
+    Paginator whose total comes from the rollups (rollups.built_total())
+    instead of COUNT(*), so the page costs the same however big the table
+    is. Without a total (rollups never fully built) it counts as usual.
+    """
+
+    def __init__(self, object_list, per_page, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._total = total
+
+    @cached_property
+    def count(self):
+        if self._total is not None:
+            return self._total
+        return super().count
+
+def _paginate(request, queryset, per_page=10, page_param="page", total=None):
+    if total is None:
+        paginator = Paginator(queryset, per_page)
+    else:
+        paginator = RollupPaginator(queryset, per_page, total)
     page_number = request.GET.get(page_param)
     try:
         page_obj = paginator.get_page(page_number)
@@ -56,16 +79,38 @@ def _paginate(request, queryset, per_page=10, page_param="page"):
         page_obj = paginator.get_page(1)
     return page_obj
 
-def _post_likes_count_queryset():
-    """
-    Returns a queryset of Post annotated with 'likes_count_eff' that works
-    whether you store likes in IntegerField 'likes_count' or M2M 'likes'.
-    """
-    try:
-        Post._meta.get_field("likes_count")  # raises if not present
-        return Post.objects.annotate(likes_count_eff=Coalesce(F("likes_count"), Value(0)))
-    except Exception:
-        return Post.objects.annotate(likes_count_eff=Count("likes"))
+def _posts_with_counters():
+    """Posts annotated from the denormalized counters (no Count() joins)."""
+    return Post.objects.annotate(likes_count_eff=F("likes_count"), num_comments=F("comments_count"))
+
+def _top_post(order_field, out_key):
+    """Post with the highest denormalized counter; served by the Post(-<counter>) index."""
+    row = (
+        Post.objects.order_by(f"-{order_field}", "-id")
+        .values("id", "text", "created_at", "author_id", order_field)
+        .first()
+    )
+    if not row:
+        return None
+    return {
+        "id": row["id"],
+        "text": row["text"],
+        "created_at": _dt_to_str(row["created_at"]),
+        "author_id": row["author_id"],
+        out_key: row[order_field] or 0,
+    }
+
+def _latest_user():
+    row = User.objects.order_by("-id").values("id", "email", "date_joined").first()
+    return {**row, "date_joined": _dt_to_str(row["date_joined"])} if row else None
+
+def _latest_post():
+    row = (
+        Post.objects.order_by("-created_at")
+        .values("id", "text", "created_at", "author_id")
+        .first()
+    )
+    return {**row, "created_at": _dt_to_str(row["created_at"])} if row else None
 
 
 # ----------------------------
@@ -82,6 +127,7 @@ def home(request):
     Query params:
       - u (users page), p (posts page)
       - u_size (users page size), p_size (posts page size)
+    Totals come from the daily rollups (admindashboard/rollups.py).
     """
     # Page sizes (defaults)
     try:
@@ -97,22 +143,24 @@ def home(request):
     users_qs = (
         User.objects
         .select_related("profile")
-        .order_by("-date_joined")
+        .order_by("-id")  # same order as -date_joined, served by the primary key
     )
-    users_page = _paginate(request, users_qs, per_page=u_size, page_param="u")
+    total = rollups.totals("registrations", "posts")
+    users_page = _paginate(request, users_qs, per_page=u_size, page_param="u",
+                           total=total["registrations"])
 
     # Posts queryset (with author, comment count, likes count)
     posts_qs = (
-        _post_likes_count_queryset()
+        _posts_with_counters()
         .select_related("author", "author__profile")
-        .annotate(num_comments=Count("comments"))
         .order_by("-created_at")
     )
-    posts_page = _paginate(request, posts_qs, per_page=p_size, page_param="p")
+    posts_page = _paginate(request, posts_qs, per_page=p_size, page_param="p",
+                           total=total["posts"])
 
     context = {
-        "total_users": User.objects.count(),
-        "total_posts": Post.objects.count(),
+        "total_users": total["registrations"],
+        "total_posts": total["posts"],
         "users_page": users_page,
         "posts_page": posts_page,
         "u_size": u_size,
@@ -127,60 +175,33 @@ def home(request):
 @login_required
 @user_passes_test(_staff_required)
 def users_summary(request):
-    latest_user = (
-        User.objects
-        .order_by("-date_joined")
-        .values("id", "email", "date_joined")
-        .first()
-    )
-    latest_post = (
-        Post.objects
-        .order_by("-created_at")
-        .values("id", "text", "created_at", "author_id")
-        .first()
-    )
+    total = rollups.totals("registrations", "posts")
     data = {
-        "total_users": User.objects.count(),
-        "total_posts": Post.objects.count(),
-        "latest_user": (
-            {**latest_user, "date_joined": _dt_to_str(latest_user["date_joined"])}
-            if latest_user else None
-        ),
-        "latest_post": (
-            {**latest_post, "created_at": _dt_to_str(latest_post["created_at"])}
-            if latest_post else None
-        ),
+        "total_users": total["registrations"],
+        "total_posts": total["posts"],
+        "latest_user": _latest_user(),
+        "latest_post": _latest_post(),
     }
     return JsonResponse(data)
 
 @login_required
 @user_passes_test(_staff_required)
 def posts_summary(request):
-    top_author_row = (
-        Post.objects.values("author_id", "author__email")
-        .annotate(num_posts=Count("id"))
-        .order_by("-num_posts")
+    top_row = (
+        Profile.objects.order_by("-posts_count", "user_id")
+        .values("user_id", "user__email", "posts_count")
         .first()
     )
     top_author = (
         {
-            "id": top_author_row["author_id"],
-            "email": top_author_row["author__email"],
-            "num_posts": top_author_row["num_posts"],
-        } if top_author_row else None
-    )
-    latest_post = (
-        Post.objects
-        .order_by("-created_at")
-        .values("id", "text", "created_at", "author_id")
-        .first()
+            "id": top_row["user_id"],
+            "email": top_row["user__email"],
+            "num_posts": top_row["posts_count"],
+        } if top_row and top_row["posts_count"] else None
     )
     data = {
-        "total_posts": Post.objects.count(),
-        "latest_post": (
-            {**latest_post, "created_at": _dt_to_str(latest_post["created_at"])}
-            if latest_post else None
-        ),
+        "total_posts": rollups.totals("posts")["posts"],
+        "latest_post": _latest_post(),
         "top_author": top_author,
     }
     return JsonResponse(data)
@@ -188,49 +209,18 @@ def posts_summary(request):
 @login_required
 @user_passes_test(_staff_required)
 def likes_summary(request):
-    qs = _post_likes_count_queryset()
-    agg = qs.aggregate(total_likes=Coalesce(Sum("likes_count_eff"), Value(0)))
-    top_row = (
-        qs.order_by(F("likes_count_eff").desc(nulls_last=True))
-          .values("id", "text", "created_at", "author_id", "likes_count_eff")
-          .first()
-    )
-    top_post = (
-        {
-            "id": top_row["id"],
-            "text": top_row["text"],
-            "created_at": _dt_to_str(top_row["created_at"]),
-            "author_id": top_row["author_id"],
-            "likes": top_row["likes_count_eff"] or 0,
-        } if top_row else None
-    )
-    return JsonResponse({"total_likes": agg["total_likes"] or 0, "top_post": top_post})
+    return JsonResponse({
+        "total_likes": rollups.totals("likes")["likes"],
+        "top_post": _top_post("likes_count", "likes"),
+    })
 
 @login_required
 @user_passes_test(_staff_required)
 def comments_summary(request):
-    if HAS_COMMENT_MODEL and Comment is not None:
-        total_comments = Comment.objects.count()
-        qs = Post.objects.annotate(num_comments=Count("comments"))
-    else:
-        qs = Post.objects.annotate(num_comments=Count("comments"))
-        total_comments = qs.aggregate(c=Coalesce(Sum("num_comments"), Value(0)))["c"] or 0
-
-    top_row = (
-        qs.order_by(F("num_comments").desc(nulls_last=True))
-          .values("id", "text", "created_at", "author_id", "num_comments")
-          .first()
-    )
-    top_post = (
-        {
-            "id": top_row["id"],
-            "text": top_row["text"],
-            "created_at": _dt_to_str(top_row["created_at"]),
-            "author_id": top_row["author_id"],
-            "comments": top_row["num_comments"] or 0,
-        } if top_row else None
-    )
-    return JsonResponse({"total_comments": total_comments, "top_post": top_post})
+    return JsonResponse({
+        "total_comments": rollups.totals("comments")["comments"],
+        "top_post": _top_post("comments_count", "comments"),
+    })
 
 
 # ----------------------------
@@ -248,8 +238,8 @@ def users_list_api(request):
     except Exception:
         page_size = 10
 
-    qs = User.objects.select_related("profile").order_by("-date_joined")
-    paginator = Paginator(qs, page_size)
+    qs = User.objects.select_related("profile").order_by("-id")
+    paginator = RollupPaginator(qs, page_size, rollups.built_total("registrations"))
     page_obj = paginator.get_page(page)
 
     items = []
@@ -289,12 +279,11 @@ def posts_list_api(request):
         page_size = 10
 
     qs = (
-        _post_likes_count_queryset()
+        _posts_with_counters()
         .select_related("author", "author__profile")
-        .annotate(num_comments=Count("comments"))
         .order_by("-created_at")
     )
-    paginator = Paginator(qs, page_size)
+    paginator = RollupPaginator(qs, page_size, rollups.built_total("posts"))
     page_obj = paginator.get_page(page)
 
     items = []
@@ -325,3 +314,85 @@ def posts_list_api(request):
         "total_items": paginator.count,
         "items": items,
     })
+
+
+# ----------------------------
+# Streaming exports
+# ----------------------------
+def _parse_bound(raw, end=False):
+    """YYYY-MM-DD (local day; an `until` day is inclusive) or an ISO datetime."""
+    if not raw:
+        return None
+    dt = parse_datetime(raw)
+    if dt is None:
+        d = parse_date(raw)
+        if d is None:
+            raise exports.ExportError(f"bad date '{raw}'")
+        dt = datetime.combine(d + timedelta(days=1) if end else d, datetime.min.time())
+    return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+@login_required
+@user_passes_test(_staff_required)
+def export_view(request, dataset):
+    """
+    GET /admin-dash/api/export/<users|posts|session_logs|registration_logs>/
+        ?format=csv|ndjson|parquet&columns=id,email&since=2025-01-01&until=2025-06-30
+    Streams the whole result in id order with constant memory.
+    """
+    fmt = request.GET.get("format", "csv")
+    columns = [c.strip() for c in request.GET.get("columns", "").split(",") if c.strip()]
+    try:
+        since = _parse_bound(request.GET.get("since"))
+        until = _parse_bound(request.GET.get("until"), end=True)
+        stream, content_type = exports.export(dataset, fmt, columns or None, since, until)
+    except (exports.ExportError, ValueError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M")
+    response["Content-Disposition"] = f'attachment; filename="{dataset}-{stamp}.{fmt}"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+# ----------------------------
+# Request profiles (myproject/profiling.py)
+# ----------------------------
+PROFILE_COLUMNS = ("id", "created_at", "method", "path", "view_name", "status", "duration_ms", "mode", "trigger", "samples")
+
+@login_required
+@user_passes_test(_staff_required)
+def profiles(request):
+    """Captured request profiles, newest first; ?view=<url name> filters."""
+    qs = RequestProfile.objects.only(*PROFILE_COLUMNS)
+    view = request.GET.get("view")
+    if view:
+        qs = qs.filter(view_name=view)
+    context = {"profiles_page": _paginate(request, qs, per_page=50), "view": view or ""}
+    return render(request, "admindashboard/profiles.html", context)
+
+@login_required
+@user_passes_test(_staff_required)
+def profile_collapsed(request, pk):
+    """One profile as collapsed stacks (flamegraph.pl / speedscope / inferno input)."""
+    profile = get_object_or_404(RequestProfile, pk=pk)
+    response = HttpResponse(profile.stacks, content_type="text/plain; charset=utf-8")
+    if request.GET.get("download") == "1":
+        response["Content-Disposition"] = f'attachment; filename="profile-{profile.pk}.collapsed.txt"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+# ----------------------------
+# Slow queries (myproject/slowqueries.py)
+# ----------------------------
+@login_required
+@user_passes_test(_staff_required)
+def slow_queries(request):
+    """This worker's slow-query fingerprints ranked by total time, plus the latest statements."""
+    context = {
+        "top": slowqueries.log.top(),
+        "latest": slowqueries.log.latest(50),
+        "threshold_ms": slowqueries._config()["threshold_ms"],
+    }
+    return render(request, "admindashboard/slow_queries.html", context)
@@ -0,0 +1,307 @@
+# api/fastserializers.py
+"""
+Read-only fast path for list endpoints.
+
+PostSerializer nests UserPublicSerializer -> ProfileSerializer, so DRF runs
+its field machinery for ~25 attributes per post. For lists we instead fetch
+exactly the needed columns with .values() and build the same JSON shape with
+accessors compiled once per request.
+
+The output is byte-for-byte compatible with PostSerializer /
+SavedPostSerializer / UserPublicSerializer (same keys, order, datetime and
+URL formatting) unless the client asks for a sparse payload:
+
+    ?fields=id,text,author          only these keys (dotted: author.email)
+    ?expand=author.profile          nested objects to render in full
+
+With either parameter present, nested objects that were not expanded are
+rendered as their id, and their columns/joins are left out of the query.
+"""
+from operator import itemgetter
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from myapp.models import Post, Profile, Like, SavedPost, Comment
+
+
+# ------------------------
+# Shapes (mirror api/serializers.py)
+# ------------------------
+# A spec is a list of (output_key, source). `source` is either a values()
+# column name or a (null_column, nested_spec) tuple for nested objects; the
+# nested object renders as None when `null_column` is NULL (missing profile).
+def user_mini_spec(prefix):
+    return [
+        ("id", f"{prefix}id"),
+        ("email", f"{prefix}email"),
+    ]
+
+
+def profile_spec(prefix):
+    user_prefix = prefix[: -len("profile__")]  # "author__profile__" -> "author__"
+    return [
+        ("user", (f"{user_prefix}id", user_mini_spec(user_prefix))),
+        ("full_name", f"{prefix}full_name"),
+        ("bio", f"{prefix}bio"),
+        ("major", f"{prefix}major"),
+        ("year", f"{prefix}year"),
+        ("roll_no", f"{prefix}roll_no"),
+        ("photo", f"{prefix}photo"),
+        ("phone_no", f"{prefix}phone_no"),
+        ("posts_count", f"{prefix}posts_count"),
+        ("followers_count", f"{prefix}followers_count"),
+        ("following_count", f"{prefix}following_count"),
+    ]
+
+
+def user_public_spec(prefix):
+    return [
+        ("id", f"{prefix}id"),
+        ("email", f"{prefix}email"),
+        ("date_joined", f"{prefix}date_joined"),
+        ("profile", (f"{prefix}profile__id", profile_spec(f"{prefix}profile__"))),
+    ]
+
+
+def post_spec(prefix=""):
+    return [
+        ("id", f"{prefix}id"),
+        ("author", (f"{prefix}author__id", user_public_spec(f"{prefix}author__"))),
+        ("text", f"{prefix}text"),
+        ("photo", f"{prefix}photo"),
+        ("is_edited", f"{prefix}is_edited"),
+        ("created_at", f"{prefix}created_at"),
+        ("updated_at", f"{prefix}updated_at"),
+        ("comments_count", f"{prefix}comments_count"),
+        ("likes_count", f"{prefix}likes_count"),
+        ("saves_count", f"{prefix}saves_count"),
+        ("is_liked", "is_liked"),
+        ("is_saved", "is_saved"),
+        ("is_commented", "is_commented"),
+    ]
+
+
+def saved_post_spec():
+    return [
+        ("id", "id"),
+        ("post", ("post__id", post_spec("post__"))),
+        ("created_at", "created_at"),
+    ]
+
+
+FLAG_COLUMNS = ("is_liked", "is_saved", "is_commented")
+IMAGE_SUFFIXES = ("photo",)
+DATETIME_SUFFIXES = ("created_at", "updated_at", "date_joined")
+
+
+def spec_columns(spec):
+    """Flatten a spec into the values() columns it needs (annotations excluded)."""
+    cols = []
+    for _key, src in spec:
+        if isinstance(src, tuple):
+            null_col, sub = src
+            cols.append(null_col)
+            cols.extend(spec_columns(sub))
+        elif src not in FLAG_COLUMNS:
+            cols.append(src)
+    return list(dict.fromkeys(cols))
+
+
+# ------------------------
+# Sparse fieldsets (?fields= / ?expand=)
+# ------------------------
+def _split(raw):
+    return [p.strip() for p in (raw or "").split(",") if p.strip()]
+
+
+def parse_sparse_params(request):
+    """
+    Returns (field_tree, expand). field_tree is None when ?fields= is absent,
+    else a nested dict ({"author": {"email": {}}}); expand is None when
+    ?expand= is absent, else the set of expanded dotted paths (parents included).
+    """
+    params = getattr(request, "query_params", None) or getattr(request, "GET", {})
+    fields_raw, expand_raw = params.get("fields"), params.get("expand")
+
+    field_tree = None
+    if fields_raw is not None:
+        field_tree = {}
+        for dotted in _split(fields_raw):
+            node = field_tree
+            for part in dotted.split("."):
+                node = node.setdefault(part, {})
+
+    expand = None
+    if expand_raw is not None:
+        expand = set()
+        for dotted in _split(expand_raw):
+            parts = dotted.split(".")
+            for i in range(1, len(parts) + 1):
+                expand.add(".".join(parts[:i]))
+    return field_tree, expand
+
+
+def shape_spec(spec, field_tree=None, expand=None, _path=""):
+    """
+    Restrict a spec to the requested fields. Without ?fields=/?expand= the
+    spec is returned unchanged (full, backwards-compatible payload).
+    """
+    if field_tree is None and expand is None:
+        return spec
+    expand = expand or set()
+    shaped = []
+    for key, src in spec:
+        if field_tree and key not in field_tree:
+            continue
+        sub_fields = (field_tree or {}).get(key) or None
+        if isinstance(src, tuple):
+            null_col, sub = src
+            path = _path + key
+            if path in expand or sub_fields:
+                shaped.append((key, (null_col, shape_spec(sub, sub_fields, expand, path + "."))))
+            else:
+                shaped.append((key, null_col))  # collapsed to the related id
+        else:
+            shaped.append((key, src))
+    return shaped
+
+
+# ------------------------
+# Converters (same output as the DRF fields)
+# ------------------------
+def _datetime_converter():
+    # DateTimeField.to_representation: current timezone, ISO 8601, +00:00 -> Z
+    tz = timezone.get_current_timezone()
+
+    def conv(value):
+        if value is None:
+            return None
+        s = value.astimezone(tz).isoformat()
+        return s[:-6] + "Z" if s.endswith("+00:00") else s
+    return conv
+
+
+def _image_converter(storage, request):
+    # ImageField.to_representation: storage URL, made absolute with the request
+    origin = request.build_absolute_uri("/")[:-1] if request is not None else ""
+
+    def conv(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return origin + url if origin and url.startswith("/") else url
+    return conv
+
+
+def compile_spec(spec, request, flags=True):
+    """
+    Turn a spec into a row -> dict builder. `flags` is False for anonymous
+    users, where PostSerializer reports is_liked/is_saved/is_commented as False.
+    """
+    dt_conv = _datetime_converter()
+    img_conv = _image_converter(Post._meta.get_field("photo").storage, request)
+    profile_img_conv = _image_converter(Profile._meta.get_field("photo").storage, request)
+
+    getters = []
+    for key, src in spec:
+        if isinstance(src, tuple):
+            null_col, sub = src
+            sub_build = compile_spec(sub, request, flags)
+
+            def getter(row, _null=null_col, _build=sub_build):
+                return None if row[_null] is None else _build(row)
+        elif src in FLAG_COLUMNS:
+            if flags:
+                def getter(row, _col=src):
+                    return bool(row[_col])
+            else:
+                def getter(row):
+                    return False
+        elif src.endswith(IMAGE_SUFFIXES):
+            conv = profile_img_conv if "profile__" in src else img_conv
+
+            def getter(row, _col=src, _conv=conv):
+                return _conv(row[_col])
+        elif src.endswith(DATETIME_SUFFIXES):
+            def getter(row, _col=src, _conv=dt_conv):
+                return _conv(row[_col])
+        else:
+            getter = itemgetter(src)
+        getters.append((key, getter))
+
+    def build(row):
+        return {key: get(row) for key, get in getters}
+    return build
+
+
+# ------------------------
+# Entry points used by the viewsets
+# ------------------------
+def _is_authenticated(request):
+    u = getattr(request, "user", None)
+    return bool(u and u.is_authenticated)
+
+
+def annotate_flags(qs, request, post_ref="pk"):
+    if not _is_authenticated(request):
+        return qs
+    u = request.user
+    return qs.annotate(
+        is_liked=Exists(Like.objects.filter(post=OuterRef(post_ref), user=u)),
+        is_saved=Exists(SavedPost.objects.filter(post=OuterRef(post_ref), user=u)),
+        is_commented=Exists(Comment.objects.filter(post=OuterRef(post_ref), author=u)),
+    )
+
+
+class FastListSerializer:
+    """
+    Minimal serializer-like wrapper: `values_queryset(qs)` shapes the query,
+    `serialize(rows)` builds the payload list.
+    """
+    spec = None
+    post_ref = "pk"
+
+    def __init__(self, request, spec=None, sparse=True):
+        self.request = request
+        if spec is not None:
+            self.spec = spec
+        if sparse:
+            self.spec = shape_spec(self.spec, *parse_sparse_params(request))
+        self.flags = _is_authenticated(request)
+
+    def values_queryset(self, qs):
+        cols = spec_columns(self.spec)
+        if self.flags:
+            qs = annotate_flags(qs, self.request, self.post_ref)
+            cols += [c for c in FLAG_COLUMNS if c in self._flag_sources()]
+        return qs.values(*cols)
+
+    def serialize(self, rows):
+        build = compile_spec(self.spec, self.request, flags=self.flags)
+        return [build(row) for row in rows]
+
+    def _flag_sources(self):
+        found = set()
+
+        def walk(spec):
+            for _k, src in spec:
+                if isinstance(src, tuple):
+                    walk(src[1])
+                elif src in FLAG_COLUMNS:
+                    found.add(src)
+        walk(self.spec)
+        return found
+
+
+class FastPostListSerializer(FastListSerializer):
+    spec = post_spec()
+
+
+class FastSavedPostListSerializer(FastListSerializer):
+    spec = saved_post_spec()
+    post_ref = "post_id"
+
+
+class FastUserListSerializer(FastListSerializer):
+    spec = user_public_spec("")
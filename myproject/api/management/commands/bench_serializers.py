@@ -0,0 +1,109 @@
+# api/management/commands/bench_serializers.py
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.fastserializers import FastPostListSerializer
+from api.renderers import ORJSONRenderer, MessagePackRenderer, HAS_ORJSON, HAS_MSGPACK
+from api.serializers import PostSerializer
+from myapp.models import User, Profile, Post, Like, SavedPost, Comment
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark PostSerializer against the values()-based fast path for one "
+        "/api/posts/ page, and check both produce the same payload. "
+        "Missing rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100, help="page size to serialize")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **opts):
+        n, repeat = opts["posts"], opts["repeat"]
+        with transaction.atomic():
+            viewer = self._ensure_data(n)
+            request = RequestFactory().get("/api/posts/", {"page_size": n})
+            request.user = viewer
+            self._run(request, n, repeat)
+            transaction.set_rollback(True)
+
+    # ---- data ----
+    def _ensure_data(self, n):
+        missing = n - Post.objects.count()
+        if missing > 0:
+            authors = User.objects.bulk_create(
+                [User(email=f"bench{i}@bench.local") for i in range(20)]
+            )
+            Profile.objects.bulk_create(
+                [Profile(user=u, full_name=f"Bench User {i}", bio="x" * 80, major="CS",
+                         year="SECOND_YEAR", roll_no=f"R{i}") for i, u in enumerate(authors)]
+            )
+            Post.objects.bulk_create(
+                [Post(author=authors[i % len(authors)], text="lorem ipsum " * 20,
+                      photo="post/bench.png" if i % 3 == 0 else "") for i in range(missing)]
+            )
+        return User.objects.order_by("id").first()
+
+    # ---- paths ----
+    def _drf_rows(self, request, n):
+        u = request.user
+        qs = (
+            Post.objects.select_related("author", "author__profile")
+            .annotate(
+                is_liked=Exists(Like.objects.filter(post=OuterRef("pk"), user=u)),
+                is_saved=Exists(SavedPost.objects.filter(post=OuterRef("pk"), user=u)),
+                is_commented=Exists(Comment.objects.filter(post=OuterRef("pk"), author=u)),
+            )
+            .order_by("-created_at")[:n]
+        )
+        return list(qs)
+
+    def _fast_rows(self, request, n):
+        fast = FastPostListSerializer(request)
+        return fast, list(fast.values_queryset(Post.objects.order_by("-created_at"))[:n])
+
+    def _timeit(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(samples), min(samples)
+
+    def _run(self, request, n, repeat):
+        drf_objs = self._drf_rows(request, n)
+        fast, fast_rows = self._fast_rows(request, n)
+
+        drf_data = PostSerializer(drf_objs, many=True, context={"request": request}).data
+        fast_data = fast.serialize(fast_rows)
+        drf_json = JSONRenderer().render(drf_data)
+        same = drf_json == JSONRenderer().render(fast_data)
+        if not same and json.loads(drf_json) != json.loads(JSONRenderer().render(fast_data)):
+            self.stderr.write(self.style.ERROR("Fast path output differs from PostSerializer!"))
+
+        results = [
+            ("query: select_related objects", lambda: self._drf_rows(request, n)),
+            ("query: values() rows", lambda: self._fast_rows(request, n)),
+            ("serialize: PostSerializer", lambda: PostSerializer(drf_objs, many=True, context={"request": request}).data),
+            ("serialize: fast path", lambda: fast.serialize(fast_rows)),
+            ("render: JSONRenderer", lambda: JSONRenderer().render(drf_data)),
+        ]
+        if HAS_ORJSON:
+            results.append(("render: ORJSONRenderer", lambda: ORJSONRenderer().render(fast_data)))
+        if HAS_MSGPACK:
+            results.append(("render: MessagePackRenderer", lambda: MessagePackRenderer().render(fast_data)))
+
+        self.stdout.write(f"{len(drf_objs)} posts, {repeat} runs each, output identical: {same}")
+        for label, fn in results:
+            med, best = self._timeit(fn, repeat)
+            self.stdout.write(f"  {label:<34} median {med:8.2f} ms   min {best:8.2f} ms")
+        if HAS_MSGPACK:
+            self.stdout.write(f"  payload: json {len(drf_json)} B, msgpack {len(MessagePackRenderer().render(fast_data))} B")
@@ -0,0 +1,56 @@
+# api/renderers.py
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson  # optional: much faster than the stdlib json module
+    HAS_ORJSON = True
+except Exception:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    import msgpack  # optional: enables `Accept: application/msgpack`
+    HAS_MSGPACK = True
+except Exception:
+    msgpack = None
+    HAS_MSGPACK = False
+
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Anything orjson/msgpack cannot encode natively (lazy strings, Decimal,
+    # querysets, ...) goes through DRF's encoder, like JSONRenderer does.
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in JSONRenderer that serializes with orjson. Falls back to the
+    stdlib path when orjson is missing or indentation was requested.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not HAS_ORJSON or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not HAS_MSGPACK:
+            raise ImproperlyConfigured("MessagePackRenderer requires the msgpack package.")
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
@@ -4,8 +4,10 @@ from django.urls import reverse
 from django.contrib.humanize.templatetags.humanize import naturaltime
 from rest_framework import serializers
 
+from myapp import entitycache
 from myapp.models import (
-    User, Profile, Post, Comment, Like, Follow, SavedPost, Notification
+    User, Profile, Post, Comment, Like, Follow, SavedPost, Notification,
+    FollowSuggestion,
 )
 
 # ------------------------
@@ -191,10 +193,28 @@ class SavedPostSerializer(serializers.ModelSerializer):
         fields = ["id", "post", "created_at"]
 
 
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    suggested = UserPublicSerializer(read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ["id", "suggested", "score", "mutual_count", "created_at"]
+
+
 # ------------------------
 # Notifications
 # ------------------------
 
+class NotificationListSerializer(serializers.ListSerializer):
+    """Loads the target posts of a whole page at once, through the entity cache (see get_target_post)."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        post_ids = {(n.extra or {}).get("post_id") for n in items} - {None}
+        self.context["target_posts"] = entitycache.get_posts(post_ids)
+        return super().to_representation(items)
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     actor_name = serializers.SerializerMethodField()
     actor_profile_url = serializers.SerializerMethodField()
@@ -205,6 +225,7 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
+        list_serializer_class = NotificationListSerializer
         fields = [
             "id", "verb", "is_read", "created_at",
             "actor",             # pk of actor (FK)
@@ -267,11 +288,17 @@ class NotificationSerializer(serializers.ModelSerializer):
         if not post_id:
             return None
 
-        try:
-            # IMPORTANT: don't .only() unknown fields like author__first_name/last_name
-            p = Post.objects.select_related("author", "author__profile").get(id=post_id)
-        except Post.DoesNotExist:
-            return None
+        posts = self.context.get("target_posts")
+        if posts is not None:  # many=True: prefetched by NotificationListSerializer
+            p = posts.get(post_id)
+            if p is None:
+                return None
+        else:
+            try:
+                # IMPORTANT: don't .only() unknown fields like author__first_name/last_name
+                p = Post.objects.select_related("author", "author__profile").get(id=post_id)
+            except Post.DoesNotExist:
+                return None
 
         return {
             "id": p.id,
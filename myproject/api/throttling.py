@@ -0,0 +1,29 @@
+# api/throttling.py
+from rest_framework.throttling import BaseThrottle
+
+from myproject import ratelimit
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF adapter for myproject.ratelimit: per-IP and per-user token buckets
+    for one endpoint class (`scope`, a key of settings.RATE_LIMITS).
+    """
+    scope = None
+
+    def allow_request(self, request, view):
+        allowed, self._wait = ratelimit.check_ip(request, self.scope)
+        if allowed:
+            allowed, self._wait = ratelimit.check_user(request.user, self.scope)
+        return allowed
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+
+class UsersListThrottle(TokenBucketThrottle):
+    scope = "users_list"
+
+
+class LikeThrottle(TokenBucketThrottle):
+    scope = "like"
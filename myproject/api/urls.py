@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 from api.views_unread import unread_count
 from .views import (
     UserViewSet, ProfileViewSet, PostViewSet, CommentViewSet,
-    SavedPostViewSet, NotificationViewSet, FollowToggleAPIView
+    SavedPostViewSet, NotificationViewSet, FollowToggleAPIView,
+    SuggestionViewSet,
 )
 
 router = DefaultRouter()
@@ -13,6 +14,7 @@ router.register(r'profiles', ProfileViewSet, basename='profile')
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'saved', SavedPostViewSet, basename='saved')
+router.register(r'suggestions', SuggestionViewSet, basename='suggestion')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
@@ -7,15 +7,22 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
+from myapp.graph import follow_graph
 from myapp.models import (
-    User, Profile, Post, Comment, Like, Follow, SavedPost, Notification
+    User, Profile, Post, Comment, Like, Follow, SavedPost, Notification,
+    FollowSuggestion,
 )
 from .serializers import (
     UserPublicSerializer, ProfileSerializer, PostSerializer, CommentSerializer,
-    FollowSerializer, SavedPostSerializer, NotificationSerializer
+    FollowSerializer, SavedPostSerializer, NotificationSerializer,
+    FollowSuggestionSerializer,
 )
 from .permissions import IsOwnerOrReadOnly, IsSelfOrReadOnly
 from .pagination import DefaultPagination
+from .throttling import UsersListThrottle, LikeThrottle
+from .fastserializers import (
+    FastPostListSerializer, FastSavedPostListSerializer, FastUserListSerializer
+)
 
 
 # ---- Users & Profiles ----
@@ -27,6 +34,16 @@ class UserViewSet(mixins.RetrieveModelMixin,
     serializer_class = UserPublicSerializer
     permission_classes = [AllowAny]
     pagination_class = DefaultPagination
+    throttle_classes = [UsersListThrottle]
+
+    def list(self, request, *args, **kwargs):
+        # values() fast path; honours ?fields= / ?expand= (see api/fastserializers.py)
+        fast = FastUserListSerializer(request)
+        qs = fast.values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(qs))
 
     @action(methods=["post"], detail=True, permission_classes=[IsAuthenticated])
     def follow(self, request, pk=None):
@@ -39,7 +56,7 @@ class UserViewSet(mixins.RetrieveModelMixin,
             following = False
         else:
             following = True
-        followers_count = Follow.objects.filter(following=target).count()
+        followers_count = Follow.objects.filter(following=target).count()  # exact, see myapp/graph.py
         return Response({"following": following, "followers_count": followers_count})
 
 
@@ -61,6 +78,7 @@ class PostViewSet(viewsets.ModelViewSet):
     permission_classes = [IsOwnerOrReadOnly]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     pagination_class = DefaultPagination
+    query_budget = {"list": 5}  # myproject/querybudget.py
 
     def get_queryset(self):
         u = self.request.user if self.request else None
@@ -74,10 +92,21 @@ class PostViewSet(viewsets.ModelViewSet):
             )
         return qs.order_by("-created_at")
 
+    def list(self, request, *args, **kwargs):
+        # Fast path: values() + precompiled accessors, same payload as PostSerializer.
+        # ?fields= / ?expand= trim the payload and the query (see api/fastserializers.py).
+        fast = FastPostListSerializer(request)
+        qs = fast.values_queryset(Post.objects.order_by("-created_at"))
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(qs))
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @action(methods=["post"], detail=True, permission_classes=[IsAuthenticated])
+    @action(methods=["post"], detail=True, permission_classes=[IsAuthenticated],
+            throttle_classes=[LikeThrottle])
     def like(self, request, pk=None):
         post = self.get_object()
         obj, created = Like.objects.get_or_create(post=post, user=request.user)
@@ -149,6 +178,43 @@ class SavedPostViewSet(mixins.ListModelMixin,
             "post", "post__author", "post__author__profile"
         ).order_by("-created_at")
 
+    def list(self, request, *args, **kwargs):
+        fast = FastSavedPostListSerializer(request)
+        qs = fast.values_queryset(
+            SavedPost.objects.filter(user=request.user).order_by("-created_at")
+        )
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(qs))
+
+
+# ---- People you may know (current user) ----
+
+class SuggestionViewSet(mixins.ListModelMixin,
+                        viewsets.GenericViewSet):
+    """
+    Precomputed by `manage.py build_suggestions`; accounts followed since the
+    last run are filtered out here against the in-memory follow graph.
+    """
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = DefaultPagination
+
+    def get_queryset(self):
+        return FollowSuggestion.objects.filter(user=self.request.user).select_related(
+            "suggested", "suggested__profile"
+        ).order_by("-score", "-suggested__profile__rank_score", "id")
+
+    def list(self, request, *args, **kwargs):
+        suggestions = list(self.get_queryset())
+        followed = follow_graph.following_flags(request.user.id, [s.suggested_id for s in suggestions])
+        suggestions = [s for s in suggestions if not followed[s.suggested_id]]
+        page = self.paginate_queryset(suggestions)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(suggestions, many=True).data)
+
 
 # ---- Notifications ----
 
@@ -292,10 +358,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated, IsRecipient]
+    query_budget = {"list": 6}
 
     def get_queryset(self):
         user = self.request.user
-        return Notification.objects.filter(recipient=user)
+        # actor name/profile URL are rendered per row
+        return Notification.objects.filter(recipient=user).select_related("actor", "actor__profile")
 
     def perform_update(self, serializer):
         # Harden updates to only allow toggling is_read if you want:
@@ -6,4 +6,5 @@ class MyappConfig(AppConfig):
     name = 'myapp'
 
     def ready(self):
-        import myapp.signals
\ No newline at end of file
+        import myapp.signals
+        import myproject.checks  # noqa: F401  (register system checks)
\ No newline at end of file
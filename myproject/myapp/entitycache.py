@@ -0,0 +1,257 @@
+# myapp/entitycache.py
+"""
+Read-through cache for Post and Profile rows.
+
+List views select only the ordered ids of a page (a covering index scan),
+then hydrate the objects here instead of joining Post + User + Profile again
+on every request:
+
+    entity:ver:<kind>:<id>          version token, shared cache only
+    entity:<kind>:<id>:<ver>        pickled row, shared cache (get_many)
+    entity:<kind>:<id>              (version, row) in the in-process LRU
+    entity:ctr:<kind>:<id>          the row's counters, shared cache only
+
+with <kind> "post" (by post id) or "profile" (by user id; the Profile comes
+with its User). Misses of a whole batch are loaded with one in_bulk().
+
+The version tokens and counters of a batch are read from the shared cache
+in one get_many on every call, so a bump is seen by every worker at once
+and the local tier never serves a stale row. That needs a cache all
+workers share: on a per-process backend (LocMemCache) an edit would be
+served stale by the other workers for up to `ttl`, so ENTITY_CACHE["alias"]
+must be shared or rows are loaded from the database (`manage.py check`
+warns, myproject.W003). myapp/signals.py bumps the
+version when a Post, Profile or User is saved or deleted, and only drops
+the counter key when a like, comment, save or follow moves a counter, so
+counter churn never evicts the cached bodies. Other columns changed with
+queryset.update() (rank_score, suggestions_dirty) are not seen here until
+the row is saved again or its snapshot expires. The new version also goes
+out on the invalidation bus (myproject/invalidation.py), so the other
+workers drop their local copy instead of keeping it until it ages out.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from myproject import invalidation, metrics
+from myproject.tieredcache import LocalLRU, is_shared
+
+from .models import Post, Profile, User
+
+logger = logging.getLogger(__name__)
+
+POST_COUNTERS = ("likes_count", "comments_count", "saves_count")
+PROFILE_COUNTERS = ("posts_count", "followers_count", "following_count")
+
+
+def _config():
+    cfg = {
+        "enabled": False,  # needs a shared cache alias
+        "alias": "default",
+        "ttl": 3600,          # snapshots in the shared cache
+        "counter_ttl": 300,   # bounds a counter written by a read racing the signal that dropped it
+        "local_size": 20000,
+        "local_ttl": 300,     # safe to keep long: the version is checked on every read
+    }
+    cfg.update(getattr(settings, "ENTITY_CACHE", {}) or {})
+    return cfg
+
+
+def _active(cfg):
+    return cfg["enabled"] and is_shared(cfg["alias"])
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+class EntityCache:
+    """Versioned snapshots of one model plus its separately cached counters."""
+
+    def __init__(self, kind, counters, load, load_counters):
+        self.kind = kind
+        self.counters = counters
+        self._load = load                    # ids -> {id: obj}
+        self._load_counters = load_counters  # ids -> {id: (counter, ...)}
+        self._local = None
+
+    def _local_tier(self, cfg):
+        if self._local is None:
+            self._local = LocalLRU(cfg["local_size"], cfg["local_ttl"], name=f"entity-{self.kind}-local")
+        return self._local
+
+    def _version_key(self, pk):
+        return f"entity:ver:{self.kind}:{pk}"
+
+    def _counter_key(self, pk):
+        return f"entity:ctr:{self.kind}:{pk}"
+
+    def _body_key(self, pk, version):
+        return f"entity:{self.kind}:{pk}:{version}"
+
+    def _local_key(self, pk):
+        return f"entity:{self.kind}:{pk}"
+
+    # ---- reads ----
+    def get_many(self, ids):
+        """{id: obj} for the ids that exist, counters overlaid."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        cfg = _config()
+        if not _active(cfg):
+            return self._load(ids)
+        try:
+            return self._get_many(ids, cfg)
+        except Exception:
+            logger.exception("entity cache unavailable (%s)", self.kind)
+            return self._load(ids)
+
+    def _get_many(self, ids, cfg):
+        shared = caches[cfg["alias"]]
+        version_keys = {pk: self._version_key(pk) for pk in ids}
+        counter_keys = {pk: self._counter_key(pk) for pk in ids}
+        found = shared.get_many([*version_keys.values(), *counter_keys.values()])
+
+        versions = {pk: found.get(key) for pk, key in version_keys.items()}
+        unversioned = [pk for pk, v in versions.items() if v is None]
+        if unversioned:
+            # fresh random tokens: an evicted version can never come back and match an old snapshot
+            for pk in unversioned:
+                shared.add(version_keys[pk], _new_version(), None)
+            again = shared.get_many([version_keys[pk] for pk in unversioned])
+            versions.update({pk: again.get(version_keys[pk]) for pk in unversioned})
+
+        body_keys = {pk: self._body_key(pk, versions[pk]) for pk in ids}
+        local = self._local_tier(cfg)
+        cached = local.get_many([self._local_key(pk) for pk in ids])
+        objs = {}
+        for pk in ids:
+            version, obj = cached.get(self._local_key(pk), (None, None))
+            if version is not None and version == versions[pk]:
+                objs[pk] = obj
+        missing = [pk for pk in ids if pk not in objs]
+        if missing:
+            from_shared = shared.get_many([body_keys[pk] for pk in missing])
+            metrics.cache_lookup(f"entity-{self.kind}-shared", True, len(from_shared))
+            metrics.cache_lookup(f"entity-{self.kind}-shared", False, len(missing) - len(from_shared))
+            for pk in missing:
+                obj = from_shared.get(body_keys[pk])
+                if obj is not None:
+                    objs[pk] = obj
+                    local.set(self._local_key(pk), (versions[pk], obj))
+
+        loaded = {}
+        missing = [pk for pk in ids if pk not in objs]
+        if missing:
+            loaded = self._load(missing)  # rows that no longer exist simply stay out
+            shared.set_many({body_keys[pk]: obj for pk, obj in loaded.items()}, cfg["ttl"])
+            for pk, obj in loaded.items():
+                local.set(self._local_key(pk), (versions[pk], obj))
+            objs.update(loaded)
+
+        counters = {pk: found[key] for pk, key in counter_keys.items() if key in found and pk in objs}
+        fresh = {pk: tuple(getattr(obj, f) for f in self.counters) for pk, obj in loaded.items()}
+        stale = [pk for pk in objs if pk not in counters and pk not in fresh]
+        if stale:
+            fresh.update(self._load_counters(stale))
+        if fresh:
+            shared.set_many({counter_keys[pk]: values for pk, values in fresh.items()}, cfg["counter_ttl"])
+            counters.update(fresh)
+        for pk, obj in objs.items():
+            values = counters.get(pk)
+            if values is not None:
+                for field, value in zip(self.counters, values):
+                    setattr(obj, field, value)
+        return objs
+
+    # ---- invalidation (call after commit) ----
+    def invalidate(self, pk):
+        """Retire the cached row of `pk` on every worker, counters included."""
+        cfg = _config()
+        version = _new_version()
+        self.forget(pk)
+        try:
+            shared = caches[cfg["alias"]]
+            shared.set(self._version_key(pk), version, None)
+            shared.delete(self._counter_key(pk))
+        except Exception:
+            logger.exception("could not invalidate %s %s", self.kind, pk)
+        invalidation.publish(self.kind, pk, version)
+
+    def forget(self, pk, version=None):
+        """Drop this worker's local copy of `pk` (bus handler)."""
+        if self._local is not None:
+            self._local.delete(self._local_key(pk))
+
+    def clear_local(self):
+        if self._local is not None:
+            self._local.clear()
+
+    def invalidate_counters(self, *pks):
+        """Drop the counters of these rows; the cached bodies stay."""
+        cfg = _config()
+        try:
+            caches[cfg["alias"]].delete_many([self._counter_key(pk) for pk in pks])
+        except Exception:
+            logger.exception("could not drop the %s counters of %s", self.kind, pks)
+
+
+# ----------------------------
+# Loaders
+# ----------------------------
+def _load_posts(ids):
+    return Post.objects.in_bulk(ids)
+
+
+def _load_post_counters(ids):
+    rows = Post.objects.filter(id__in=ids).values_list("id", *POST_COUNTERS)
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def _load_profiles(user_ids):
+    return Profile.objects.select_related("user").in_bulk(user_ids, field_name="user_id")
+
+
+def _load_profile_counters(user_ids):
+    rows = Profile.objects.filter(user_id__in=user_ids).values_list("user_id", *PROFILE_COUNTERS)
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+posts = EntityCache("post", POST_COUNTERS, _load_posts, _load_post_counters)
+profiles = EntityCache("profile", PROFILE_COUNTERS, _load_profiles, _load_profile_counters)
+
+for _cache in (posts, profiles):
+    invalidation.register(_cache.kind, _cache.forget, flush=_cache.clear_local)
+
+
+# ----------------------------
+# Hydration
+# ----------------------------
+def get_posts(ids):
+    """{post id: Post} with post.author and post.author.profile attached."""
+    if not _active(_config()):
+        return Post.objects.select_related("author__profile").in_bulk(list(ids))  # one join, no cache
+    found = posts.get_many(ids)
+    author_ids = {p.author_id for p in found.values()}
+    by_user = profiles.get_many(author_ids)
+    authors = {uid: prof.user for uid, prof in by_user.items()}
+    missing = author_ids - authors.keys()
+    if missing:  # users without a Profile row
+        authors.update(User.objects.in_bulk(missing))
+    for uid, prof in by_user.items():
+        prof.user.profile = prof
+    for post in found.values():
+        author = authors.get(post.author_id)
+        if author is not None:
+            post.author = author
+    return found
+
+
+def hydrate_posts(ids):
+    """The posts of `ids` in that order (ids whose post is gone are skipped)."""
+    ids = list(ids)
+    found = get_posts(ids)
+    return [found[pk] for pk in ids if pk in found]
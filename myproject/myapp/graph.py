@@ -0,0 +1,286 @@
+# myapp/graph.py
+"""
+In-memory follow graph.
+
+The whole Follow table is held as two CSR (compressed sparse row) structures
+of sorted 64-bit ints -- "following" (out-edges) and "followers" (in-edges):
+
+    nodes   = sorted user ids that have at least one edge
+    offsets = offsets[i]..offsets[i+1] is the slice of `targets` for nodes[i]
+    targets = neighbour ids, sorted within each row
+
+Membership is a binary search inside one row, a list page is a slice, and
+counts are offset differences -- nothing scales with the viewer's follow
+count. Follow save/delete signals apply edges incrementally: a changed row is
+copied into a small per-user overlay, and the overlay is folded back into
+fresh CSR arrays once it grows past OVERLAY_COMPACT_AT users.
+
+Each worker process holds its own copy, loaded lazily on first use and
+reloaded from the database after FOLLOW_GRAPH_MAX_AGE seconds (one thread
+reloads; the others keep answering from the old copy, and edge changes
+made during the reload are replayed onto the new one). Edges made
+on other workers arrive over the invalidation bus (myproject/invalidation.py)
+as ("follow", [follower, following], 1 = added / 0 = removed); a lost
+message drops the copy, which is then reloaded on next use. With the
+"local" bus transport, edges made on other workers only show up after the
+next reload, so answers that must be exact (the viewer's own follow button,
+the count returned by the follow API) read the Follow table instead.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from myproject import invalidation
+
+OVERLAY_COMPACT_AT = 1024
+
+
+class _CSR:
+    __slots__ = ("nodes", "offsets", "targets")
+
+    def __init__(self, nodes=None, offsets=None, targets=None):
+        self.nodes = nodes if nodes is not None else array("q")
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        self.targets = targets if targets is not None else array("q")
+
+    @classmethod
+    def from_sorted_pairs(cls, pairs):
+        """`pairs` must be sorted by (src, dst)."""
+        nodes, offsets, targets = array("q"), array("q"), array("q")
+        last = None
+        for src, dst in pairs:
+            if src != last:
+                nodes.append(src)
+                offsets.append(len(targets))
+                last = src
+            targets.append(dst)
+        offsets.append(len(targets))
+        return cls(nodes, offsets, targets)
+
+    def bounds(self, uid):
+        i = bisect_left(self.nodes, uid)
+        if i < len(self.nodes) and self.nodes[i] == uid:
+            return self.offsets[i], self.offsets[i + 1]
+        return 0, 0
+
+    def row(self, uid):
+        lo, hi = self.bounds(uid)
+        return self.targets[lo:hi]
+
+    def rows(self):
+        for i, uid in enumerate(self.nodes):
+            yield uid, self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+
+class _Adjacency:
+    """One side of the graph: CSR snapshot + copy-on-write overlay rows."""
+
+    def __init__(self, csr):
+        self.csr = csr
+        self.overlay = {}  # uid -> sorted array("q")
+
+    def _lookup(self, uid):
+        """Returns (sequence, lo, hi) without copying the CSR row."""
+        row = self.overlay.get(uid)
+        if row is not None:
+            return row, 0, len(row)
+        lo, hi = self.csr.bounds(uid)
+        return self.csr.targets, lo, hi
+
+    def count(self, uid):
+        _seq, lo, hi = self._lookup(uid)
+        return hi - lo
+
+    def contains(self, uid, other):
+        seq, lo, hi = self._lookup(uid)
+        i = bisect_left(seq, other, lo, hi)
+        return i < hi and seq[i] == other
+
+    def slice(self, uid, start, stop):
+        seq, lo, hi = self._lookup(uid)
+        return list(seq[min(lo + start, hi):min(lo + stop, hi)])
+
+    def add(self, uid, other):
+        row = self.overlay.get(uid)
+        row = array("q", row if row is not None else self.csr.row(uid))
+        i = bisect_left(row, other)
+        if i < len(row) and row[i] == other:
+            return
+        insort(row, other)
+        self.overlay[uid] = row  # single assignment: readers see old or new row
+
+    def remove(self, uid, other):
+        row = self.overlay.get(uid)
+        row = array("q", row if row is not None else self.csr.row(uid))
+        i = bisect_left(row, other)
+        if i < len(row) and row[i] == other:
+            del row[i]
+            self.overlay[uid] = row
+
+    def compact(self):
+        merged = {uid: r for uid, r in self.csr.rows()}
+        merged.update(self.overlay)
+        pairs = ((uid, dst) for uid in sorted(merged) for dst in merged[uid])
+        return _Adjacency(_CSR.from_sorted_pairs(pairs))
+
+
+class AdjacencyPage:
+    """Sequence view of one adjacency row, sliceable by django's Paginator."""
+
+    def __init__(self, side, uid):
+        self.side, self.uid = side, uid
+
+    def __len__(self):
+        return self.side.count(self.uid)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.side.slice(self.uid, key.start or 0, key.stop if key.stop is not None else len(self))
+        return self.side.slice(self.uid, key, key + 1)[0]
+
+
+class FollowGraph:
+    def __init__(self):
+        self._lock = threading.Lock()         # guards the fields below
+        self._reload_lock = threading.Lock()  # one reload at a time
+        self._out = None  # user -> users they follow
+        self._in = None   # user -> their followers
+        self._loaded_at = 0.0
+        self._generation = 0    # bumped by invalidate()
+        self._during_load = None  # edge changes seen while a reload reads the table
+
+    # ---------- loading ----------
+    def _max_age(self):
+        return getattr(settings, "FOLLOW_GRAPH_MAX_AGE", 300)
+
+    def _ensure(self):
+        """(out, in) to answer one query from; another thread may swap or drop them meanwhile."""
+        with self._lock:
+            out, in_ = self._out, self._in
+            fresh = out is not None and time.monotonic() - self._loaded_at <= self._max_age()
+        if fresh:
+            return out, in_
+        if out is not None and not self._reload_lock.acquire(blocking=False):
+            return out, in_  # stale but usable; another thread is already reloading
+        if out is None:
+            self._reload_lock.acquire()
+        try:
+            with self._lock:
+                if self._out is not None and time.monotonic() - self._loaded_at <= self._max_age():
+                    return self._out, self._in  # reloaded while we waited
+            return self._reload_locked()
+        finally:
+            self._reload_lock.release()
+
+    def reload(self):
+        with self._reload_lock:
+            self._reload_locked()
+
+    def _reload_locked(self):
+        from .models import Follow
+
+        with self._lock:
+            generation = self._generation
+            self._during_load = []
+        try:
+            pairs = list(
+                Follow.objects.order_by("follower_id", "following_id")
+                .values_list("follower_id", "following_id")
+            )
+        except Exception:
+            with self._lock:
+                self._during_load = None
+            raise
+        out_csr = _CSR.from_sorted_pairs(pairs)
+        pairs.sort(key=lambda p: (p[1], p[0]))
+        in_csr = _CSR.from_sorted_pairs((dst, src) for src, dst in pairs)
+        with self._lock:
+            self._out, self._in = _Adjacency(out_csr), _Adjacency(in_csr)
+            # changes committed while the table was read may be missing from it: replay them
+            for added, follower_id, following_id in self._during_load:
+                self._apply(added, follower_id, following_id)
+            self._during_load = None
+            # invalidated mid-read (lost bus messages): use this copy once, reload on next access
+            self._loaded_at = time.monotonic() if generation == self._generation else 0.0
+            return self._out, self._in
+
+    def invalidate(self):
+        with self._lock:
+            self._out = self._in = None
+            self._generation += 1
+
+    # ---------- incremental updates (from signals) ----------
+    def add_edge(self, follower_id, following_id):
+        self._change(True, follower_id, following_id)
+
+    def remove_edge(self, follower_id, following_id):
+        self._change(False, follower_id, following_id)
+
+    def _change(self, added, follower_id, following_id):
+        with self._lock:
+            if self._during_load is not None:
+                self._during_load.append((added, follower_id, following_id))
+            if self._out is None:
+                return  # not loaded yet; the next load reads the edge from the DB
+            self._apply(added, follower_id, following_id)
+
+    def _apply(self, added, follower_id, following_id):
+        if added:
+            self._out.add(follower_id, following_id)
+            self._in.add(following_id, follower_id)
+        else:
+            self._out.remove(follower_id, following_id)
+            self._in.remove(following_id, follower_id)
+        if len(self._out.overlay) > OVERLAY_COMPACT_AT:
+            self._out = self._out.compact()
+        if len(self._in.overlay) > OVERLAY_COMPACT_AT:
+            self._in = self._in.compact()
+
+    # ---------- queries ----------
+    def is_following(self, follower_id, following_id):
+        out, _in = self._ensure()
+        return out.contains(follower_id, following_id)
+
+    def is_mutual(self, a, b):
+        out, _in = self._ensure()
+        return out.contains(a, b) and out.contains(b, a)
+
+    def following_count(self, user_id):
+        out, _in = self._ensure()
+        return out.count(user_id)
+
+    def followers_count(self, user_id):
+        _out, in_ = self._ensure()
+        return in_.count(user_id)
+
+    def following(self, user_id):
+        """Paginator-friendly sequence of the ids `user_id` follows (ascending)."""
+        out, _in = self._ensure()
+        return AdjacencyPage(out, user_id)
+
+    def followers(self, user_id):
+        """Paginator-friendly sequence of the ids following `user_id` (ascending)."""
+        _out, in_ = self._ensure()
+        return AdjacencyPage(in_, user_id)
+
+    def following_flags(self, viewer_id, user_ids):
+        """{user_id: viewer follows user_id} for one page of ids."""
+        out, _in = self._ensure()
+        return {uid: out.contains(viewer_id, uid) for uid in user_ids}
+
+
+follow_graph = FollowGraph()
+
+
+def _apply_follow(pk, added):
+    follower_id, following_id = pk
+    if added:
+        follow_graph.add_edge(follower_id, following_id)
+    else:
+        follow_graph.remove_edge(follower_id, following_id)
+
+
+invalidation.register("follow", _apply_follow, flush=follow_graph.invalidate)
@@ -0,0 +1,109 @@
+# myapp/management/commands/bench_endpoints.py
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.models import User
+from myproject import benchmark
+
+
+def _threshold(value):
+    metric, _, ratio = value.partition("=")
+    if metric not in benchmark.DEFAULT_THRESHOLDS or not ratio:
+        raise ValueError(value)
+    return metric, float(ratio)
+
+
+class Command(BaseCommand):
+    help = ("Benchmark feed, post detail, like toggle, search and the posts/notifications APIs in-process "
+            "(p50/p95/p99, queries, DB time, allocations) and compare with a stored baseline.")
+
+    def add_arguments(self, parser):
+        names = [s.name for s in benchmark.default_scenarios()]
+        parser.add_argument("--only", help=f"comma-separated scenarios ({', '.join(names)})")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--alloc-runs", type=int, default=5, help="requests traced with tracemalloc (0 = skip)")
+        parser.add_argument("--user", help="email of the viewer (default: the non-staff user with most followers)")
+        parser.add_argument("--post", type=int, help="post id for detail/like (default: the most commented post)")
+        parser.add_argument("--query", help="search term (default: the viewer's first name)")
+        parser.add_argument("--label", default="", help="free-form label stored in the report")
+        parser.add_argument("--output", help="write the JSON report here ('-' for stdout)")
+        parser.add_argument("--baseline", help="baseline report to compare with "
+                                               "(default: settings.BENCHMARK_BASELINE if it exists)")
+        parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+        parser.add_argument("--threshold", action="append", default=[], metavar="METRIC=RATIO",
+                            help="allowed ratio over the baseline, e.g. p95_ms=1.1 (repeatable)")
+
+    def handle(self, *args, **opts):
+        try:
+            limits = dict(_threshold(v) for v in opts["threshold"])
+        except ValueError as exc:
+            raise CommandError(f"bad --threshold {exc}; metrics: {', '.join(benchmark.DEFAULT_THRESHOLDS)}")
+
+        scenarios = benchmark.default_scenarios()
+        if opts["only"]:
+            wanted = {s.strip() for s in opts["only"].split(",") if s.strip()}
+            unknown = wanted - {s.name for s in scenarios}
+            if unknown:
+                raise CommandError(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [s for s in scenarios if s.name in wanted]
+
+        user = None
+        if opts["user"]:
+            user = User.objects.filter(email=opts["user"]).first()
+            if user is None:
+                raise CommandError(f"no user {opts['user']}")
+        try:
+            ctx = benchmark.default_context(user, opts["post"], opts["query"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        report = benchmark.run(
+            scenarios, opts["iterations"], opts["warmup"], opts["alloc_runs"], ctx, opts["label"],
+            log=self.stdout.write if opts["verbosity"] >= 2 else None,
+        )
+        self._print(report)
+
+        if opts["output"] == "-":
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        elif opts["output"]:
+            benchmark.save(report, Path(opts["output"]))
+
+        default_baseline = getattr(settings, "BENCHMARK_BASELINE", None)
+        baseline_path = Path(opts["baseline"] or default_baseline) if (opts["baseline"] or default_baseline) else None
+        if opts["save_baseline"]:
+            if baseline_path is None:
+                raise CommandError("no --baseline path and settings.BENCHMARK_BASELINE is unset")
+            benchmark.save(report, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f"baseline written to {baseline_path}"))
+            return
+        if baseline_path is None or not baseline_path.exists():
+            if opts["baseline"]:
+                raise CommandError(f"baseline {baseline_path} not found")
+            return
+
+        rows, warnings = benchmark.compare(report, benchmark.load(baseline_path), limits)
+        for w in warnings:
+            self.stdout.write(self.style.WARNING(w))
+        regressions = [r for r in rows if r["regressed"]]
+        for r in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"REGRESSION {r['scenario']}.{r['metric']}: {r['baseline']} -> {r['current']} "
+                f"(x{r['ratio']}, limit x{r['limit']})"
+            ))
+        if regressions:
+            raise CommandError(f"{len(regressions)} metric(s) regressed against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"no regressions against {baseline_path}"))
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{'scenario':<18} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'db ms':>8} {'alloc KB':>9}"
+        )
+        for name, r in report["scenarios"].items():
+            alloc = "-" if r["alloc_peak_kb"] is None else f"{r['alloc_peak_kb']:.0f}"
+            line = (f"{name:<18} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+                    f"{r['queries']:8.1f} {r['db_ms']:8.2f} {alloc:>9}")
+            self.stdout.write(self.style.ERROR(line + f"  ({r['errors']} errors)") if r["errors"] else line)
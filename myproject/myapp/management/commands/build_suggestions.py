@@ -0,0 +1,25 @@
+# myapp/management/commands/build_suggestions.py
+from django.core.management.base import BaseCommand
+
+from myapp.recommendations import build_suggestions
+
+
+class Command(BaseCommand):
+    help = "Recompute 'People you may know' suggestions from the Follow graph."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true",
+                            help="only users whose follow edges changed since the last run (and their followers)")
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        stats = build_suggestions(
+            top_k=opts["top_k"],
+            batch_size=opts["batch_size"],
+            incremental=opts["incremental"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "{recomputed_users}/{users} users, {edges} edges -> {suggestions_written} suggestions "
+            "in {total_seconds}s (load {load_seconds}s)".format(**stats)
+        ))
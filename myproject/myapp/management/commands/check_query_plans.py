@@ -0,0 +1,111 @@
+# myapp/management/commands/check_query_plans.py
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.models import User
+from myproject import benchmark, queryplans
+
+
+class Command(BaseCommand):
+    help = ("EXPLAIN every query the hot endpoints run, flag full scans, automatic indexes, partial index "
+            "matches and temp B-tree sorts, suggest indexes, and (--check) fail on plan regressions.")
+
+    def add_arguments(self, parser):
+        names = [s.name for s in queryplans.plan_scenarios()]
+        parser.add_argument("--only", help=f"comma-separated scenarios ({', '.join(names)})")
+        parser.add_argument("--user", help="email of the viewer (default: the non-staff user with most followers)")
+        parser.add_argument("--post", type=int, help="post id for detail/like (default: the most commented post)")
+        parser.add_argument("--query", help="search term (default: the viewer's first name)")
+        parser.add_argument("--min-rows", type=int, default=1000,
+                            help="tables smaller than this only get info-level findings")
+        parser.add_argument("--analyze", action="store_true", help="run ANALYZE first (writes planner statistics)")
+        parser.add_argument("--all", action="store_true", help="also print queries without findings")
+        parser.add_argument("--output", help="write the JSON report here ('-' for stdout)")
+        parser.add_argument("--baseline", help="plan baseline (default: settings.QUERY_PLAN_BASELINE)")
+        parser.add_argument("--save-baseline", action="store_true", help="store these plans as the baseline")
+        parser.add_argument("--check", action="store_true",
+                            help="exit non-zero when a hot query's plan regressed (see myproject/queryplans.py)")
+
+    def handle(self, *args, **opts):
+        scenarios = queryplans.plan_scenarios()
+        if opts["only"]:
+            wanted = {s.strip() for s in opts["only"].split(",") if s.strip()}
+            unknown = wanted - {s.name for s in scenarios}
+            if unknown:
+                raise CommandError(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [s for s in scenarios if s.name in wanted]
+
+        user = None
+        if opts["user"]:
+            user = User.objects.filter(email=opts["user"]).first()
+            if user is None:
+                raise CommandError(f"no user {opts['user']}")
+        try:
+            ctx = benchmark.default_context(user, opts["post"], opts["query"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if opts["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        try:
+            plans = queryplans.analyze(scenarios, ctx, opts["min_rows"],
+                                       log=self.stdout.write if opts["verbosity"] >= 2 else None)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        report = queryplans.report(plans)
+        self._print(plans, opts["all"])
+
+        if opts["output"] == "-":
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True, default=str))
+        elif opts["output"]:
+            queryplans.save(report, Path(opts["output"]))
+
+        default_baseline = getattr(settings, "QUERY_PLAN_BASELINE", None)
+        baseline_path = Path(opts["baseline"] or default_baseline) if (opts["baseline"] or default_baseline) else None
+        if opts["save_baseline"]:
+            if baseline_path is None:
+                raise CommandError("no --baseline path and settings.QUERY_PLAN_BASELINE is unset")
+            queryplans.save(report, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f"baseline written to {baseline_path}"))
+            return
+        if not opts["check"]:
+            return
+
+        baseline = None
+        if baseline_path is not None and baseline_path.exists():
+            baseline = queryplans.load(baseline_path)
+        elif opts["baseline"]:
+            raise CommandError(f"baseline {baseline_path} not found")
+        found = queryplans.regressions(report, baseline)
+        for key, f in found:
+            self.stdout.write(self.style.ERROR(f"REGRESSION {key}: {f['kind']} on {f['table']} ({f['detail']})"))
+        if found:
+            raise CommandError(f"{len(found)} query plan regression(s)"
+                               + (f" against {baseline_path}" if baseline else " (no baseline)"))
+        self.stdout.write(self.style.SUCCESS("no query plan regressions"))
+
+    def _print(self, plans, show_all):
+        style = {"error": self.style.ERROR, "warning": self.style.WARNING, "info": str}
+        suggestions = {}
+        for p in plans:
+            worst = {f["severity"] for f in p.findings}
+            if not show_all and not worst & {"error", "warning"}:
+                continue
+            self.stdout.write(f"\n[{p.scenario}] {p.id}  {p.sql[:160]}")
+            for depth, detail in p.plan:
+                self.stdout.write(f"    {'  ' * depth}{detail}")
+            for f in p.findings:
+                self.stdout.write(style[f["severity"]](f"  {f['severity'].upper():7} {f['kind']} on {f['table']}"))
+                if f.get("suggestion"):
+                    self.stdout.write(f"          -> {f['suggestion']}")
+                    if f["severity"] != "info":
+                        suggestions.setdefault(f["suggestion"], []).append(p.scenario)
+        if suggestions:
+            self.stdout.write("\nSuggested indexes:")
+            for text, where in suggestions.items():
+                self.stdout.write(f"  {text}   ({', '.join(sorted(set(where)))})")
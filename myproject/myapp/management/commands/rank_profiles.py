@@ -0,0 +1,40 @@
+# myapp/management/commands/rank_profiles.py
+from django.core.management.base import BaseCommand
+
+from myapp import ranking
+
+
+class Command(BaseCommand):
+    help = "Recompute Profile.rank_score (PageRank over Follow)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--damping", type=float, default=ranking.DAMPING)
+        parser.add_argument("--tol", type=float, default=ranking.TOLERANCE,
+                            help="stop when the L1 change between iterations drops below this")
+        parser.add_argument("--max-iter", type=int, default=ranking.MAX_ITER)
+        parser.add_argument("--benchmark", type=int, metavar="EDGES", default=0,
+                            help="rank a synthetic graph with this many edges instead of the database")
+
+    def handle(self, *args, **opts):
+        params = {"damping": opts["damping"], "tol": opts["tol"], "max_iter": opts["max_iter"]}
+        if opts["benchmark"]:
+            adj = ranking.synthetic_graph(opts["benchmark"])
+            self.stdout.write(f"synthetic graph: {adj.shape[0]} users, {adj.nnz} edges")
+            _rank, stats = ranking.pagerank(adj, **params)
+        else:
+            stats = ranking.rank_profiles(**params)
+            self.stdout.write(
+                "{users} users, {edges} edges, {updated} profiles updated in {total_seconds}s".format(**stats)
+            )
+
+        residuals = stats["residuals"]
+        if opts["verbosity"] >= 2:
+            for i, res in enumerate(residuals, 1):
+                self.stdout.write(f"  iter {i:3d}  L1 residual {res:.3e}")
+        elif residuals:
+            self.stdout.write(f"  L1 residual {residuals[0]:.3e} -> {residuals[-1]:.3e}")
+        style = self.style.SUCCESS if stats["converged"] else self.style.WARNING
+        self.stdout.write(style(
+            f"{'converged' if stats['converged'] else 'did NOT converge'} after "
+            f"{stats['iterations']} iterations ({stats['seconds']}s)"
+        ))
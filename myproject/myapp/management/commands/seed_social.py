@@ -0,0 +1,64 @@
+# myapp/management/commands/seed_social.py
+from datetime import date
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import seeding
+
+
+class Command(BaseCommand):
+    help = ("Generate a synthetic, seed-deterministic dataset for load testing (users, profiles, follows, "
+            "posts, likes, comments, saves, notifications). Use a throwaway database, e.g. "
+            "`seed_social --users 50000 --posts 1000000`.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--posts", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--days", type=int, default=365, help="spread activity over this many days")
+        parser.add_argument("--until", help="last day of data is the day before this (YYYY-MM-DD, default today); "
+                                            "fix it to reproduce a dataset exactly")
+        parser.add_argument("--follows", type=float, default=25, help="average accounts followed per user")
+        parser.add_argument("--likes", type=float, default=3.0, help="average likes per post")
+        parser.add_argument("--comments", type=float, default=1.0, help="average comments per post")
+        parser.add_argument("--saves", type=float, default=0.2, help="average saves per post")
+        parser.add_argument("--photo-ratio", type=float, default=0.3, help="share of posts with a photo reference")
+        parser.add_argument("--notify-days", type=int, default=30,
+                            help="create notifications for events of the last N days only")
+        parser.add_argument("--batch-size", type=int, default=5000, help="rows per bulk_create call")
+        parser.add_argument("--no-rollups", action="store_true",
+                            help="skip `rebuild_rollups --all` for the admin dashboard afterwards")
+
+    def handle(self, *args, **opts):
+        until = None
+        if opts["until"]:
+            try:
+                until = date.fromisoformat(opts["until"])
+            except ValueError:
+                raise CommandError("--until must be YYYY-MM-DD")
+        if opts["users"] < 1 or opts["posts"] < 0:
+            raise CommandError("--users must be positive and --posts non-negative")
+
+        seeder = seeding.Seeder(
+            opts["users"], opts["posts"], seed=opts["seed"], days=opts["days"], until=until,
+            follows_per_user=opts["follows"], likes_per_post=opts["likes"],
+            comments_per_post=opts["comments"], saves_per_post=opts["saves"],
+            photo_ratio=opts["photo_ratio"], notify_days=opts["notify_days"],
+            batch_size=opts["batch_size"],
+            log=self.stdout.write if opts["verbosity"] >= 2 else None,
+        )
+        seeding.fast_sqlite_writes()
+        try:
+            stats = seeder.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        rows = ", ".join(f"{stats.get(m, 0)} {m}" for m in (
+            "user", "follow", "post", "like", "comment", "savedpost", "notification"))
+        self.stdout.write(self.style.SUCCESS(f"seed {opts['seed']}: {rows} in {stats['total_seconds']}s"))
+
+        if not opts["no_rollups"] and apps.is_installed("admindashboard"):
+            call_command("rebuild_rollups", all=True, stdout=self.stdout)
+        self.stdout.write("Run `rank_profiles` and `build_suggestions` to rank and suggest over the new graph.")
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_alter_notification_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='suggestions_dirty',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-score'], name='myapp_follo_user_id_42b7cc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'suggested'), name='unique_suggestion_per_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_profile_suggestions_dirty_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rank_score',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_profile_rank_score'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-likes_count'], name='myapp_post_likes_c_4b01a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-comments_count'], name='myapp_post_comment_b68ecf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-posts_count'], name='myapp_profi_posts_c_68c736_idx'),
+        ),
+    ]
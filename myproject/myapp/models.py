@@ -76,6 +76,15 @@ class Profile(models.Model):
     followers_count = models.PositiveIntegerField(default=0)
     following_count = models.PositiveIntegerField(default=0)
 
+    # set by the Follow signals; `build_suggestions --incremental` recomputes these users
+    suggestions_dirty = models.BooleanField(default=False)
+
+    # PageRank over Follow, scaled so the average profile is 1.0 (`manage.py rank_profiles`)
+    rank_score = models.FloatField(default=0.0, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-posts_count"])]  # admin dashboard "top author"
+
     def __str__(self):
         return f"{self.user.email}'s profile"
 
@@ -104,6 +113,9 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=["-created_at"]),
             models.Index(fields=["author", "-created_at"]),
+            # admin dashboard "most liked / most commented" without scanning posts
+            models.Index(fields=["-likes_count"]),
+            models.Index(fields=["-comments_count"]),
         ]
 
     def __str__(self):
@@ -171,6 +183,25 @@ class SavedPost(models.Model):
         return f"{self.user} saved Post {self.post_id}"
 
 
+# --------- People you may know ---------
+class FollowSuggestion(models.Model):
+    """Top-K follow suggestions per user, written by `manage.py build_suggestions`."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="follow_suggestions")
+    suggested = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)  # friends-of-friends paths
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "suggested"], name="unique_suggestion_per_user"),
+        ]
+        indexes = [models.Index(fields=["user", "-score"])]
+
+    def __str__(self):
+        return f"{self.user_id} may know {self.suggested_id} ({self.score:.2f})"
+
+
 # --------- Notification ---------
 class Notification(models.Model):
     actor = models.ForeignKey(
@@ -189,6 +220,12 @@ class Notification(models.Model):
     class Meta:
         db_table = "myapp_notification"   # keep table name stable if you already have it
         ordering = ['-created_at']
+        # unread badge (0002 dropped it; `check_query_plans` now guards it) and the
+        # notification list, which orders by -created_at without filtering is_read
+        indexes = [
+            models.Index(fields=["recipient", "is_read", "-created_at"]),
+            models.Index(fields=["recipient", "-created_at"]),
+        ]
 
     def __str__(self):
         return f"Notif to {self.recipient_id}: {self.verb}"
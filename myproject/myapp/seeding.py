@@ -0,0 +1,394 @@
+# myapp/seeding.py
+"""
+Synthetic data for load testing (`manage.py seed_social`).
+
+Everything is drawn with numpy from a seed, so the same arguments produce
+the same rows:
+
+    users          join dates skewed towards the end of the window
+    follows        out-degree ~ Pareto, targets ~ Zipf over a random
+                   popularity order (a few accounts collect most followers)
+    posts          author ~ per-user activity (log-normal), text length
+                   ~ log-normal in words, a share with a photo reference
+    likes/comments/saves
+                   per post ~ Poisson around the author's reach, actors
+                   drawn by activity, timestamps shortly after the post
+    notifications  for follows/likes/comments of the last `notify_days`
+                   days (older ones live in the archive in production)
+
+Users and profiles go in with bulk_create, the high-volume tables with
+batched executemany INSERTs; either way none of the per-row signals in
+myapp/signals.py run, so profiles are created explicitly and the
+denormalised counters are recomputed with set-based UPDATEs at the end. Posts are
+generated in fixed chunks with their own random stream, so --batch-size
+changes only the INSERT size, never the data.
+"""
+import time
+from itertools import islice
+from datetime import datetime, timedelta, time as dt_time, timezone as dt_timezone
+
+import numpy as np
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import User, Profile, Post, Comment, Like, Follow, SavedPost, Notification
+
+SEED_DOMAIN = "seed.example.edu"
+SEED_PASSWORD = "seedpass123"
+
+CHUNK = 10_000        # posts per generation chunk (independent of the INSERT batch size)
+ZIPF_S = 0.8          # follow-target popularity exponent
+PARETO_A = 2.0        # out-degree tail (mean = 2 * the scale)
+PHOTO_POOL = 500      # distinct photo names referenced by posts
+
+POST_COLUMNS = ("id", "author", "text", "photo", "is_edited", "created_at", "updated_at",
+                "comments_count", "likes_count", "saves_count")
+NOTIFICATION_COLUMNS = ("recipient", "actor", "verb", "extra", "is_read", "created_at")
+
+# random streams: (seed, stream[, chunk]) -> independent generators
+_USERS, _FOLLOWS, _POSTS, _CHUNKS = 1, 2, 3, 4
+
+WORDS = (
+    "the a to and of in is for on with my this that it we our at you be are "
+    "class exam lecture lab project assignment deadline library campus canteen "
+    "professor tutor semester midterm final grade credit seminar thesis report "
+    "python java algorithm database network compiler kernel server cloud data "
+    "model training bug fix deploy code review commit branch merge test "
+    "today tomorrow tonight weekend morning finally again still really so very "
+    "happy tired excited stressed proud thanks congrats welcome anyone help "
+    "meet study group share notes slides question answer hint idea team "
+    "football music festival club event trip photo coffee rain holiday "
+    "#CST #CS #CT #exam #hackathon #campuslife #finals"
+).split()
+
+FIRST_NAMES = (
+    "Aung Kyaw Min Htet Zaw Thura Ye Myo Soe Hla Su Nandar Thiri Ei Hnin "
+    "May Phyu Khin Nilar Wai Yan Zin Lin Thant Naing Moe Sandi Chit Aye Tun"
+).split()
+LAST_NAMES = (
+    "Oo Win Aung Myint Htun Kyaw Naing Lwin Thein Zaw Hlaing Maung Soe Tun Linn"
+).split()
+
+
+def _rng(seed, *stream):
+    return np.random.default_rng([seed, *stream])
+
+
+def _sample(rng, cdf, size):
+    """Draw `size` indices from the distribution with cumulative weights `cdf`."""
+    return np.minimum(np.searchsorted(cdf, rng.random(size) * cdf[-1], side="right"), len(cdf) - 1)
+
+
+def _texts(rng, count, median_words, sigma, max_words):
+    """`count` strings with log-normally distributed word counts."""
+    lengths = np.clip(rng.lognormal(np.log(median_words), sigma, count), 1, max_words).astype(np.int64)
+    words = np.asarray(WORDS)[rng.integers(0, len(WORDS), int(lengths.sum()))].tolist()
+    ends = np.cumsum(lengths).tolist()
+    out, start = [], 0
+    for end in ends:
+        text = " ".join(words[start:end])
+        out.append(text[:1].upper() + text[1:])
+        start = end
+    return out
+
+
+def _excerpt(text, length=120):
+    """Truncator(text).chars(length) for the plain ASCII text generated here."""
+    return text if len(text) <= length else text[:length - 1] + "\u2026"
+
+
+def _datetimes(origin, seconds):
+    return [origin + timedelta(seconds=s) for s in seconds.tolist()]
+
+
+class Seeder:
+    """
+    One seeding run. `until` is the local day the data ends at (exclusive);
+    it defaults to today, so pass it explicitly to reproduce a dataset
+    byte-for-byte on another day.
+    """
+
+    def __init__(self, users, posts, seed=0, days=365, until=None, follows_per_user=25,
+                 likes_per_post=3.0, comments_per_post=1.0, saves_per_post=0.2,
+                 photo_ratio=0.3, notify_days=30, batch_size=5000, log=None):
+        self.n, self.n_posts, self.seed = users, posts, seed
+        self.follows_per_user = follows_per_user
+        self.likes_per_post, self.comments_per_post = likes_per_post, comments_per_post
+        self.saves_per_post, self.photo_ratio = saves_per_post, photo_ratio
+        self.batch_size = batch_size
+        self.log = log or (lambda msg: None)
+
+        until = until or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(until, dt_time.min))
+        self.start = self.end - timedelta(days=days)
+        self.span = (self.end - self.start).total_seconds()
+        self.notify_after = self.span - notify_days * 86400.0  # offsets past this get notifications
+        self.stats = {}
+
+    # ---------- helpers ----------
+    def _count_rows(self, model, rows):
+        key = model._meta.model_name
+        self.stats[key] = self.stats.get(key, 0) + rows
+
+    def _insert(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self._count_rows(model, len(objs))
+
+    def _copy(self, model, columns, rows):
+        """
+        Batched executemany INSERT of ready-made value tuples. Used for the
+        high-volume tables: bulk_create spends most of its time building
+        model instances and preparing values one field at a time.
+        """
+        qn = connection.ops.quote_name
+        cols = ", ".join(qn(model._meta.get_field(c).column) for c in columns)
+        sql = (f"INSERT INTO {qn(model._meta.db_table)} ({cols}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        rows, total = iter(rows), 0
+        with connection.cursor() as cur:
+            while batch := list(islice(rows, self.batch_size)):
+                cur.executemany(sql, batch)
+                total += len(batch)
+        self._count_rows(model, total)
+
+    def _db_datetimes(self, offsets):
+        if connection.vendor == "sqlite":
+            # what adapt_datetimefield_value stores (naive UTC text), without a Python call per value
+            utc = np.datetime64(self.start.astimezone(dt_timezone.utc).replace(tzinfo=None), "us")
+            stamps = utc + (offsets * 1e6).astype("timedelta64[us]")
+            return np.char.replace(np.datetime_as_string(stamps, unit="us"), "T", " ").tolist()
+        return _datetimes(self.start, offsets)
+
+    def _stage(self, name, fn):
+        t0 = time.perf_counter()
+        fn()
+        took = round(time.perf_counter() - t0, 2)
+        self.stats[f"{name}_seconds"] = took
+        self.log(f"{name}: {took}s")
+
+    def _is_read(self, rng, offsets):
+        """Notifications older than three days are mostly read."""
+        old = offsets < self.span - 3 * 86400.0
+        return rng.random(len(offsets)) < np.where(old, 0.9, 0.3)
+
+    # ---------- run ----------
+    def run(self):
+        first = f"seed{self.seed}.0@{SEED_DOMAIN}"
+        if User.objects.filter(email=first).exists():
+            raise ValueError(f"seed {self.seed} was already loaded into this database ({first} exists)")
+
+        self.uid0 = (User.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+        self.pid0 = (Post.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+
+        t0 = time.perf_counter()
+        self._stage("users", self._users)
+        self._stage("follows", self._follows)
+        self._stage("posts", self._posts)
+        self._stage("counters", self.recount)
+        self.stats["total_seconds"] = round(time.perf_counter() - t0, 2)
+        return self.stats
+
+    def _users(self):
+        rng = _rng(self.seed, _USERS)
+        n = self.n
+        # more recent cohorts are larger; ids follow join order
+        self.joined = np.sort(rng.random(n) ** 0.7) * self.span * 0.98
+        self.activity = rng.lognormal(0.0, 1.2, n)
+        self.activity_cdf = np.cumsum(self.activity)
+
+        # one hash for everyone (PBKDF2 per row would dominate); fixed salt keeps the run deterministic
+        password = make_password(SEED_PASSWORD, salt=f"seed{self.seed}salt")
+        joined = _datetimes(self.start, self.joined)
+        majors = [m for m, _label in Profile.MAJOR] + [None]
+        years = [y for y, _label in Profile.ACADEMIC_YEAR]
+        major = rng.integers(0, len(majors), n).tolist()
+        year = rng.integers(0, len(years), n).tolist()
+        first = rng.integers(0, len(FIRST_NAMES), n).tolist()
+        last = rng.integers(0, len(LAST_NAMES), n).tolist()
+        photo = (rng.random(n) < 0.4).tolist()
+        bios = _texts(rng, n, 6, 0.8, 40)
+        has_bio = (rng.random(n) < 0.3).tolist()
+
+        for lo in range(0, n, CHUNK):
+            hi = min(lo + CHUNK, n)
+            with transaction.atomic():
+                self._insert(User, [
+                    User(id=self.uid0 + i, email=f"seed{self.seed}.{i}@{SEED_DOMAIN}",
+                         password=password, date_joined=joined[i])
+                    for i in range(lo, hi)
+                ])
+                self._insert(Profile, [
+                    Profile(
+                        user_id=self.uid0 + i,
+                        full_name=f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}",
+                        bio=bios[i] if has_bio[i] else "",
+                        major=majors[major[i]],
+                        year=years[year[i]] if majors[major[i]] else None,
+                        roll_no=f"{majors[major[i]] or 'X'}-{i:06d}",
+                        photo=f"profile/seed/{i % PHOTO_POOL:03d}.jpg" if photo[i] else None,
+                    )
+                    for i in range(lo, hi)
+                ])
+
+    def _follows(self):
+        rng = _rng(self.seed, _FOLLOWS)
+        n = self.n
+        if n < 2:
+            self.followers = np.zeros(n)
+            return
+        popularity = 1.0 / (rng.permutation(n) + 1.0) ** ZIPF_S
+        degree = np.minimum((rng.pareto(PARETO_A, n) + 1.0) * self.follows_per_user / 2.0, n - 1)
+        src = np.repeat(np.arange(n), degree.astype(np.int64))
+        dst = _sample(rng, np.cumsum(popularity), len(src))
+        keep = src != dst
+        pairs = np.unique(src[keep] * n + dst[keep])
+        src, dst = pairs // n, pairs % n
+        self.followers = np.bincount(dst, minlength=n)
+
+        # an edge can only exist once both accounts do; most are made soon after
+        since = np.maximum(self.joined[src], self.joined[dst])
+        offsets = since + rng.random(len(src)) ** 3 * (self.span - since)
+        when = self._db_datetimes(offsets)
+        src_ids, dst_ids = (src + self.uid0).tolist(), (dst + self.uid0).tolist()
+        with transaction.atomic():
+            self._copy(Follow, ("follower", "following", "created_at"), zip(src_ids, dst_ids, when))
+
+            notify = np.flatnonzero(offsets >= self.notify_after)
+            is_read = self._is_read(rng, offsets[notify]).tolist()
+            self._copy(Notification, NOTIFICATION_COLUMNS, (
+                (dst_ids[i], src_ids[i], "started following you", None, read, when[i])
+                for i, read in zip(notify.tolist(), is_read)
+            ))
+
+    def _posts(self):
+        rng = _rng(self.seed, _POSTS)
+        n, p = self.n, self.n_posts
+        if not n or not p:
+            return
+        # posting rate is per unit of time, so late joiners get fewer posts, not denser ones
+        authors = _sample(rng, np.cumsum(self.activity * (self.span - self.joined)), p)
+        offsets = self.joined[authors] + (self.span - self.joined[authors]) * rng.random(p)
+        order = np.argsort(offsets, kind="stable")  # post ids follow created_at
+        self.authors, self.post_offsets = authors[order], offsets[order]
+        # reach: followers of the author times a per-post "how good was it"
+        appeal = np.sqrt(self.followers[self.authors] + 1.0) * rng.lognormal(0.0, 0.8, p)
+        self.appeal = appeal / appeal.mean()
+
+        for chunk, lo in enumerate(range(0, p, CHUNK)):
+            with transaction.atomic():
+                self._post_chunk(_rng(self.seed, _CHUNKS, chunk), lo, min(lo + CHUNK, p))
+            self.log(f"  posts {min(lo + CHUNK, p)}/{p}")
+
+    def _post_chunk(self, rng, lo, hi):
+        n, size = self.n, hi - lo
+        authors, offsets, appeal = self.authors[lo:hi], self.post_offsets[lo:hi], self.appeal[lo:hi]
+        post_ids = np.arange(self.pid0 + lo, self.pid0 + hi)
+        author_ids = authors + self.uid0
+
+        texts = _texts(rng, size, 14, 0.9, 300)
+        photos = np.where(rng.random(size) < self.photo_ratio, rng.integers(0, PHOTO_POOL, size), -1).tolist()
+        edited = (rng.random(size) < 0.05).tolist()
+        created = self._db_datetimes(offsets)
+        self._copy(Post, POST_COLUMNS, (
+            (pid, aid, text, f"post/seed/{ph:04d}.jpg" if ph >= 0 else None, ed, at, at, 0, 0, 0)
+            for pid, aid, text, ph, ed, at in zip(
+                post_ids.tolist(), author_ids.tolist(), texts, photos, edited, created)
+        ))
+
+        def events(rate, unique):
+            counts = np.minimum(rng.poisson(rate * appeal), n - 1)
+            post = np.repeat(np.arange(size), counts)
+            actor = _sample(rng, self.activity_cdf, len(post))
+            if unique:
+                pairs = np.unique(post * n + actor)
+                post, actor = pairs // n, pairs % n
+            return post, actor
+
+        def reaction_times(post, actor, delay_hours):
+            start = np.maximum(offsets[post], self.joined[actor])
+            return np.minimum(start + rng.exponential(delay_hours * 3600.0, len(post)), self.span - 1.0)
+
+        extra_field = Notification._meta.get_field("extra")
+        excerpts = {}
+        notifications = []
+
+        def notify(post, actor, at, verb, bodies=None):
+            # same payload as the like/comment signals (myapp/signals.py::_post_extra)
+            idx = np.flatnonzero((at >= self.notify_after) & (actor != authors[post]))
+            is_read = self._is_read(rng, at[idx]).tolist()
+            when = self._db_datetimes(at[idx])
+            for j, i in enumerate(idx.tolist()):
+                k = int(post[i])
+                if k not in excerpts:
+                    excerpts[k] = _excerpt(texts[k])
+                extra = {"post_id": int(post_ids[k]), "post_excerpt": excerpts[k]}
+                if bodies is not None:
+                    extra["comment_excerpt"] = _excerpt(bodies[i])
+                notifications.append((
+                    int(author_ids[k]), int(actor[i]) + self.uid0, verb,
+                    extra_field.get_db_prep_save(extra, connection), is_read[j], when[j],
+                ))
+
+        post, actor = events(self.likes_per_post, unique=True)
+        at = reaction_times(post, actor, 6)
+        self._copy(Like, ("user", "post", "created_at"),
+                   zip((actor + self.uid0).tolist(), post_ids[post].tolist(), self._db_datetimes(at)))
+        notify(post, actor, at, "liked")
+
+        post, actor = events(self.comments_per_post, unique=False)
+        at = reaction_times(post, actor, 12)
+        bodies = _texts(rng, len(post), 8, 0.7, 120)
+        when = self._db_datetimes(at)
+        self._copy(Comment, ("author", "post", "body", "created_at", "updated_at", "is_edited"), (
+            (u, pid, body, w, w, False)
+            for u, pid, body, w in zip((actor + self.uid0).tolist(), post_ids[post].tolist(), bodies, when)
+        ))
+        notify(post, actor, at, "commented", bodies)
+
+        post, actor = events(self.saves_per_post, unique=True)
+        at = reaction_times(post, actor, 24)
+        self._copy(SavedPost, ("user", "post", "created_at"),
+                   zip((actor + self.uid0).tolist(), post_ids[post].tolist(), self._db_datetimes(at)))
+
+        self._copy(Notification, NOTIFICATION_COLUMNS, notifications)
+
+    # ---------- counters ----------
+    def recount(self):
+        """Set-based recount of the denormalised counters of the seeded rows."""
+        with transaction.atomic():
+            recount_counters(post_ids_from=self.pid0, user_ids_from=self.uid0)
+
+
+def _count(model, fk, outer="pk"):
+    rows = model.objects.filter(**{fk: OuterRef(outer)}).order_by().values(fk).annotate(c=Count("*")).values("c")
+    return Coalesce(Subquery(rows), 0)
+
+
+def recount_counters(post_ids_from=0, user_ids_from=0):
+    """
+    Recompute Post.likes/comments/saves_count and Profile.posts/followers/
+    following_count from the raw tables, one UPDATE per table. The ranges
+    limit the work to rows created after the given ids.
+    """
+    posts = Post.objects.filter(id__gte=post_ids_from).update(
+        likes_count=_count(Like, "post"),
+        comments_count=_count(Comment, "post"),
+        saves_count=_count(SavedPost, "post"),
+    )
+    profiles = Profile.objects.filter(user_id__gte=user_ids_from).update(
+        posts_count=_count(Post, "author", "user_id"),
+        followers_count=_count(Follow, "following", "user_id"),
+        following_count=_count(Follow, "follower", "user_id"),
+    )
+    return posts, profiles
+
+
+def fast_sqlite_writes():
+    """Skip fsync while seeding a SQLite file (load-test data is disposable)."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cur:
+            cur.execute("PRAGMA synchronous = OFF")
@@ -1,9 +1,13 @@
 # myapp/signals.py
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
-from django.db import models as djmodels
+from django.db import models as djmodels, transaction
 from django.utils.text import Truncator
 
+from myproject import authcache, invalidation
+
+from . import entitycache
+from .graph import follow_graph
 from .models import (
     User, Profile, Post, Comment, Like,
     Follow, SavedPost, Notification
@@ -15,6 +19,27 @@ from .models import (
 # If we also create() here, it will raise IntegrityError on the one-to-one.
 # So REMOVE the duplicate signal entirely.
 
+# ---------- ENTITY CACHE (myapp/entitycache.py) ----------
+# Only after commit, so no request can re-cache the old row under the new
+# version. Counter updates drop just the counter key; the body stays cached.
+def _post_counters_changed(post_id):
+    transaction.on_commit(lambda: entitycache.posts.invalidate_counters(post_id))
+
+def _profile_counters_changed(*user_ids):
+    transaction.on_commit(lambda: entitycache.profiles.invalidate_counters(*user_ids))
+
+def _only_counters(update_fields, counters):
+    return bool(update_fields) and set(update_fields) <= set(counters)
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    if _only_counters(kwargs.get("update_fields"), entitycache.POST_COUNTERS):
+        _post_counters_changed(instance.pk)  # post.save(update_fields=["likes_count"]) in api/views.py
+    else:
+        post_id = instance.pk
+        transaction.on_commit(lambda: entitycache.posts.invalidate(post_id))
+
 # ---------- POSTS COUNTERS ----------
 @receiver(post_save, sender=Post)
 def post_created(sender, instance, created, **kwargs):
@@ -22,12 +47,14 @@ def post_created(sender, instance, created, **kwargs):
         Profile.objects.filter(user=instance.author).update(
             posts_count=djmodels.F("posts_count") + 1
         )
+        _profile_counters_changed(instance.author_id)
 
 @receiver(post_delete, sender=Post)
 def post_deleted(sender, instance, **kwargs):
     Profile.objects.filter(user=instance.author).update(
         posts_count=djmodels.F("posts_count") - 1
     )
+    _profile_counters_changed(instance.author_id)
 
 # ---------- Helper to build Notification.extra ----------
 def _post_extra(post: Post, comment_text: str | None = None):
@@ -46,11 +73,12 @@ def like_created(sender, instance, created, **kwargs):
         Post.objects.filter(id=instance.post_id).update(
             likes_count=djmodels.F("likes_count") + 1
         )
+        _post_counters_changed(instance.post_id)
         # notify post author, but not yourself
         if instance.user_id != instance.post.author_id:
             Notification.objects.create(
-                recipient=instance.post.author,
-                actor=instance.user,
+                recipient_id=instance.post.author_id,  # ids: don't lazy-load the users
+                actor_id=instance.user_id,
                 verb="liked",                      # matches notifications.html
                 extra=_post_extra(instance.post),  # JSON only
             )
@@ -60,6 +88,7 @@ def like_deleted(sender, instance, **kwargs):
     Post.objects.filter(id=instance.post_id).update(
         likes_count=djmodels.F("likes_count") - 1
     )
+    _post_counters_changed(instance.post_id)
 
 # ---------- COMMENTS ----------
 @receiver(post_save, sender=Comment)
@@ -68,10 +97,11 @@ def comment_created(sender, instance, created, **kwargs):
         Post.objects.filter(id=instance.post_id).update(
             comments_count=djmodels.F("comments_count") + 1
         )
+        _post_counters_changed(instance.post_id)
         if instance.author_id != instance.post.author_id:
             Notification.objects.create(
-                recipient=instance.post.author,
-                actor=instance.author,
+                recipient_id=instance.post.author_id,
+                actor_id=instance.author_id,
                 verb="commented",                               # matches notifications.html
                 extra=_post_extra(instance.post, instance.body)
             )
@@ -81,33 +111,51 @@ def comment_deleted(sender, instance, **kwargs):
     Post.objects.filter(id=instance.post_id).update(
         comments_count=djmodels.F("comments_count") - 1
     )
+    _post_counters_changed(instance.post_id)
 
 # ---------- FOLLOW ----------
 @receiver(post_save, sender=Follow)
 def follow_created(sender, instance, created, **kwargs):
     if created:
         Profile.objects.filter(user=instance.follower).update(
-            following_count=djmodels.F("following_count") + 1
+            following_count=djmodels.F("following_count") + 1,
+            suggestions_dirty=True,
         )
         Profile.objects.filter(user=instance.following).update(
             followers_count=djmodels.F("followers_count") + 1
         )
+        _profile_counters_changed(instance.follower_id, instance.following_id)
         if instance.follower_id != instance.following_id:
             Notification.objects.create(
-                recipient=instance.following,
-                actor=instance.follower,
+                recipient_id=instance.following_id,
+                actor_id=instance.follower_id,
                 verb="started following you",
                 extra=None,
             )
+        # in-memory follow graph (myapp/graph.py); only once the row is committed
+        f_id, t_id = instance.follower_id, instance.following_id
+        transaction.on_commit(lambda: _edge_changed(f_id, t_id, added=True))
 
 @receiver(post_delete, sender=Follow)
 def follow_deleted(sender, instance, **kwargs):
     Profile.objects.filter(user=instance.follower).update(
-        following_count=djmodels.F("following_count") - 1
+        following_count=djmodels.F("following_count") - 1,
+        suggestions_dirty=True,
     )
     Profile.objects.filter(user=instance.following).update(
         followers_count=djmodels.F("followers_count") - 1
     )
+    _profile_counters_changed(instance.follower_id, instance.following_id)
+    f_id, t_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: _edge_changed(f_id, t_id, added=False))
+
+def _edge_changed(f_id, t_id, added):
+    if added:
+        follow_graph.add_edge(f_id, t_id)
+    else:
+        follow_graph.remove_edge(f_id, t_id)
+    # the other workers' graphs (myproject/invalidation.py)
+    invalidation.publish("follow", [f_id, t_id], int(added))
 
 # ---------- SAVED POSTS ----------
 @receiver(post_save, sender=SavedPost)
@@ -116,9 +164,42 @@ def save_created(sender, instance, created, **kwargs):
         Post.objects.filter(id=instance.post_id).update(
             saves_count=djmodels.F("saves_count") + 1
         )
+        _post_counters_changed(instance.post_id)
 
 @receiver(post_delete, sender=SavedPost)
 def save_deleted(sender, instance, **kwargs):
     Post.objects.filter(id=instance.post_id).update(
         saves_count=djmodels.F("saves_count") - 1
     )
+    _post_counters_changed(instance.post_id)
+
+
+# ---------- CACHED USER SNAPSHOTS (myproject/authcache.py) ----------
+def _invalidate_user(user_id):
+    # after commit, so no request can re-cache the old row under the new version
+    transaction.on_commit(lambda: authcache.invalidate(user_id))
+    transaction.on_commit(lambda: entitycache.profiles.invalidate(user_id))
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    _invalidate_user(instance.pk)
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    if _only_counters(kwargs.get("update_fields"), entitycache.PROFILE_COUNTERS):
+        _profile_counters_changed(instance.user_id)
+    else:
+        _invalidate_user(instance.user_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        _invalidate_user(instance.pk)
+    else:  # group.user_set.add(...) / permission.user_set.add(...)
+        for user_id in pk_set or ():
+            _invalidate_user(user_id)
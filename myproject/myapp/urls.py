@@ -29,6 +29,7 @@ urlpatterns = [
 
     # Profiles (use this one name everywhere)
     path("profiles/<int:user_id>/", views.profile_detail, name="profile-detail"),
+    path("profiles/<int:user_id>/posts/", views.profile_posts, name="profile-posts"),
     path("profiles/me/edit/", views.profile_edit, name="profile-edit"),
 
     # Notifications (server-rendered page)
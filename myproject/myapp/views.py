@@ -1,4 +1,5 @@
 # myapp/views.py
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login
@@ -6,12 +7,16 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponseForbidden, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.views.decorators.http import require_http_methods, require_POST
 from django.utils.text import Truncator  # <-- for safe excerpts
 
+from myproject.querybudget import query_budget
+from myproject.ratelimit import ratelimit
+
+from . import entitycache
 from .forms import (
     SignUpForm,
     EmailAuthenticationForm,
@@ -19,6 +24,7 @@ from .forms import (
     CommentForm,
     ProfileForm,
 )
+from .graph import follow_graph
 from .models import (
     Profile,
     Post,
@@ -26,6 +32,7 @@ from .models import (
     Like,
     SavedPost,
     Follow,
+    FollowSuggestion,
     Notification,
 )
 
@@ -92,6 +99,36 @@ def _paginate(request, queryset, per_page=10):
     return page_obj
 
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(obj):
+    us = (obj.created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{us}_{obj.id}"
+
+
+def _cursor_page(queryset, cursor=None, per_page=10):
+    """
+    Keyset pagination on (-created_at, -id): no COUNT(*) and no OFFSET, so
+    every page costs the same no matter how deep it is.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    qs = queryset.order_by("-created_at", "-id")
+    if cursor:
+        try:
+            us, pk = (int(x) for x in cursor.split("_", 1))
+            ts = _EPOCH + timedelta(microseconds=us)
+            # the ANDed created_at bound lets the (author, created_at) index seek; the OR alone cannot
+            qs = qs.filter(Q(created_at__lte=ts), Q(created_at__lt=ts) | Q(id__lt=pk))
+        except (ValueError, OverflowError):
+            pass  # bad or out-of-range cursor -> first page
+    items = list(qs[: per_page + 1])
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, _encode_cursor(items[-1])
+    return items, None
+
+
 def _notify_post(*, actor, recipient, post, verb, comment_text=None):
     """
     Create a Notification for a post action.
@@ -120,36 +157,36 @@ def _notify_post(*, actor, recipient, post, verb, comment_text=None):
 # -----------------------------
 # Feed / Posts
 # -----------------------------
+@query_budget(7)
 @login_required
 def feed(request):
     if request.user.is_staff or request.user.is_superuser:
         return redirect("admindashboard:home")
-    qs = (
-        Post.objects
-        .select_related("author", "author__profile")
-        .order_by("-created_at")
-    )
-    page_obj = _paginate(request, qs, per_page=10)
+    # ids only (covered by the created_at index), rows from myapp/entitycache.py
+    ids = Post.objects.order_by("-created_at").values_list("id", flat=True)
+    page_obj = _paginate(request, ids, per_page=10)
+    page_obj.object_list = entitycache.hydrate_posts(page_obj.object_list)
     return render(request, "social/feed.html", {"page_obj": page_obj})
 
 
 @login_required
 def posts_by_author(request, user_id):
-    qs = (
-        Post.objects.select_related("author", "author__profile")
-        .filter(author_id=user_id)
+    ids = (
+        Post.objects.filter(author_id=user_id)
         .order_by("-created_at")
+        .values_list("id", flat=True)
     )
-    page_obj = _paginate(request, qs, per_page=10)
+    page_obj = _paginate(request, ids, per_page=10)
+    page_obj.object_list = entitycache.hydrate_posts(page_obj.object_list)
     return render(request, "social/feed.html", {"page_obj": page_obj})
 
 
+@query_budget(7)
 @login_required
 def post_detail(request, pk):
-    post = get_object_or_404(
-        Post.objects.select_related("author", "author__profile"),
-        pk=pk
-    )
+    post = entitycache.get_posts([pk]).get(pk)
+    if post is None:
+        raise Http404("No Post matches the given query.")
     comments = (
         Comment.objects.select_related("author", "author__profile")
         .filter(post=post).order_by("-created_at")
@@ -264,6 +301,8 @@ def comment_delete(request, comment_id):
 # -----------------------------
 # AJAX Toggles: Like / Save / Follow
 # -----------------------------
+@query_budget(20)  # like + counters, rollups and two notifications
+@ratelimit("like")
 @login_required
 @require_POST
 def toggle_like(request, post_id):
@@ -272,7 +311,7 @@ def toggle_like(request, post_id):
     When a like is created, notify the post author (unless self).
     Returns JSON for async UI updates.
     """
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.select_related("author"), pk=post_id)  # author: notification
 
     obj, created = Like.objects.get_or_create(user=request.user, post=post)
     if not created:
@@ -328,67 +367,121 @@ def toggle_follow(request):
 # -----------------------------
 # Followers / Following lists
 # -----------------------------
+def _follow_page(request, ids):
+    """
+    One page of a follow list served from the in-memory graph: only this
+    page's profiles are loaded, and is_following is a binary search per row.
+    """
+    page_obj = _paginate(request, ids, per_page=20)
+    page_ids = list(page_obj.object_list)
+    by_user = Profile.objects.select_related("user").in_bulk(page_ids, field_name="user_id")
+    flags = follow_graph.following_flags(request.user.id, page_ids)
+    profiles = []
+    for uid in page_ids:
+        p = by_user.get(uid)
+        if p is not None:
+            p.is_following = flags[uid]
+            profiles.append(p)
+    return page_obj, profiles
+
+
 @login_required
 def followers_list(request, user_id):
     target = get_object_or_404(User, pk=user_id)
-    follower_ids = Follow.objects.filter(
-        following=target
-    ).values_list("follower_id", flat=True)
-
-    profiles = list(
-        Profile.objects.filter(user_id__in=follower_ids).select_related("user")
-    )
-
-    my_following_ids = set(
-        Follow.objects.filter(follower=request.user).values_list("following_id", flat=True)
-    )
-    for p in profiles:
-        p.is_following = p.user_id in my_following_ids
-
+    page_obj, profiles = _follow_page(request, follow_graph.followers(target.id))
     return render(
         request,
         "social/followers_list.html",
-        {"profiles": profiles, "target_user": target},
+        {"profiles": profiles, "target_user": target, "page_obj": page_obj},
     )
 
 
 @login_required
 def following_list(request, user_id):
     target = get_object_or_404(User, pk=user_id)
+    page_obj, profiles = _follow_page(request, follow_graph.following(target.id))
+    return render(
+        request,
+        "social/following_list.html",
+        {"profiles": profiles, "page_obj": page_obj},
+    )
 
-    following_ids = Follow.objects.filter(
-        follower=target
-    ).values_list("following_id", flat=True)
 
-    profiles = list(
-        Profile.objects.filter(user_id__in=following_ids).select_related("user")
-    )
+# -----------------------------
+# Profiles
+# -----------------------------
+PROFILE_POSTS_PER_PAGE = 10
+SIDEBAR_SUGGESTIONS = 5
+
 
-    my_following_ids = set(
-        Follow.objects.filter(follower=request.user).values_list("following_id", flat=True)
+def _profile_posts_mode(request):
+    return "grid" if request.GET.get("view") == "grid" else "list"
+
+
+def _profile_posts_queryset(user_id, mode):
+    qs = Post.objects.filter(author_id=user_id)
+    if mode == "grid":
+        # compact grid: thumbnail + counters only (created_at is the cursor key)
+        return qs.only("id", "photo", "likes_count", "comments_count", "created_at")
+    # cards: the cursor keys only (covered by the author index), see _profile_posts_page
+    return qs.only("id", "created_at")
+
+
+def _profile_posts_page(user_id, mode, cursor=None):
+    posts, next_cursor = _cursor_page(
+        _profile_posts_queryset(user_id, mode), cursor=cursor, per_page=PROFILE_POSTS_PER_PAGE
     )
-    for p in profiles:
-        p.is_following = p.user_id in my_following_ids
+    if mode == "list":
+        posts = entitycache.hydrate_posts(p.id for p in posts)
+    return posts, next_cursor
 
-    return render(request, "social/following_list.html", {"profiles": profiles})
+
+def _sidebar_suggestions(user, limit=SIDEBAR_SUGGESTIONS):
+    """Top "People you may know" profiles, skipping accounts followed since the last build."""
+    rows = list(
+        FollowSuggestion.objects.filter(user=user)
+        .select_related("suggested__profile")
+        .order_by("-score", "-suggested__profile__rank_score", "id")[: limit * 2]
+    )
+    followed = follow_graph.following_flags(user.id, [r.suggested_id for r in rows])
+    return [r for r in rows if not followed[r.suggested_id]][:limit]
 
 
-# -----------------------------
-# Profiles
-# -----------------------------
 @login_required
 def profile_detail(request, user_id):
     profile = get_object_or_404(
         Profile.objects.select_related("user"), user_id=user_id
     )
-    is_following = Follow.objects.filter(
-        follower=request.user, following=profile.user
-    ).exists()
-    posts = profile.user.posts.all().order_by("-created_at")
+    # exact: the graph may lag behind a follow made on another worker (myapp/graph.py)
+    is_following = Follow.objects.filter(follower=request.user, following_id=profile.user_id).exists()
+    mode = _profile_posts_mode(request)
+    posts, next_cursor = _profile_posts_page(user_id, mode)
     return render(
         request,
         "social/profile_detail.html",
-        {"profile": profile, "posts": posts, "is_following": is_following},
+        {
+            "profile": profile,
+            "posts": posts,
+            "next_cursor": next_cursor,
+            "mode": mode,
+            "is_following": is_following,
+            "suggestions": _sidebar_suggestions(request.user) if request.user.id == profile.user_id else [],
+        },
+    )
+
+
+@login_required
+def profile_posts(request, user_id):
+    """
+    "Load more" fragment for the profile page: renders just the next batch of
+    cards (or grid tiles) plus the next load-more button.
+    """
+    mode = _profile_posts_mode(request)
+    posts, next_cursor = _profile_posts_page(user_id, mode, request.GET.get("cursor"))
+    return render(
+        request,
+        "social/_profile_posts.html",
+        {"posts": posts, "next_cursor": next_cursor, "mode": mode, "profile_user_id": user_id},
     )
 
 
@@ -460,6 +553,8 @@ def faq_view(request):
 # -----------------------------
 # Search
 # -----------------------------
+@query_budget(7)
+@ratelimit("search")
 def search_view(request):
     q = (request.GET.get("q") or "").strip()
     if not q:
@@ -468,18 +563,19 @@ def search_view(request):
     people = (
         Profile.objects.filter(Q(full_name__icontains=q) | Q(user__email__icontains=q))
         .select_related("user")
-        .order_by("full_name", "user__email")[:20]
+        .order_by("-rank_score", "full_name", "user__email")[:20]
     )
 
-    posts = (
+    post_ids = (
         Post.objects.filter(
             Q(text__icontains=q)
             | Q(author__email__icontains=q)
             | Q(author__profile__full_name__icontains=q)
         )
-        .select_related("author", "author__profile")
-        .order_by("-created_at")[:50]
+        .order_by("-created_at")
+        .values_list("id", flat=True)[:50]
     )
+    posts = entitycache.hydrate_posts(post_ids)
 
     return render(
         request,
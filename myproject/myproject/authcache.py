@@ -0,0 +1,148 @@
+# myproject/authcache.py
+"""
+Cached user loading for AuthenticationMiddleware.
+
+CachedModelBackend.get_user() serves the session's user, with its Profile
+already attached (so `request.user.profile` in the nav bar is free too),
+from a pickled snapshot:
+
+    authcache:ver:<uid>         version token, shared cache only
+    authcache:user:<uid>:<ver>  pickled User (+ Profile), shared cache
+    authcache:user:<uid>        (version, User) in the in-process LRU
+
+The version is read from the shared cache on every request, so a bump is
+seen by every worker at once and the local tier never serves a stale
+snapshot. That only holds for a cache all workers share (Redis, memcached,
+the database): with a per-process backend such as LocMemCache another
+worker would keep serving a user after logout, deactivation or a password
+change, so AUTH_CACHE["alias"] must be shared or the cache stays off
+(`manage.py check` warns, myproject.W001). myapp/signals.py bumps it whenever the User or Profile row is
+saved or deleted (profile edit, password change, staff/active flags,
+last_login) and when the user's groups or permissions change; the bump
+also goes out on the invalidation bus (myproject/invalidation.py) so the
+other workers drop their local copy. Counters updated with
+queryset.update() (posts/followers_count) do not bump it; read Profile
+directly where exact counts matter.
+
+Warm path: one shared-cache get, zero queries.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+from . import invalidation
+from .tieredcache import LocalLRU, is_shared
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    cfg = {"enabled": False, "alias": "default", "ttl": 3600, "local_size": 5000, "local_ttl": 60}
+    cfg.update(getattr(settings, "AUTH_CACHE", {}) or {})
+    return cfg
+
+
+_local = None
+
+
+def _local_tier(cfg):
+    global _local
+    if _local is None:
+        _local = LocalLRU(cfg["local_size"], cfg["local_ttl"], name="auth-local")
+    return _local
+
+
+def _version_key(user_id):
+    return f"authcache:ver:{user_id}"
+
+
+def _snapshot_key(user_id, version):
+    return f"authcache:user:{user_id}:{version}"
+
+
+def _local_key(user_id):
+    return f"authcache:user:{user_id}"
+
+
+def current_version(user_id, cfg=None):
+    cfg = cfg or _config()
+    shared = caches[cfg["alias"]]
+    version = shared.get(_version_key(user_id))
+    if version is None:
+        # a fresh random token: an evicted version can never come back and match an old snapshot
+        shared.add(_version_key(user_id), uuid.uuid4().hex[:12], None)
+        version = shared.get(_version_key(user_id))
+    return version
+
+
+def invalidate(user_id):
+    """Retire every cached snapshot of this user (all workers)."""
+    cfg = _config()
+    version = uuid.uuid4().hex[:12]
+    forget(user_id)
+    try:
+        caches[cfg["alias"]].set(_version_key(user_id), version, None)
+    except Exception:
+        logger.exception("could not bump the auth cache version of user %s", user_id)
+    invalidation.publish("user", user_id, version)
+
+
+def forget(user_id, version=None):
+    """Drop this worker's local snapshot of the user (bus handler)."""
+    if _local is not None:
+        _local.delete(_local_key(user_id))
+
+
+def _clear_local():
+    if _local is not None:
+        _local.clear()
+
+
+invalidation.register("user", forget, flush=_clear_local)
+
+
+def load_user(user_id, fetch):
+    """The user `user_id` from the snapshot cache; `fetch()` loads it on a miss."""
+    cfg = _config()
+    if not cfg["enabled"] or not is_shared(cfg["alias"]):
+        return fetch()
+    try:
+        version = current_version(user_id, cfg)
+    except Exception:
+        logger.exception("auth cache unavailable")
+        return fetch()
+    local = _local_tier(cfg)
+    local_version, user = local.get(_local_key(user_id), (None, None))
+    if local_version is None or local_version != version:
+        key = _snapshot_key(user_id, version)
+        shared = caches[cfg["alias"]]
+        user = shared.get(key)
+        if user is None:
+            user = fetch()
+            if user is None:
+                return None
+            shared.set(key, user, cfg["ttl"])
+        local.set(_local_key(user_id), (version, user))
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from the snapshot cache."""
+
+    def get_user(self, user_id):
+        return load_user(user_id, lambda: self._fetch(user_id))
+
+    def _fetch(self, user_id):
+        from myapp.models import Profile, User
+
+        user = User._default_manager.filter(pk=user_id).select_related("profile").first()
+        if user is None or not self.user_can_authenticate(user):
+            return None
+        try:
+            user.profile
+        except Profile.DoesNotExist:
+            pass  # cached as "no profile"; the post_save signal creates one and bumps the version
+        return user
@@ -0,0 +1,289 @@
+# myproject/benchmark.py
+"""
+End-to-end benchmarks for the hot endpoints (`manage.py bench_endpoints`).
+
+Each scenario is driven in-process through django.test.Client (full
+middleware stack, templates and DRF rendering) as one viewer against
+whatever data is in the database -- normally a `seed_social` dataset.
+Per request we record wall time, the number of queries and the time spent
+in them (connection.execute_wrapper); a second, shorter pass runs under
+tracemalloc for the peak Python allocation per request, so the latency
+numbers are not skewed by tracing.
+
+Everything runs inside one transaction that is rolled back, so the write
+scenarios (toggle_like) leave the dataset unchanged and runs stay
+comparable; commit/fsync cost is therefore not included. Rate limits are
+switched off for the run.
+
+The report is plain JSON. `compare()` checks it against a stored baseline:
+a metric regresses when it grows past baseline * threshold and by more
+than the metric's noise floor.
+"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlencode
+
+import numpy as np
+
+import django
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+REPORT_VERSION = 1
+
+# metric -> allowed ratio over the baseline (settings.BENCHMARK_THRESHOLDS overrides)
+DEFAULT_THRESHOLDS = {
+    "p50_ms": 1.20,
+    "p95_ms": 1.25,
+    "p99_ms": 1.50,
+    "queries": 1.00,
+    "db_ms": 1.30,
+    "alloc_peak_kb": 1.25,
+}
+# differences below these never count as regressions (timer/allocator noise)
+NOISE_FLOOR = {"p50_ms": 0.5, "p95_ms": 1.0, "p99_ms": 2.0, "queries": 0, "db_ms": 0.5, "alloc_peak_kb": 32}
+
+
+@dataclass
+class Context:
+    viewer: object
+    post_id: int
+    query: str
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    url: object          # callable(Context) -> path
+    headers: dict = None
+
+
+def default_scenarios():
+    api = {"HTTP_ACCEPT": "application/json"}
+    return [
+        Scenario("feed", "get", lambda c: reverse("social:feed")),
+        Scenario("post_detail", "get", lambda c: reverse("social:post-detail", args=[c.post_id])),
+        # alternates like / unlike on the same post
+        Scenario("toggle_like", "post", lambda c: reverse("social:post-like", args=[c.post_id])),
+        Scenario("search", "get", lambda c: reverse("social:search") + "?" + urlencode({"q": c.query})),
+        Scenario("api_posts", "get", lambda c: reverse("post-list"), api),
+        Scenario("api_notifications", "get", lambda c: reverse("notification-list"), api),
+    ]
+
+
+class QueryMeter:
+    """execute_wrapper that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.count += 1
+
+
+def default_context(user=None, post_id=None, query=None):
+    """Pick a busy non-staff viewer, the most commented post and a name to search for."""
+    from myapp.models import Post, Profile, User
+
+    if user is None:
+        profile = (
+            Profile.objects.filter(user__is_staff=False, user__is_superuser=False, user__is_active=True)
+            .select_related("user").order_by("-followers_count", "user_id").first()
+        )
+        if profile is None:
+            raise ValueError("no non-staff user to benchmark as (run `manage.py seed_social` first)")
+        user = profile.user
+    if post_id is None:
+        post_id = Post.objects.order_by("-comments_count", "-id").values_list("id", flat=True).first()
+        if post_id is None:
+            raise ValueError("no posts to benchmark against (run `manage.py seed_social` first)")
+    if not query:
+        full_name = getattr(getattr(user, "profile", None), "full_name", "") or ""
+        query = (full_name.split() or [user.email.split("@")[0]])[0]
+    return Context(viewer=user, post_id=post_id, query=query)
+
+
+def login(client, user):
+    """
+    client.force_login() without the user_logged_in audit receiver: its
+    UserSessionLog row is written by the audit buffer's own thread, outside
+    the rolled-back run, and would stay behind as a real login.
+    """
+    from admindashboard.signals import on_logged_in
+
+    user_logged_in.disconnect(on_logged_in)
+    try:
+        client.force_login(user)
+    finally:
+        user_logged_in.connect(on_logged_in)
+
+
+def _summary(latencies, queries, db_seconds, alloc_peaks, errors):
+    lat = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(float(lat.mean()), 3),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "max_ms": round(float(lat.max()), 3),
+        "queries": round(float(np.median(queries)), 1),
+        "db_ms": round(float(np.median(db_seconds)) * 1000.0, 3),
+        "alloc_peak_kb": round(float(np.median(alloc_peaks)) / 1024.0, 1) if alloc_peaks else None,
+    }
+
+
+def run_scenario(client, scenario, ctx, iterations=50, warmup=5, alloc_runs=5):
+    url = scenario.url(ctx)
+    send = getattr(client, scenario.method)
+    headers = scenario.headers or {}
+    errors = 0
+
+    for _ in range(warmup):
+        send(url, **headers)
+    gc.collect()  # start every scenario from the same heap, not the previous one's garbage
+
+    latencies, queries, db_seconds = [], [], []
+    for _ in range(iterations):
+        meter = QueryMeter()
+        with connection.execute_wrapper(meter):
+            t0 = time.perf_counter()
+            response = send(url, **headers)
+            latencies.append(time.perf_counter() - t0)
+        queries.append(meter.count)
+        db_seconds.append(meter.seconds)
+        errors += response.status_code >= 400
+
+    alloc_peaks = []
+    if alloc_runs:
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_runs):
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                send(url, **headers)
+                alloc_peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop()
+
+    result = _summary(latencies, queries, db_seconds, alloc_peaks, errors)
+    result["url"] = url
+    result["status"] = response.status_code
+    return result
+
+
+def dataset_counts():
+    from myapp.models import Comment, Like, Notification, Post, User
+
+    return {m._meta.model_name: m.objects.count() for m in (User, Post, Like, Comment, Notification)}
+
+
+def run(scenarios=None, iterations=50, warmup=5, alloc_runs=5, ctx=None, label="", log=None):
+    """Run the scenarios and return the JSON-ready report."""
+    scenarios = scenarios or default_scenarios()
+    log = log or (lambda msg: None)
+    results = {}
+    counts = dataset_counts()  # before toggle_like adds (rolled back) rows
+    with override_settings(RATE_LIMITS={}), transaction.atomic():
+        ctx = ctx or default_context()
+        client = Client()
+        login(client, ctx.viewer)
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(client, scenario, ctx, iterations, warmup, alloc_runs)
+            log(f"{scenario.name}: p50 {results[scenario.name]['p50_ms']} ms")
+        transaction.set_rollback(True)
+
+    return {
+        "version": REPORT_VERSION,
+        "label": label,
+        "created": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+        },
+        "dataset": counts,
+        "config": {
+            "iterations": iterations, "warmup": warmup, "alloc_runs": alloc_runs,
+            "viewer_id": ctx.viewer.pk, "post_id": ctx.post_id, "query": ctx.query,
+        },
+        "scenarios": results,
+    }
+
+
+# ----------------------------
+# Baselines
+# ----------------------------
+def thresholds(overrides=None):
+    merged = dict(DEFAULT_THRESHOLDS)
+    merged.update(getattr(settings, "BENCHMARK_THRESHOLDS", {}) or {})
+    merged.update(overrides or {})
+    return merged
+
+
+def compare(report, baseline, limits=None):
+    """
+    Returns (rows, warnings). One row per (scenario, metric) present in both
+    reports: {scenario, metric, baseline, current, ratio, limit, regressed}.
+    A scenario also regresses when it returns more 4xx/5xx responses than in
+    the baseline: failing requests tend to be faster and run fewer queries.
+    """
+    limits = thresholds(limits)
+    warnings = []
+    if baseline.get("dataset") != report.get("dataset"):
+        warnings.append("dataset differs from the baseline's; numbers are not directly comparable")
+    if baseline.get("environment") != report.get("environment"):
+        warnings.append("environment differs from the baseline's")
+
+    rows = []
+    for name, current in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            warnings.append(f"{name}: not in the baseline")
+            continue
+        for metric, limit in limits.items():
+            b, c = base.get(metric), current.get(metric)
+            if b is None or c is None:
+                continue
+            regressed = c > b * limit and c - b > NOISE_FLOOR.get(metric, 0)
+            rows.append(_row(name, metric, b, c, limit, regressed))
+        b, c = base.get("errors", 0), current.get("errors", 0)
+        rows.append(_row(name, "errors", b, c, 1.0, c > b))
+    return rows, warnings
+
+
+def _row(scenario, metric, baseline, current, limit, regressed):
+    ratio = current / baseline if baseline else (1.0 if current == baseline else float("inf"))
+    return {
+        "scenario": scenario, "metric": metric, "baseline": baseline, "current": current,
+        "ratio": round(ratio, 3), "limit": limit, "regressed": regressed,
+    }
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save(report, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
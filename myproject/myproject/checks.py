@@ -0,0 +1,54 @@
+# myproject/checks.py
+"""
+System checks for the caches that rely on every worker seeing the same
+shared cache (see tieredcache.is_shared) or the invalidation bus.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+
+from .tieredcache import is_shared
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    auth = getattr(settings, "AUTH_CACHE", {}) or {}
+    alias = auth.get("alias", "default")
+    if auth.get("enabled", False) and not is_shared(alias):
+        errors.append(Warning(
+            f"AUTH_CACHE uses the per-process cache '{alias}'; the auth cache is disabled.",
+            hint="Point AUTH_CACHE['alias'] at a shared cache (e.g. myproject.metrics.RedisCache).",
+            id="myproject.W001",
+        ))
+    entity = getattr(settings, "ENTITY_CACHE", {}) or {}
+    alias = entity.get("alias", "default")
+    if entity.get("enabled", False) and not is_shared(alias):
+        errors.append(Warning(
+            f"ENTITY_CACHE uses the per-process cache '{alias}'; the entity cache is disabled.",
+            hint="Point ENTITY_CACHE['alias'] at a shared cache (e.g. myproject.metrics.RedisCache).",
+            id="myproject.W003",
+        ))
+    if settings.SESSION_ENGINE == "myproject.sessions" and not is_shared(settings.SESSION_CACHE_ALIAS):
+        errors.append(Warning(
+            f"SESSION_CACHE_ALIAS '{settings.SESSION_CACHE_ALIAS}' is a per-process cache; "
+            "myproject.sessions reads every session from the database.",
+            hint="Use a shared cache for SESSION_CACHE_ALIAS, or SESSION_ENGINE "
+                 "'django.contrib.sessions.backends.db'.",
+            id="myproject.W002",
+        ))
+    return errors
+
+
+@register(Tags.caches)
+def check_invalidation_bus(app_configs, **kwargs):
+    # a shared cache means several workers; the "local" transport reaches none of the others
+    transport = (getattr(settings, "INVALIDATION_BUS", {}) or {}).get("transport", "local")
+    if transport == "local" and any(is_shared(alias) for alias in caches.settings):
+        return [Warning(
+            "INVALIDATION_BUS uses the 'local' transport; other workers' follow graphs and "
+            "session caches only see a change when their copy expires.",
+            hint="Use the 'unix' or 'sqlite' transport on one host, 'redis' across hosts.",
+            id="myproject.W004",
+        )]
+    return []
@@ -0,0 +1,347 @@
+# myproject/invalidation.py
+"""
+Cache-invalidation bus between worker processes.
+
+Model signals only fire in the process that wrote the row, so in-process
+caches (the follow graph, the local tiers of the entity, auth and session
+caches) on the other workers would keep serving the old data until they
+expire. After commit, the writer publishes a compact message
+
+    [origin, seq, model, pk, version]   e.g. ["3f0c..", 17, "post", 42, "9a1b.."]
+
+and every other worker applies it to its local caches through the handlers
+registered for `model`:
+
+    bus.register("post", apply=lambda pk, version: ..., flush=local.clear)
+
+`origin` is a random id per process (regenerated after fork) and `seq`
+counts that process's messages. A receiver that sees a jump in an origin's
+seq has lost messages (full socket buffer, Redis reconnect, pruned rows)
+and runs every registered `flush` instead of guessing what it missed.
+
+Transports (INVALIDATION_BUS["transport"]):
+
+    local   nothing leaves the process (single worker, tests)
+    unix    datagrams to every socket in a directory (one host)
+    sqlite  a message table polled by each worker (one host, testing)
+    redis   Redis pub/sub (several hosts); needs the `redis` package
+
+or a dotted path to a class with publish(payload), listen(deliver, stop)
+and close().
+
+The auth and entity caches check a version in the shared cache on every
+read, so for them the bus only evicts early; that needs a shared cache
+alias (see tieredcache.is_shared). The follow graph and the session local
+tier have no such check: with the "local" transport and more than one
+worker, a change made on one worker reaches the others only when their
+copy expires or reloads (`manage.py check` warns, myproject.W004).
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import request_started
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_ORIGINS = 1000  # sequence state kept for this many publishers
+
+
+def _config():
+    cfg = {"transport": "local", "options": {}}
+    cfg.update(getattr(settings, "INVALIDATION_BUS", {}) or {})
+    return cfg
+
+
+# ----------------------------
+# Transports
+# ----------------------------
+class LocalTransport:
+    """Single process: the publisher has already applied its own change."""
+
+    def __init__(self, **options):
+        pass
+
+    def publish(self, payload):
+        pass
+
+    def listen(self, deliver, stop):
+        stop.wait()
+
+    def close(self):
+        pass
+
+
+class UnixSocketTransport:
+    """
+    One datagram socket per worker in `path`; publish sends to all of them.
+    A full receive buffer drops the datagram, which the receiver notices as
+    a sequence gap.
+    """
+
+    def __init__(self, path="/tmp/myproject-invalidation", **options):
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.address = None
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._sock = None
+
+    def publish(self, payload):
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".sock") or entry.path == self.address:
+                continue
+            try:
+                self._sender.sendto(payload, entry.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(entry.path)  # its worker is gone
+                except OSError:
+                    pass
+            except BlockingIOError:
+                logger.warning("invalidation bus: %s is not reading, message dropped", entry.name)
+
+    def listen(self, deliver, stop):
+        self.address = os.path.join(self.path, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.address)
+        self._sock.settimeout(0.5)
+        atexit.register(self.close)
+        while not stop.is_set():
+            try:
+                payload = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            deliver(payload)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self.address:
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+
+class SQLiteTransport:
+    """
+    Messages are rows of a table in a separate SQLite file that every worker
+    polls. Rows older than `retention` seconds are pruned; a worker that
+    stalls longer than that sees a sequence gap.
+    """
+
+    def __init__(self, path=None, poll=0.2, retention=60.0, **options):
+        self.path = str(path or os.path.join(str(settings.BASE_DIR), "invalidation_bus.sqlite3"))
+        self.poll = poll
+        self.retention = retention
+        self._local = threading.local()
+        self._published = itertools.count(1)
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS bus_message ("
+                         "id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL, created REAL NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def publish(self, payload):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO bus_message (payload, created) VALUES (?, ?)", (payload, time.time()))
+            if next(self._published) % 100 == 0:
+                conn.execute("DELETE FROM bus_message WHERE created < ?", (time.time() - self.retention,))
+
+    def listen(self, deliver, stop):
+        conn = self._connection()
+        last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bus_message").fetchone()[0]
+        while not stop.wait(self.poll):
+            rows = conn.execute("SELECT id, payload FROM bus_message WHERE id > ? ORDER BY id", (last,)).fetchall()
+            for last, payload in rows:
+                deliver(payload)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisTransport:
+    """Redis pub/sub on `channel`. A dropped subscription counts as a gap."""
+
+    def __init__(self, url="redis://localhost:6379/0", channel="myproject:invalidation", **options):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("INVALIDATION_BUS transport 'redis' needs the redis package")
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, payload):
+        self._client.publish(self.channel, payload)
+
+    def listen(self, deliver, stop):
+        while not stop.is_set():
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=0.5)
+                    if message is not None and message["type"] == "message":
+                        deliver(message["data"])
+            except Exception:
+                logger.exception("invalidation bus: lost the Redis subscription")
+                deliver(None)  # anything published meanwhile is gone
+                stop.wait(1.0)
+            finally:
+                pubsub.close()
+
+    def close(self):
+        self._client.close()
+
+
+TRANSPORTS = {
+    "local": LocalTransport,
+    "unix": UnixSocketTransport,
+    "sqlite": SQLiteTransport,
+    "redis": RedisTransport,
+}
+
+
+def _transport_class(name):
+    return TRANSPORTS.get(name) or import_string(name)
+
+
+# ----------------------------
+# Bus
+# ----------------------------
+class InvalidationBus:
+    def __init__(self):
+        self._handlers = {}  # model -> [apply(pk, version)]
+        self._flushers = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self.transport = None
+        self._stop = None
+        self._thread = None
+
+    def register(self, model, apply=None, flush=None):
+        """`apply(pk, version)` for each message about `model`; `flush()` after a gap."""
+        if apply is not None:
+            self._handlers.setdefault(model, []).append(apply)
+        if flush is not None:
+            self._flushers.append(flush)
+
+    # ---- lifecycle (per process) ----
+    def ensure_started(self, **kwargs):
+        """Starts the transport and listener in this process; a no-op once running (cheap pid check)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # fresh identity after a fork: the parent's origin and counter are not ours
+            self.origin = uuid.uuid4().hex[:12]
+            self._seq = itertools.count(1)
+            self._last = {}
+            cfg = _config()
+            self.transport = _transport_class(cfg["transport"])(**cfg["options"])
+            self._stop = threading.Event()
+            if not isinstance(self.transport, LocalTransport):
+                self._thread = threading.Thread(target=self._listen, name="invalidation-bus", daemon=True)
+                self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        with self._lock:
+            if self._pid is None:
+                return
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join(timeout=5.0)
+                self._thread = None
+            self.transport.close()
+            self._pid = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                self.transport.listen(self.deliver, self._stop)
+            except Exception:
+                logger.exception("invalidation bus listener failed; flushing local caches")
+                self.flush("listener error")
+                self._stop.wait(1.0)
+
+    # ---- sending ----
+    def publish(self, model, pk, version=None):
+        """Tell the other workers that `model` row `pk` changed (call after commit)."""
+        try:
+            self.ensure_started()
+            payload = json.dumps([self.origin, next(self._seq), model, pk, version], separators=(",", ":"))
+            self.transport.publish(payload.encode())
+            metrics.invalidation_event("published")
+        except Exception:
+            logger.exception("could not publish the invalidation of %s %s", model, pk)
+
+    # ---- receiving ----
+    def deliver(self, payload):
+        """Apply one raw message; None means the transport may have lost some."""
+        if payload is None:
+            self.flush("transport gap")
+            return
+        try:
+            origin, seq, model, pk, version = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning("invalidation bus: malformed message %r", payload[:200])
+            return
+        if origin == self.origin:
+            return  # applied by the signal itself
+        last = self._last.pop(origin, None)  # re-inserted below: most recent origins last
+        self._last[origin] = max(seq, last or 0)
+        if len(self._last) > MAX_ORIGINS:
+            self._last.pop(next(iter(self._last)))
+        if last is not None and seq <= last:
+            return  # duplicate
+        if last is not None and seq != last + 1:
+            self.flush(f"{seq - last - 1} message(s) from {origin} lost")
+            return  # the flush covers this message too
+        for apply in self._handlers.get(model, ()):
+            try:
+                apply(pk, version)
+            except Exception:
+                logger.exception("invalidation handler for %s failed", model)
+        metrics.invalidation_event("applied")
+
+    def flush(self, reason):
+        logger.warning("invalidation bus: flushing local caches (%s)", reason)
+        metrics.invalidation_event("flush")
+        for flush in self._flushers:
+            try:
+                flush()
+            except Exception:
+                logger.exception("local cache flush failed")
+
+
+bus = InvalidationBus()
+register = bus.register
+publish = bus.publish
+
+# first request of each (forked) worker starts its listener
+request_started.connect(bus.ensure_started, dispatch_uid="invalidation-bus")
@@ -0,0 +1,287 @@
+# myproject/metrics.py
+"""
+Prometheus metrics, exposed on /metrics.
+
+    http_requests_total / http_request_duration_seconds
+                        labelled by resolved URL name ("social:feed",
+                        "post-list", "admindashboard:home", ...), method and
+                        status; unmatched paths are "<unresolved>" so 404
+                        scans cannot blow up the label set
+    db_queries_total / db_query_duration_seconds_total
+                        per URL name, taken from the query recorder of
+                        myproject/querybudget.py (no second execute_wrapper)
+    template_render_seconds
+                        per top-level template (TEMPLATES backend below)
+    cache_requests_total{cache, result}
+                        hits/misses of the instrumented cache backends and
+                        of anything calling `cache_lookup()`
+    cache_invalidations_total{event}
+                        invalidation bus messages published/applied and
+                        local-cache flushes after a gap
+                        (myproject/invalidation.py)
+    app_queue_depth{queue}
+                        in-process write buffers registered with
+                        `register_queue()` (e.g. the audit-log writer)
+    social_notifications_unread
+                        unread notification backlog, counted at scrape time
+                        (cached for UNREAD_TTL seconds)
+
+Multiprocess workers: set PROMETHEUS_MULTIPROC_DIR to an empty directory
+before the workers start (prometheus_client then keeps samples in mmapped
+files there) and call `child_exit()` from gunicorn's child_exit hook; the
+view aggregates every worker's files. Without it each process reports only
+its own samples.
+
+prometheus_client is optional: without it the middleware and backends do
+nothing and /metrics returns 503.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache.backends import locmem
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends import django as django_backend
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+    HAS_PROMETHEUS = True
+except Exception:
+    prometheus_client = None
+    HAS_PROMETHEUS = False
+
+UNREAD_TTL = 30  # seconds between unread-notification counts
+
+# request latencies are mostly sub-second; the tail buckets catch exports and dashboards
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+RENDER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _multiprocess():
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+if HAS_PROMETHEUS:
+    REQUESTS = Counter(
+        "http_requests_total", "HTTP requests by URL name, method and status.",
+        ["view", "method", "status"],
+    )
+    LATENCY = Histogram(
+        "http_request_duration_seconds", "Request latency by URL name, method and status.",
+        ["view", "method", "status"], buckets=LATENCY_BUCKETS,
+    )
+    DB_QUERIES = Counter("db_queries_total", "SQL queries executed, by URL name.", ["view"])
+    DB_TIME = Counter("db_query_duration_seconds_total", "Time spent in SQL queries, by URL name.", ["view"])
+    TEMPLATE_RENDER = Histogram(
+        "template_render_seconds", "Top-level template render time.", ["template"], buckets=RENDER_BUCKETS,
+    )
+    CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and hit/miss.", ["cache", "result"])
+    INVALIDATIONS = Counter("cache_invalidations_total", "Invalidation bus messages and flushes.", ["event"])
+    QUEUE_DEPTH = Gauge(
+        "app_queue_depth", "Items waiting in in-process write buffers.", ["queue"],
+        multiprocess_mode="livesum",
+    )
+
+
+# ----------------------------
+# Helpers for other modules
+# ----------------------------
+def cache_lookup(cache_name, hit, n=1):
+    if HAS_PROMETHEUS and n:
+        CACHE_REQUESTS.labels(cache_name, "hit" if hit else "miss").inc(n)
+
+
+def invalidation_event(event, n=1):
+    if HAS_PROMETHEUS and n:
+        INVALIDATIONS.labels(event).inc(n)
+
+
+_queues = {}
+
+
+def register_queue(name, depth_fn):
+    """`depth_fn()` -> current length of an in-process buffer; sampled after every request."""
+    _queues[name] = depth_fn
+
+
+def _sample_queues():
+    for name, fn in list(_queues.items()):
+        try:
+            QUEUE_DEPTH.labels(name).set(fn())
+        except Exception:
+            pass
+
+
+# ----------------------------
+# Request middleware
+# ----------------------------
+class MetricsMiddleware:
+    """Times every request; put it first in MIDDLEWARE (before QueryBudgetMiddleware)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not HAS_PROMETHEUS:
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<unresolved>"
+        status = str(response.status_code)
+        REQUESTS.labels(view, request.method, status).inc()
+        LATENCY.labels(view, request.method, status).observe(elapsed)
+
+        recorder = getattr(request, "_query_recorder", None)
+        if recorder is not None:
+            DB_QUERIES.labels(view).inc(recorder.count)
+            DB_TIME.labels(view).inc(recorder.seconds)
+        _sample_queues()
+        return response
+
+
+# ----------------------------
+# Template backend
+# ----------------------------
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+        self.origin = template.origin
+        self.name = template.origin.template_name or "<string>"
+
+    def render(self, context=None, request=None):
+        if not HAS_PROMETHEUS:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            TEMPLATE_RENDER.labels(self.name).observe(time.perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock Django backend, timing each top-level render()."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+# ----------------------------
+# Cache backends
+# ----------------------------
+_MISS = object()
+
+
+class CacheMetricsMixin:
+    """Counts get()/get_many() hits and misses; the label is the cache's LOCATION."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        params = args[1] if len(args) > 1 else kwargs.get("params", {})
+        self.metrics_name = params.get("METRICS_NAME") or (args[0] if args else "") or "default"
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISS, version)
+        cache_lookup(self.metrics_name, value is not _MISS)
+        return default if value is _MISS else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        cache_lookup(self.metrics_name, True, len(found))
+        cache_lookup(self.metrics_name, False, len(keys) - len(found))
+        return found
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+try:
+    from django.core.cache.backends.redis import RedisCache as _RedisCache
+
+    class RedisCache(CacheMetricsMixin, _RedisCache):
+        pass
+except Exception:  # redis-py missing
+    pass
+
+
+# ----------------------------
+# Scrape-time collector
+# ----------------------------
+class UnreadNotificationsCollector:
+    """Unread notification backlog; one COUNT at most every UNREAD_TTL seconds per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value, self._at = None, 0.0
+
+    def _count(self):
+        from myapp.models import Notification
+
+        with self._lock:
+            if self._value is None or time.monotonic() - self._at > UNREAD_TTL:
+                self._value = Notification.objects.filter(is_read=False).count()
+                self._at = time.monotonic()
+            return self._value
+
+    def collect(self):
+        gauge = GaugeMetricFamily("social_notifications_unread", "Unread notifications (all users).")
+        gauge.add_metric([], self._count())
+        yield gauge
+
+
+_unread = UnreadNotificationsCollector()
+
+
+def _registry():
+    if _multiprocess():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.CollectorRegistry()
+        registry.register(_DefaultRegistryProxy())
+    registry.register(_unread)
+    return registry
+
+
+class _DefaultRegistryProxy:
+    """Single-process mode: re-export everything in prometheus_client's default REGISTRY."""
+
+    def collect(self):
+        return prometheus_client.REGISTRY.collect()
+
+
+# ----------------------------
+# /metrics
+# ----------------------------
+def _allowed(request):
+    cfg = getattr(settings, "METRICS", {}) or {}
+    token = cfg.get("token")
+    if token and request.headers.get("Authorization") == f"Bearer {token}":
+        return True
+    return request.META.get("REMOTE_ADDR") in cfg.get("allowed_ips", ("127.0.0.1", "::1"))
+
+
+def metrics_view(request):
+    if not HAS_PROMETHEUS:
+        return HttpResponse("prometheus_client is not installed\n", status=503, content_type="text/plain")
+    if not _allowed(request):
+        return HttpResponseForbidden("forbidden\n", content_type="text/plain")
+    _sample_queues()
+    body = prometheus_client.generate_latest(_registry())
+    return HttpResponse(body, content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def child_exit(server, worker):
+    """gunicorn `child_exit` hook: drop the dead worker's live gauges."""
+    if HAS_PROMETHEUS and _multiprocess():
+        multiprocess.mark_process_dead(worker.pid)
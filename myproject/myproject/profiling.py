@@ -0,0 +1,314 @@
+# myproject/profiling.py
+"""
+On-demand request profiling.
+
+ProfilingMiddleware profiles a request when
+
+    a staff user asks for it    ?_profile=1 or an "X-Profile: 1" header
+                                ("cprofile" instead of "1" picks the
+                                deterministic profiler)
+    it is sampled               PROFILING["sample_rate"] of all requests
+                                (0.0 = never)
+
+and stores the result as an admindashboard.RequestProfile together with
+the route, status and timing. The admin dashboard lists them and serves
+each one as collapsed stacks ("frame;frame;frame weight" per line), the
+input format of flamegraph.pl, speedscope and inferno.
+
+Two capture modes:
+
+    sample      a daemon thread reads the request thread's stack from
+                sys._current_frames() every `interval` seconds; weights
+                are sample counts. Cheap enough to leave sampling on.
+    cprofile    cProfile for exact call counts; the call graph is
+                unfolded into stacks with each function's own time split
+                over its callers in proportion to the time they spent in
+                it; weights are microseconds. Much higher overhead.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+MAX_DEPTH = 96
+MIN_PATH_SECONDS = 1e-5  # cProfile unfolding: drop call paths under 10 us
+
+
+def _config():
+    cfg = {
+        "enabled": True,
+        "sample_rate": 0.0,
+        "sample_mode": "sample",
+        "interval": 0.001,
+        "param": "_profile",
+        "header": "X-Profile",
+        "keep": 200,
+    }
+    cfg.update(getattr(settings, "PROFILING", {}) or {})
+    return cfg
+
+
+# ----------------------------
+# Frame labels
+# ----------------------------
+_PREFIXES = None
+
+
+def _short_path(filename):
+    """Path relative to the project or to the sys.path entry it was imported from."""
+    global _PREFIXES
+    if _PREFIXES is None:
+        roots = [str(settings.BASE_DIR)] + [p for p in sys.path if p and os.path.isdir(p)]
+        _PREFIXES = sorted({os.path.join(os.path.abspath(p), "") for p in roots}, key=len, reverse=True)
+    for prefix in _PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _label(name, filename, lineno):
+    # ";" separates frames in the collapsed format (the weight follows the last space)
+    return f"{name} ({_short_path(filename)}:{lineno})".replace(";", ":")
+
+
+# ----------------------------
+# Statistical sampler
+# ----------------------------
+_switch_lock = threading.Lock()
+_active_samplers = 0
+_saved_switch_interval = None
+
+
+def _shorten_switch_interval(interval):
+    """
+    The sampler thread only runs when the request thread drops the GIL,
+    i.e. every sys.getswitchinterval() (5 ms) in pure-Python code; shorten
+    it to the sampling interval while any sampler is running.
+    """
+    global _active_samplers, _saved_switch_interval
+    with _switch_lock:
+        if _active_samplers == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+        _active_samplers += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+
+
+def _restore_switch_interval():
+    global _active_samplers
+    with _switch_lock:
+        _active_samplers -= 1
+        if _active_samplers == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread, below the frame that started it."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _frame_label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _label(code.co_name, code.co_filename, code.co_firstlineno)
+        return label
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.root = sys._getframe(1)
+        _shorten_switch_interval(self.interval)
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        _restore_switch_interval()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if frame is None or not stack:
+                continue  # outside the profiled call (not started yet / already returned)
+            self.stacks[";".join(self._frame_label(c) for c in reversed(stack[-MAX_DEPTH:]))] += 1
+            self.samples += 1
+
+
+# ----------------------------
+# cProfile -> collapsed stacks
+# ----------------------------
+_ADDRESS = re.compile(r" at 0x[0-9a-f]+")
+
+
+def _func_label(func):
+    filename, lineno, name = func
+    if filename == "~":  # built-in, e.g. ('~', 0, "<method 'execute' of 'sqlite3.Cursor' objects>")
+        return _ADDRESS.sub("", name).replace(";", ":")
+    return _label(name, filename, lineno)
+
+
+def collapse_cprofile(stats):
+    """
+    Unfold pstats' {func: (cc, nc, tt, ct, callers)} into {stack: microseconds}.
+    cProfile only knows caller -> callee edges, so a function's own time is
+    shared among its call paths by the cumulative time of each edge.
+    """
+    callees = defaultdict(list)
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+    roots = [f for f, v in stats.items() if not v[4]]
+    out = Counter()
+
+    def walk(func, path, on_path, share):
+        tt, ct = stats[func][2], stats[func][3]
+        path = path + [_func_label(func)]
+        if tt * share > 0:
+            out[";".join(path)] += tt * share
+        if len(path) >= MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = stats[callee][3]
+            if callee in on_path or not callee_ct:
+                continue  # recursion is folded into the outermost call
+            callee_share = share * min(edge_ct / callee_ct, 1.0)
+            if callee_ct * callee_share < MIN_PATH_SECONDS:
+                continue
+            walk(callee, path, on_path | {callee}, callee_share)
+
+    for root in roots:
+        walk(root, [], frozenset([root]), 1.0)
+    return Counter({stack: round(s * 1e6) for stack, s in out.items() if round(s * 1e6) > 0})
+
+
+# ----------------------------
+# Running a callable under a profiler
+# ----------------------------
+class Profile:
+    def __init__(self, mode):
+        self.mode = mode
+        self.stacks = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+
+
+def profile_call(fn, mode="sample", interval=0.001):
+    """Run `fn()` under the profiler; returns (fn's result, Profile)."""
+    prof = Profile(mode)
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn()
+        finally:
+            profiler.disable()
+            prof.seconds = time.perf_counter() - started
+        profiler.create_stats()
+        prof.stacks = collapse_cprofile(profiler.stats)
+        prof.samples = sum(v[1] for v in profiler.stats.values())  # function calls
+        return result, prof
+
+    sampler = StackSampler(interval)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        result = fn()
+    finally:
+        sampler.stop()
+        prof.seconds = time.perf_counter() - started
+    prof.stacks, prof.samples = sampler.stacks, sampler.samples
+    return result, prof
+
+
+def collapsed_text(stacks):
+    """Collapsed-stack lines, heaviest first."""
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+def _is_staff(request):
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and (user.is_staff or user.is_superuser))
+
+
+def requested_mode(request, cfg=None):
+    """(mode, trigger) if this request should be profiled, else (None, None)."""
+    cfg = cfg or _config()
+    flag = request.GET.get(cfg["param"]) or request.headers.get(cfg["header"])
+    if flag and flag not in ("0", "false") and _is_staff(request):
+        return ("cprofile" if flag == "cprofile" else "sample"), "staff"
+    if cfg["sample_rate"] and random.random() < cfg["sample_rate"]:
+        return cfg["sample_mode"], "sampled"
+    return None, None
+
+
+class ProfilingMiddleware:
+    """Profiles staff-requested and sampled requests; goes right after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cfg = _config()
+        mode, trigger = requested_mode(request, cfg) if cfg["enabled"] else (None, None)
+        if mode is None:
+            return self.get_response(request)
+        try:
+            response, prof = profile_call(lambda: self.get_response(request), mode, cfg["interval"])
+        except ValueError:  # another profiler (debugger, coverage, an outer cProfile) is active
+            logger.warning("profiler busy; %s %s served unprofiled", request.method, request.path)
+            return self.get_response(request)
+
+        saved = self._store(request, response, prof, trigger, cfg)
+        if saved is not None and trigger == "staff":
+            response["X-Profile-Id"] = str(saved.pk)
+        return response
+
+    def _store(self, request, response, prof, trigger, cfg):
+        from admindashboard.models import RequestProfile
+
+        match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        recorder = getattr(request, "_query_recorder", None)  # keep these writes out of the view's budget
+        try:
+            with recorder.pause() if recorder is not None else nullcontext():
+                saved = RequestProfile.objects.create(
+                    view_name=(match.view_name if match else "<unresolved>")[:200],
+                    method=request.method,
+                    path=request.get_full_path()[:500],
+                    status=response.status_code,
+                    duration_ms=round(prof.seconds * 1000.0, 3),
+                    mode=prof.mode,
+                    trigger=trigger,
+                    samples=prof.samples,
+                    user=user if user is not None and user.is_authenticated else None,
+                    stacks=collapsed_text(prof.stacks),
+                )
+                RequestProfile.prune(cfg["keep"])
+            return saved
+        except Exception:
+            logger.exception("could not store the profile of %s %s", request.method, request.path)
+            return None
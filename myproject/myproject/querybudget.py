@@ -0,0 +1,319 @@
+# myproject/querybudget.py
+"""
+Per-request SQL query accounting and budgets.
+
+QueryBudgetMiddleware wraps every database connection for the duration of
+a request (connection.execute_wrapper) and records
+
+    count       queries executed
+    db time     wall time spent inside them
+    fingerprints
+                the SQL with literals and IN-lists collapsed; one
+                fingerprint running many times is the N+1 signature
+    duplicates  identical SQL + params executed more than once
+
+In DEBUG the numbers go out as X-Query-* response headers; every worker
+also aggregates them per view for /admin-dash/api/query-stats/.
+
+Views declare their maximum with `@query_budget(n)` (function views) or a
+`query_budget` class attribute / class decorator (DRF views; a dict maps
+viewset actions to budgets). The budget covers the whole request,
+including the session and user lookups. Over-budget requests raise
+QueryBudgetExceeded at the offending query when QUERY_BUDGET["enforce"] is
+"raise" (the default in DEBUG) and are logged and counted otherwise.
+
+Tests use `assert_max_queries(n)` or `assert_query_budget(client, url)`.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+MAX_FINGERPRINTS_PER_VIEW = 20
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _config():
+    cfg = {"enabled": True, "headers": None, "enforce": None}
+    cfg.update(getattr(settings, "QUERY_BUDGET", {}) or {})
+    if cfg["headers"] is None:
+        cfg["headers"] = settings.DEBUG
+    if cfg["enforce"] is None:
+        cfg["enforce"] = "raise" if settings.DEBUG else "log"
+    return cfg
+
+
+# ----------------------------
+# Fingerprints
+# ----------------------------
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """SQL with literals replaced and IN (%s, %s, ...) lists collapsed."""
+    sql = _IN_LIST.sub("(%s...)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint_id(fp):
+    return hashlib.blake2b(fp.encode(), digest_size=6).hexdigest()
+
+
+# ----------------------------
+# Recording
+# ----------------------------
+class QueryRecorder:
+    """execute_wrapper collecting one request's queries (optionally enforcing a budget)."""
+
+    def __init__(self, budget=None, enforce="off"):
+        self.budget = budget
+        self.enforce = enforce
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}            # fingerprint -> first SQL seen
+        self.exact = Counter()       # (sql, params) -> executions
+        self.paused = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.paused:
+            return execute(sql, params, many, context)
+        self.count += 1
+        # raise once, at the first query over budget; error handling may still query
+        if self.budget is not None and self.count == self.budget + 1 and self.enforce == "raise":
+            raise QueryBudgetExceeded(
+                f"query {self.count} exceeds the budget of {self.budget}: {sql}\n{self.report()}"
+            )
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            fp = fingerprint(sql)
+            self.fingerprints[fp] += 1
+            self.samples.setdefault(fp, sql)
+            try:
+                self.exact[(sql, repr(params))] += 1
+            except Exception:
+                pass
+
+    @contextmanager
+    def pause(self):
+        """Leave the block's queries out (instrumentation writing its own rows)."""
+        self.paused, was = True, self.paused
+        try:
+            yield
+        finally:
+            self.paused = was
+
+    @property
+    def duplicates(self):
+        """Executions that repeated an identical earlier query."""
+        return sum(n - 1 for n in self.exact.values() if n > 1)
+
+    def repeated(self, min_count=2):
+        """[(fingerprint, count)] for fingerprints run at least `min_count` times, most first."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= min_count]
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+    def report(self):
+        lines = [f"{self.count} queries in {self.seconds * 1000:.1f} ms"
+                 + (f" (budget {self.budget})" if self.budget is not None else "")]
+        for fp, n in self.repeated():
+            lines.append(f"  x{n}  {self.samples[fp][:300]}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Leave the block's queries out of whatever request is being recorded on
+    this thread: housekeeping a request merely triggers (the sketch and
+    activity buffer flushes) must not eat into that view's budget.
+    """
+    recorders = {}
+    for alias in connections:
+        for wrapper in connections[alias].execute_wrappers:
+            if isinstance(wrapper, QueryRecorder):
+                recorders[id(wrapper)] = wrapper
+    with ExitStack() as stack:
+        for recorder in recorders.values():
+            stack.enter_context(recorder.pause())
+        yield
+
+
+@contextmanager
+def record_queries(budget=None, enforce="off", using=None):
+    """Record queries on `using` (default: every configured database)."""
+    recorder = QueryRecorder(budget, enforce)
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+# ----------------------------
+# Budgets
+# ----------------------------
+def query_budget(n):
+    """Declare the maximum number of queries a request to this view may run."""
+    def decorate(view):
+        view.query_budget = n
+        return view
+    return decorate
+
+
+def budget_for(view_func, method="GET"):
+    """The budget declared on a resolved view (function, Django CBV or DRF view/viewset)."""
+    budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        budget = getattr(cls, "query_budget", None)
+    if isinstance(budget, dict):
+        action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+        budget = budget.get(action)
+    return budget
+
+
+class QueryStats:
+    """Per-worker aggregate of recorded requests, keyed by view name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view, recorder):
+        with self._lock:
+            v = self._views.get(view)
+            if v is None:
+                v = self._views[view] = {
+                    "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0,
+                    "over_budget": 0, "with_duplicates": 0, "budget": None, "repeated": Counter(), "samples": {},
+                }
+            v["requests"] += 1
+            v["queries"] += recorder.count
+            v["max_queries"] = max(v["max_queries"], recorder.count)
+            v["db_ms"] += recorder.seconds * 1000.0
+            v["budget"] = recorder.budget
+            v["over_budget"] += recorder.over_budget
+            v["with_duplicates"] += recorder.duplicates > 0
+            for fp, n in recorder.repeated():
+                key = fingerprint_id(fp)
+                v["repeated"][key] += n
+                v["samples"].setdefault(key, fp[:500])
+            if len(v["repeated"]) > MAX_FINGERPRINTS_PER_VIEW * 2:
+                keep = dict(v["repeated"].most_common(MAX_FINGERPRINTS_PER_VIEW))
+                v["repeated"] = Counter(keep)
+                v["samples"] = {k: s for k, s in v["samples"].items() if k in keep}
+
+    def snapshot(self):
+        with self._lock:
+            views = []
+            for name, v in self._views.items():
+                views.append({
+                    "view": name,
+                    "requests": v["requests"],
+                    "avg_queries": round(v["queries"] / v["requests"], 2),
+                    "max_queries": v["max_queries"],
+                    "avg_db_ms": round(v["db_ms"] / v["requests"], 3),
+                    "budget": v["budget"],
+                    "over_budget": v["over_budget"],
+                    "with_duplicates": v["with_duplicates"],
+                    "repeated": [
+                        {"id": k, "executions": n, "sql": v["samples"][k]}
+                        for k, n in v["repeated"].most_common(MAX_FINGERPRINTS_PER_VIEW)
+                    ],
+                })
+        views.sort(key=lambda r: r["avg_queries"], reverse=True)
+        return views
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+
+stats = QueryStats()
+
+
+class QueryBudgetMiddleware:
+    """Records every request's queries; see the module docstring. Put it first in MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cfg = _config()
+        if not cfg["enabled"]:
+            return self.get_response(request)
+
+        with record_queries(enforce=cfg["enforce"]) as recorder:
+            request._query_recorder = recorder
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<unresolved>"
+        stats.add(view, recorder)
+        if recorder.over_budget and cfg["enforce"] != "off":
+            logger.warning("%s %s over its query budget: %s", request.method, request.path, recorder.report())
+
+        if cfg["headers"]:
+            response["X-Query-Count"] = str(recorder.count)
+            response["X-Query-Time-Ms"] = f"{recorder.seconds * 1000:.2f}"
+            response["X-Query-Duplicates"] = str(recorder.duplicates)
+            if recorder.budget is not None:
+                response["X-Query-Budget"] = str(recorder.budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, "_query_recorder", None)
+        if recorder is not None:
+            recorder.budget = budget_for(view_func, request.method)
+
+
+# ----------------------------
+# Test helpers
+# ----------------------------
+@contextmanager
+def assert_max_queries(n, using=None):
+    """
+    Fail if the block runs more than `n` queries; the message lists the
+    repeated fingerprints.
+
+        with assert_max_queries(5):
+            client.get("/api/notifications/")
+    """
+    with record_queries(using=using) as recorder:
+        yield recorder
+    if recorder.count > n:
+        raise QueryBudgetExceeded(f"expected at most {n} queries, got {recorder.report()}")
+
+
+def assert_query_budget(client, path, method="get", **kwargs):
+    """Request `path` with the test client and check it against the view's declared budget."""
+    budget = budget_for(resolve(path.split("?", 1)[0]).func, method)
+    if budget is None:
+        raise AssertionError(f"{path} has no query budget")
+    with assert_max_queries(budget):
+        response = getattr(client, method)(path, **kwargs)
+    return response
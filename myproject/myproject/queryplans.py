@@ -0,0 +1,405 @@
+# myproject/queryplans.py
+"""
+Query-plan checks for the hot endpoints (`manage.py check_query_plans`).
+
+Every benchmark scenario (myproject/benchmark.py) plus a few extra hot
+reads is requested once in-process; each distinct SELECT they run is
+EXPLAINed (slowqueries.plan_rows) and the plan is scanned for
+
+    scan        full table scan ("SCAN t" without an index)
+    auto_index  SQLite built a throw-away automatic index: a join or
+                correlated subquery has no usable index
+    partial     an index is used, but some equality predicates on that
+                table are filtered row by row after the index lookup
+    temp_btree  ORDER BY / GROUP BY / DISTINCT sorted in a temp B-tree
+    index_scan  a whole index is walked (fine with a LIMIT; info only)
+
+On a table with fewer than `min_rows` rows scans and partial matches are
+info only. For each finding the SQL is mined for that table's equality,
+range and ORDER BY columns and a composite index is suggested (a partial
+index when a predicate compares a boolean with a constant); a
+leading-wildcard LIKE (icontains) is reported as unindexable instead.
+
+The JSON report doubles as a baseline: in check mode a query regresses
+when it has an error finding (or, if the baseline knows the query, any
+error/warning finding) that the baseline's plan did not have. Queries
+are keyed by scenario and SQL fingerprint, so a changed query is a new
+query, judged on errors alone.
+
+Plans depend on the data and on ANALYZE statistics; run against a
+`seed_social` dataset.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from . import benchmark
+from .querybudget import fingerprint, fingerprint_id
+from .slowqueries import plan_rows
+
+REPORT_VERSION = 1
+SEVERITY = {"scan": "error", "auto_index": "error", "partial": "warning", "temp_btree": "warning",
+            "index_scan": "info", "unindexable": "info"}
+
+
+def plan_scenarios():
+    """The benchmark scenarios plus hot reads they do not cover."""
+    api = {"HTTP_ACCEPT": "application/json"}
+    return benchmark.default_scenarios() + [
+        benchmark.Scenario("notifications", "get", lambda c: reverse("social:notifications")),
+        benchmark.Scenario("api_unread_count", "get", lambda c: reverse("api-unread-count"), api),
+        benchmark.Scenario("profile", "get", lambda c: reverse("social:profile-detail", args=[c.viewer.pk])),
+    ]
+
+
+# ----------------------------
+# SQL mining
+# ----------------------------
+_REF = r'(?:"(?P<table>\w+)"|(?P<alias>[A-Z]\d+))\."(?P<column>\w+)"'
+_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?([A-Z]\d+)\b')
+_PREDICATE = re.compile(_REF + r"\s*(?P<op>=|IN\b|>=|<=|>|<|LIKE\b|IS\b)\s*(?P<rhs>\S+)")
+# boolean columns: Django writes is_read=False as NOT "t"."is_read", is_read=True as a bare reference
+_NEGATED = re.compile(r"\bNOT\s+" + _REF + r"(?=\s*\)|\s+AND\b|\s+OR\b|\s*$)")
+_BARE = re.compile(r"(?:\bWHERE|\bAND|\()\s*" + _REF + r"(?=\s*\)|\s+AND\b|\s+OR\b|\s*$)")
+_ORDER_TERM = re.compile(_REF + r"\s*(?P<dir>ASC|DESC)?")
+JOIN = "<join>"          # t1.a = t2.b in an ON clause
+CORRELATED = "<outer>"   # U0.a = (outer.b) in a correlated subquery
+
+
+def aliases(sql):
+    """
+    [(position, name, table)] of every table reference; unaliased tables
+    are their own name. Django reuses U0 in each subquery, so one name can
+    stand for several tables.
+    """
+    refs = [(m.start(), m.group(2), m.group(1)) for m in _ALIAS.finditer(sql)]
+    refs += [(m.start(), m.group(1), m.group(1)) for m in re.finditer(r'\b(?:FROM|JOIN)\s+"(\w+)"', sql)]
+    return sorted(refs)
+
+
+def _ref_table(m, alias_map):
+    """Table of a column reference: the latest binding of its alias before it."""
+    if m.group("table"):
+        return m.group("table")
+    table = None
+    for pos, name, t in alias_map:
+        if pos > m.start():
+            break
+        if name == m.group("alias"):
+            table = t
+    return table
+
+
+def predicates(sql, params, alias_map):
+    """
+    [(table, column, op, value)] from WHERE/ON. `value` is the bound param,
+    a literal, JOIN or CORRELATED; "IS NOT NULL" is left out.
+    """
+    out = []
+    params = list(params or ())
+    for m in _PREDICATE.finditer(sql):
+        op, rhs = m.group("op"), m.group("rhs")
+        if rhs.lstrip("(").startswith("%s"):
+            index = sql.count("%s", 0, m.start("rhs"))
+            value = params[index] if index < len(params) else None
+        elif rhs.startswith("(") and ('"' in rhs or re.match(r"\([A-Z]\d+\.", rhs)):
+            value = CORRELATED
+        elif rhs.startswith('"') or re.match(r"[A-Z]\d+\.", rhs):
+            value = JOIN
+        elif op == "IS" and rhs == "NOT":
+            continue
+        else:
+            value = rhs.rstrip(")")
+        out.append((_ref_table(m, alias_map), m.group("column"), op, value))
+    for pattern, value in ((_NEGATED, False), (_BARE, True)):
+        out += [(_ref_table(m, alias_map), m.group("column"), "=", value) for m in pattern.finditer(sql)]
+    return out
+
+
+def order_columns(sql, alias_map):
+    """[(table, column, descending)] of the statement's last ORDER BY."""
+    at = sql.rfind("ORDER BY")
+    if at < 0:
+        return []
+    clause = sql[at + len("ORDER BY"):].split("LIMIT")[0]
+    return [(_ref_table(m, alias_map), m.group("column"), m.group("dir") == "DESC")
+            for m in _ORDER_TERM.finditer(clause)]
+
+
+# ----------------------------
+# Plans
+# ----------------------------
+_ACCESS = re.compile(r"^(?P<how>SCAN|SEARCH)\s+(?:TABLE\s+)?(?P<name>\w+)(?:\s+AS\s+\w+)?(?P<rest>.*)$")
+_CONSTRAINTS = re.compile(r"\(([^()]*)\)\s*$")
+
+
+def _model_for(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def _plan_table(name, rest, alias_map, seen):
+    """
+    Table behind a plan row's name. An alias bound to several tables is
+    resolved by the owner of the index in the row, else by order of use.
+    """
+    tables = [t for _pos, n, t in alias_map if n == name]
+    if len(set(tables)) <= 1:
+        return tables[0] if tables else name
+    index = re.search(r"INDEX (\w+)", rest)
+    if index:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tbl_name FROM sqlite_master WHERE type = 'index' AND name = %s", [index.group(1)])
+            row = cursor.fetchone()
+        if row and row[0] in tables:
+            return row[0]
+    n = seen[name] = seen.get(name, -1) + 1
+    return tables[min(n, len(tables) - 1)]
+
+
+def _index_columns(table, index_name):
+    with connection.cursor() as cursor:
+        info = connection.introspection.get_constraints(cursor, table).get(index_name) or {}
+    return set(info.get("columns") or ())
+
+
+def _row_count(table, cache):
+    if table not in cache:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            cache[table] = cursor.fetchone()[0]
+    return cache[table]
+
+
+def findings(plan, sql, params, min_rows=1000, counts=None):
+    """Problem spots of one SQLite plan ([(depth, detail)]) with index suggestions."""
+    counts = {} if counts is None else counts
+    alias_map = aliases(sql)
+    preds = predicates(sql, params, alias_map)
+    out = []
+    level_table = {}  # depth -> first table accessed at that depth (what a temp B-tree sorts)
+    seen = {}
+
+    for depth, detail in plan:
+        for d in [d for d in level_table if d > depth]:
+            del level_table[d]  # left that subquery
+        m = _ACCESS.match(detail)
+        if m:
+            rest = m.group("rest")
+            table = _plan_table(m.group("name"), rest, alias_map, seen)
+            level_table.setdefault(depth, table)
+            big = _model_for(table) is not None and _row_count(table, counts) >= min_rows
+            # join conditions are only usable on the inner table, so leave them out here
+            eq_cols = {c for t, c, op, v in preds if t == table and op in ("=", "IN", "IS") and v != JOIN}
+            if "AUTOMATIC" in rest:
+                out.append(_finding("auto_index", table, detail, sql, preds, alias_map))
+            elif m.group("how") == "SCAN" and "INDEX" not in rest:
+                if any(t == table and op == "LIKE" and _leading_wildcard(v) for t, _c, op, v in preds):
+                    out.append(_finding("unindexable", table, detail, sql, preds, alias_map))
+                out.append(_finding("scan", table, detail, sql, preds, alias_map, big))
+            elif m.group("how") == "SCAN":
+                out.append(_finding("index_scan", table, detail, sql, preds, alias_map))
+            elif eq_cols and "PRIMARY KEY" not in rest:
+                used = _CONSTRAINTS.search(rest)
+                used_cols = {re.split(r"[=<>]", c)[0].strip() for c in (used.group(1).split(" AND ") if used else [])}
+                residual = eq_cols - used_cols
+                covering = re.search(r"COVERING INDEX (\w+)", rest)
+                if covering and residual <= _index_columns(table, covering.group(1)):
+                    residual = set()  # filtered inside the index, no table lookups
+                if residual:
+                    out.append(_finding("partial", table, detail, sql, preds, alias_map, big))
+        elif detail.startswith("USE TEMP B-TREE"):
+            table = level_table.get(depth)
+            big = table is not None and _model_for(table) is not None and _row_count(table, counts) >= min_rows
+            out.append(_finding("temp_btree", table, detail, sql, preds, alias_map, big))
+    return out
+
+
+def _leading_wildcard(value):
+    return isinstance(value, str) and value.startswith("%")
+
+
+def _finding(kind, table, detail, sql, preds, alias_map, big=True):
+    severity = SEVERITY[kind] if big else "info"
+    f = {"kind": kind, "severity": severity, "table": table, "detail": detail}
+    if kind == "unindexable":
+        f["suggestion"] = "LIKE with a leading wildcard cannot use a B-tree index; use full-text search (FTS5)"
+    elif kind == "auto_index":
+        # SQLite names the columns it wanted: "... AUTOMATIC COVERING INDEX (post_id=? AND user_id=?)"
+        used = _CONSTRAINTS.search(detail)
+        cols = [re.split(r"[=<>]", c)[0].strip() for c in used.group(1).split(" AND ")] if used else []
+        f["suggestion"] = suggest_index(table, [(table, c, "=", CORRELATED) for c in cols], [])
+    elif kind != "index_scan":
+        f["suggestion"] = suggest_index(table, [p for p in preds if p[3] != JOIN], order_columns(sql, alias_map))
+    return f
+
+
+def suggest_index(table, preds, order):
+    """
+    A models.Index(...) line for `table`: equality columns, then one range
+    column, then the ORDER BY columns; a boolean compared with a constant
+    becomes the condition of a partial index.
+    """
+    model = _model_for(table)
+    if model is None:
+        return None
+    by_column = {f.column: f for f in model._meta.concrete_fields}
+    eq, ranged, condition = [], [], {}
+    for t, column, op, value in preds:
+        f = by_column.get(column)
+        if t != table or f is None:
+            continue
+        if op == "=" and isinstance(value, bool):
+            condition[f.name] = value
+        elif op in ("=", "IN", "IS") and f.name not in eq:
+            eq.append(f.name)
+        elif op in (">", "<", ">=", "<=") and not ranged:
+            ranged.append(f.name)
+    fields = eq + [n for n in ranged if n not in eq]
+    for t, column, desc in order:
+        f = by_column.get(column)
+        if t == table and f is not None and f.name not in fields and f.name not in condition:
+            fields.append(("-" if desc else "") + f.name)
+    if not fields:
+        return None
+
+    existing, in_db = _covering_index(model, fields, condition)
+    if existing and not in_db:
+        return f"{model.__name__} declares {existing} but the database lacks it: unapplied migration?"
+    if existing:
+        return f"index {existing} already matches; refresh statistics (ANALYZE) or check the query"
+    args = [f"fields={json.dumps(fields)}"]
+    if condition:
+        q = ", ".join(f"{k}={v!r}" for k, v in condition.items())
+        args.append(f"condition=models.Q({q})")
+        name = "_".join([model._meta.model_name[:8]] + [n.lstrip("-")[:6] for n in fields] + ["part"])
+        args.append(f'name="{name[:30]}"')
+    return f"{model.__name__}: models.Index({', '.join(args)})"
+
+
+def _covering_index(model, fields, condition):
+    """Name of an index/unique constraint whose leading fields are `fields`, and whether the database has it."""
+    wanted = [f.lstrip("-") for f in fields]
+    found = None
+    for index in model._meta.indexes:
+        have = [f.lstrip("-") for f in index.fields]
+        if have[:len(wanted)] == wanted and (bool(index.condition) == bool(condition)):
+            found = index.name
+            break
+    else:
+        for constraint in model._meta.constraints:
+            have = list(getattr(constraint, "fields", ()) or ())
+            if have and sorted(have[:len(wanted)]) == sorted(wanted) and not condition:
+                found = constraint.name
+                break
+    if found is None:
+        return None, False
+    with connection.cursor() as cursor:
+        in_db = found in connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return found, in_db
+
+
+# ----------------------------
+# Running
+# ----------------------------
+class _Capture:
+    """execute_wrapper keeping each distinct SELECT (by fingerprint) with its first params."""
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() in ("SELECT", "WITH"):
+            fp = fingerprint(sql)
+            self.statements.setdefault(fingerprint_id(fp), (sql, params, fp))
+        return execute(sql, params, many, context)
+
+
+@dataclass
+class QueryPlan:
+    scenario: str
+    id: str
+    sql: str
+    plan: list
+    findings: list = field(default_factory=list)
+
+    @property
+    def key(self):
+        return f"{self.scenario}:{self.id}"
+
+
+def analyze(scenarios=None, ctx=None, min_rows=1000, log=None):
+    """Request each scenario once and EXPLAIN what it ran; returns [QueryPlan]."""
+    if connection.vendor != "sqlite":
+        raise ValueError("plan analysis understands SQLite's EXPLAIN QUERY PLAN only")
+    scenarios = scenarios or plan_scenarios()
+    log = log or (lambda msg: None)
+    counts, results = {}, []
+    # entity cache off: EXPLAIN the hydration queries every cold request runs
+    with override_settings(RATE_LIMITS={}, ENTITY_CACHE={"enabled": False}), transaction.atomic():
+        ctx = ctx or benchmark.default_context()
+        client = Client()
+        benchmark.login(client, ctx.viewer)
+        for scenario in scenarios:
+            capture = _Capture()
+            with connection.execute_wrapper(capture):
+                getattr(client, scenario.method)(scenario.url(ctx), **(scenario.headers or {}))
+            for fp_id, (sql, params, _fp) in capture.statements.items():
+                plan = plan_rows(connection, sql, params)
+                results.append(QueryPlan(
+                    scenario.name, fp_id, sql, plan, findings(plan, sql, params, min_rows, counts),
+                ))
+            log(f"{scenario.name}: {len(capture.statements)} distinct queries")
+        transaction.set_rollback(True)
+    return results
+
+
+def report(plans):
+    return {
+        "version": REPORT_VERSION,
+        "queries": {
+            p.key: {
+                "scenario": p.scenario, "sql": p.sql,
+                "plan": ["  " * d + detail for d, detail in p.plan],
+                "findings": p.findings,
+            }
+            for p in plans
+        },
+    }
+
+
+def _signature(f):
+    return (f["kind"], f["table"])
+
+
+def regressions(current, baseline):
+    """[(key, finding)] in `current` that the baseline did not have (see the module docstring)."""
+    known = baseline.get("queries", {}) if baseline else {}
+    out = []
+    for key, q in current["queries"].items():
+        base = known.get(key)
+        had = {_signature(f) for f in base["findings"]} if base else set()
+        levels = ("error", "warning") if base else ("error",)
+        for f in q["findings"]:
+            if f["severity"] in levels and _signature(f) not in had:
+                out.append((key, f))
+    return out
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save(data, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True, default=str)
+        fh.write("\n")
@@ -0,0 +1,181 @@
+# myproject/ratelimit.py
+"""
+Per-user / per-IP rate limiting.
+
+Limits are configured per endpoint class in settings.RATE_LIMITS:
+
+    RATE_LIMITS = {
+        "search": {"user": "20/m", "ip": "60/m"},
+        ...
+    }
+
+Every worker keeps token buckets in a plain dict (no locks: each bucket is an
+immutable tuple swapped in with a single assignment, so a race can only
+over-admit by a request or two). When RATE_LIMIT_SHARED_CACHE names a cache
+alias, a sliding-window counter in that cache is checked as well, so limits
+hold across workers and nodes.
+
+Use `@ratelimit("search")` on function views and `api.throttling` for DRF.
+The IP bucket is checked first and needs no database access, so abusive
+clients are shed before the session/user lookup and before the view runs.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60). Returns (None, None) for an empty rate."""
+    if not rate:
+        return None, None
+    num, _, period = str(rate).partition("/")
+    return int(num), PERIODS[period.strip()[0].lower()]
+
+
+def client_ip(request):
+    """
+    REMOTE_ADDR, unless RATE_LIMIT_TRUSTED_PROXIES says how many reverse
+    proxies sit in front of the app: then the address that many hops from
+    the right of X-Forwarded-For + REMOTE_ADDR. Entries further left are
+    whatever the client sent and are never trusted.
+    """
+    remote = (request.META.get("REMOTE_ADDR") or "").strip()
+    proxies = getattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 0) or 0
+    if proxies > 0:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR") or ""
+        chain = [a.strip() for a in forwarded.split(",") if a.strip()] + [remote]
+        # fewer hops than proxies: the request bypassed a proxy; keep the leftmost we have
+        return chain[max(len(chain) - 1 - proxies, 0)] or "unknown"
+    return remote or "unknown"
+
+
+# ----------------------------
+# Local (in-process) token buckets
+# ----------------------------
+class LocalTokenBuckets:
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, last_refill_monotonic)
+
+    def consume(self, key, limit, period):
+        """Take one token. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        rate = limit / period
+        tokens, stamp = self._buckets.get(key, (float(limit), now))
+        tokens = min(float(limit), tokens + (now - stamp) * rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now)
+            return False, (1.0 - tokens) / rate
+        self._buckets[key] = (tokens - 1.0, now)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return True, 0.0
+
+    def _prune(self, now):
+        # Drop buckets idle for over an hour (they would be full again anyway),
+        # then the oldest half if that was not enough.
+        items = list(self._buckets.items())
+        keep = {k: v for k, v in items if now - v[1] < 3600}
+        if len(keep) > self.max_keys:
+            keep = dict(sorted(keep.items(), key=lambda kv: kv[1][1])[len(keep) // 2:])
+        self._buckets = keep
+
+    def clear(self):
+        self._buckets = {}
+
+
+# ----------------------------
+# Shared sliding-window counters (Django cache)
+# ----------------------------
+class CacheSlidingWindow:
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, limit, period):
+        cache = caches[self.alias]
+        now = time.time()
+        window = int(now // period)
+        cur_key = f"rl:{key}:{window}"
+        cache.add(cur_key, 0, timeout=period * 2)
+        try:
+            current = cache.incr(cur_key)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(cur_key, 1, timeout=period * 2)
+            current = 1
+        previous = cache.get(f"rl:{key}:{window - 1}", 0)
+        elapsed = (now % period) / period
+        estimate = previous * (1.0 - elapsed) + current
+        if estimate > limit:
+            return False, period * (1.0 - elapsed)
+        return True, 0.0
+
+
+_local = LocalTokenBuckets()
+
+
+def _shared():
+    alias = getattr(settings, "RATE_LIMIT_SHARED_CACHE", None)
+    return CacheSlidingWindow(alias) if alias else None
+
+
+def get_limits(scope):
+    return getattr(settings, "RATE_LIMITS", {}).get(scope, {})
+
+
+def _consume(key, rate):
+    limit, period = parse_rate(rate)
+    if not limit:
+        return True, 0.0
+    allowed, wait = _local.consume(key, limit, period)
+    if not allowed:
+        return allowed, wait
+    shared = _shared()
+    if shared is not None:
+        return shared.consume(key, limit, period)
+    return True, 0.0
+
+
+def check_ip(request, scope):
+    """IP bucket only; never touches the session or the database."""
+    rate = get_limits(scope).get("ip")
+    return _consume(f"{scope}:ip:{client_ip(request)}", rate)
+
+
+def check_user(user, scope):
+    rate = get_limits(scope).get("user")
+    if not user or not user.is_authenticated:
+        return True, 0.0
+    return _consume(f"{scope}:user:{user.pk}", rate)
+
+
+def too_many_requests(request, retry_after):
+    retry_after = max(1, int(retry_after + 0.999))
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        resp = JsonResponse({"error": "Too many requests."}, status=429)
+    else:
+        resp = HttpResponse("Too many requests.", status=429, content_type="text/plain")
+    resp["Retry-After"] = str(retry_after)
+    return resp
+
+
+def ratelimit(scope):
+    """
+    Decorator for function views. Put it above @login_required so the IP
+    bucket is checked before the session and user are loaded.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            allowed, wait = check_ip(request, scope)
+            if allowed:
+                allowed, wait = check_user(request.user, scope)
+            if not allowed:
+                return too_many_requests(request, wait)
+            return view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
@@ -0,0 +1,64 @@
+# myproject/sessions.py
+"""
+Session engine: Django's cached_db store behind a two-tier cache.
+
+    SESSION_ENGINE = "myproject.sessions"
+
+SESSION_CACHE_ALIAS must be a cache all workers share: with a per-process
+backend (LocMemCache) a session flushed by logout on one worker would stay
+valid in the others' caches, so the store then skips the cache and reads
+django_session like the db engine (`manage.py check` warns,
+myproject.W002).
+
+Reads go in-process LRU -> SESSION_CACHE_ALIAS -> django_session, so a
+warm session costs no query; writes go to the database and both caches
+(cached_db is write-through, so sessions survive a cache flush). The
+local tier is per worker: every session save/delete goes out on the
+invalidation bus (myproject/invalidation.py) and the other workers drop
+their copy, but with the "local" transport, or when a message is late, a
+session changed or flushed (logout) on another worker can be served from
+it for SESSION_LOCAL_CACHE["ttl"] seconds, so that TTL stays short.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import invalidation
+from .tieredcache import LocalLRU, TieredCache, is_shared
+
+_cfg = {"size": 10_000, "ttl": 2.0}
+_cfg.update(getattr(settings, "SESSION_LOCAL_CACHE", {}) or {})
+local = LocalLRU(_cfg["size"], _cfg["ttl"], name="session-local")
+_uncached = DummyCache("session-uncached", {})
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = "myproject.sessions"
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        if is_shared(settings.SESSION_CACHE_ALIAS):
+            self._cache = TieredCache(local, caches[settings.SESSION_CACHE_ALIAS])
+        else:
+            self._cache = _uncached  # every read falls through to the database
+
+
+# ----------------------------
+# Invalidation bus
+# ----------------------------
+def _forget(session_key, version=None):
+    local.delete(SessionStore.cache_key_prefix + session_key)
+
+
+def _session_changed(sender, instance, **kwargs):
+    key = instance.session_key
+    transaction.on_commit(lambda: invalidation.publish("session", key))
+
+
+invalidation.register("session", _forget, flush=local.clear)
+post_save.connect(_session_changed, sender=Session, dispatch_uid="myproject.sessions")
+post_delete.connect(_session_changed, sender=Session, dispatch_uid="myproject.sessions")
@@ -48,11 +48,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myproject.metrics.MetricsMiddleware',          # outermost: times the whole stack
+    'myproject.querybudget.QueryBudgetMiddleware',  # first, so session/auth queries are counted too
+    'myproject.slowqueries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'myproject.profiling.ProfilingMiddleware',      # needs request.user for the staff check
+    'admindashboard.middleware.ActiveUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,7 +66,7 @@ ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'myproject.metrics.DjangoTemplates',  # stock backend + render timing
         'DIRS': [BASE_DIR/'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -134,6 +139,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'static_a'
 
+# `collectstatic` fingerprints every asset and writes .gz/.br siblings;
+# myproject.staticfiles.serve picks the variant by Accept-Encoding.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "myproject.staticfiles.PrecompressedManifestStaticFilesStorage",
+    },
+}
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -146,10 +162,55 @@ LOGIN_REDIRECT_URL  = reverse_lazy("social:feed")
 LOGOUT_REDIRECT_URL = reverse_lazy("social:feed")
 
 # Optional: nicer login error messages without leaking if an email exists
+# CachedModelBackend serves request.user (+ profile) from cache (myproject/authcache.py);
+# ModelBackend stays listed so sessions that were created under it keep working
 AUTHENTICATION_BACKENDS = [
+    "myproject.authcache.CachedModelBackend",
     "django.contrib.auth.backends.ModelBackend",
 ]
 
+# user snapshots: shared cache alias and TTL, plus the in-process tier. Off
+# by default: the alias must be shared by all workers, and the LocMemCache
+# "default" below is per process (enabling it there only warns,
+# myproject.W001). With a shared cache, e.g.
+#     CACHES["shared"] = {"BACKEND": "myproject.metrics.RedisCache", "LOCATION": "redis://cache:6379/1"}
+# set "enabled": True, "alias": "shared".
+AUTH_CACHE = {
+    "enabled": False,
+    "alias": "default",
+    "ttl": 3600,
+    "local_size": 5000,
+    "local_ttl": 60,
+}
+
+# Post/Profile snapshots for list hydration (myapp/entitycache.py); like
+# AUTH_CACHE it needs a shared alias to be enabled (myproject.W003)
+ENTITY_CACHE = {
+    "enabled": False,
+    "alias": "default",
+    "ttl": 3600,
+    "counter_ttl": 300,
+    "local_size": 20000,
+    "local_ttl": 300,
+}
+
+# Cross-worker invalidation of in-process caches (myproject/invalidation.py):
+# "local" (one worker), "unix" / "sqlite" (one host), "redis" (several hosts,
+# e.g. {"transport": "redis", "options": {"url": "redis://cache:6379/0"}}).
+# "local" sends nothing to other workers: run several workers with it and a
+# follow or session change on one is seen by the others only after their
+# copy expires (myproject.W004)
+INVALIDATION_BUS = {
+    "transport": "local",
+    "options": {},
+}
+
+# Sessions: plain database sessions. "myproject.sessions" (cached_db behind an
+# in-process LRU) needs SESSION_CACHE_ALIAS on a shared cache; its local tier
+# can serve a session changed on another worker for `ttl` seconds.
+SESSION_ENGINE = "django.contrib.sessions.backends.db"
+SESSION_LOCAL_CACHE = {"size": 10000, "ttl": 2}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",   # or add JWT if you prefer
@@ -158,6 +219,12 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_PAGINATION_CLASS": "api.pagination.DefaultPagination",
+    # orjson for JSON; msgpack when the client sends `Accept: application/msgpack`
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "api.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 
@@ -167,3 +234,98 @@ TEMPLATES[0]['OPTIONS']['context_processors'] += [
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Per-endpoint-class rate limits, "<requests>/<s|m|h|d>" (see myproject/ratelimit.py).
+# Buckets live in each worker's memory; set RATE_LIMIT_SHARED_CACHE to a cache
+# alias (e.g. a Redis cache) to also enforce them across workers.
+RATE_LIMITS = {
+    "like":       {"user": "60/m",  "ip": "300/m"},
+    "search":     {"user": "20/m",  "ip": "60/m"},
+    "users_list": {"user": "120/m", "ip": "120/m"},
+}
+RATE_LIMIT_SHARED_CACHE = None
+# Number of reverse proxies that append to X-Forwarded-For in front of the app;
+# 0 keys IP limits on REMOTE_ADDR (clients can put anything in the header)
+RATE_LIMIT_TRUSTED_PROXIES = 0
+
+# In-memory follow graph (myapp/graph.py): per-worker reload interval, seconds
+FOLLOW_GRAPH_MAX_AGE = 300
+
+
+# Admin dashboard sketches are buffered per worker and merged into the
+# database after this many events / seconds (admindashboard/sketches.py, hll.py)
+SKETCH_FLUSH_EVENTS = 500
+SKETCH_FLUSH_SECONDS = 10
+HLL_FLUSH_SECONDS = 30
+
+# Buffered audit-log writer (admindashboard/auditlog.py). Failed-login rows
+# are sampled above sample_high_water * max_queue; everything is dropped at
+# max_queue (the dashboard rollups still count every event).
+AUDIT_LOG_BUFFER = {
+    "enabled": True,
+    "max_queue": 10000,
+    "flush_size": 500,
+    "flush_seconds": 2.0,
+    "sample_high_water": 0.5,
+    "min_sample_rate": 0.01,
+}
+
+# Parquet archive of old activity rows (admindashboard/archive.py, manage.py archive_logs)
+ARCHIVE_ROOT = BASE_DIR / "archive"
+
+# `manage.py bench_endpoints` (myproject/benchmark.py): stored baseline and
+# allowed ratio over it per metric (defaults in benchmark.DEFAULT_THRESHOLDS)
+BENCHMARK_BASELINE = BASE_DIR / "benchmarks" / "baseline.json"
+BENCHMARK_THRESHOLDS = {}
+
+# `manage.py check_query_plans --check` (myproject/queryplans.py) compares the
+# hot queries' plans with this file (--save-baseline writes it)
+QUERY_PLAN_BASELINE = BASE_DIR / "benchmarks" / "query_plans.json"
+
+# Per-request query accounting (myproject/querybudget.py). headers: X-Query-*
+# response headers (None = DEBUG); enforce: "raise" | "log" | "off" for views
+# over their @query_budget (None = raise in DEBUG, log otherwise)
+QUERY_BUDGET = {
+    "enabled": True,
+    "headers": None,
+    "enforce": None,
+}
+
+# Slow-query log (myproject/slowqueries.py): statements over threshold_ms are
+# logged with their call site and EXPLAIN plan; the last `buffer` of them and
+# the top `fingerprints` by total time are on /admin-dash/slow-queries/
+SLOW_QUERIES = {
+    "enabled": True,
+    "threshold_ms": 100,
+    "explain": True,
+    "explain_every": 300,
+    "buffer": 500,
+    "fingerprints": 200,
+}
+
+# Prometheus (myproject/metrics.py). /metrics answers these addresses, or a
+# request with "Authorization: Bearer <token>". For multiple workers export
+# PROMETHEUS_MULTIPROC_DIR and hook metrics.child_exit into gunicorn.
+METRICS = {
+    "allowed_ips": ["127.0.0.1", "::1"],
+    "token": None,
+}
+
+# Request profiler (myproject/profiling.py). Staff add ?_profile=1 (or
+# "cprofile") / an X-Profile header to a request; sample_rate profiles that
+# fraction of all requests with sample_mode. The newest `keep` are stored.
+PROFILING = {
+    "enabled": True,
+    "sample_rate": 0.0,
+    "sample_mode": "sample",
+    "interval": 0.001,   # seconds between stack samples
+    "keep": 200,
+}
+
+# Cache backends in myproject.metrics count hits/misses (swap in
+# myproject.metrics.RedisCache for a shared cache)
+CACHES = {
+    "default": {
+        "BACKEND": "myproject.metrics.LocMemCache",
+        "LOCATION": "default",
+    },
+}
@@ -0,0 +1,237 @@
+# myproject/slowqueries.py
+"""
+Slow-query log.
+
+SlowQueryMiddleware wraps every database connection for the request
+(connection.execute_wrapper); a statement slower than
+SLOW_QUERIES["threshold_ms"] is logged to the "myproject.slowqueries"
+logger and kept with
+
+    fingerprint     querybudget.fingerprint(): literals and IN-lists collapsed
+    view            the resolved URL name of the request
+    call site       innermost project frame outside the instrumentation
+                    ("myapp/views.py:212 in search")
+    plan            EXPLAIN QUERY PLAN (SQLite) / EXPLAIN output, captured
+                    once per fingerprint every `explain_every` seconds on a
+                    separate cursor; only for SELECTs
+
+in a per-worker ring buffer of the last `buffer` slow statements plus
+totals per fingerprint (count, total/max time), which the staff page
+/admin-dash/slow-queries/ ranks by total time.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .querybudget import fingerprint, fingerprint_id
+
+logger = logging.getLogger(__name__)
+
+MAX_SQL = 2000
+_SKIP_FILES = ("myproject/slowqueries.py", "myproject/querybudget.py", "myproject/metrics.py",
+               "myproject/profiling.py")
+
+
+def _config():
+    cfg = {
+        "enabled": True,
+        "threshold_ms": 100,
+        "explain": True,
+        "explain_every": 300,  # seconds between plans of the same fingerprint
+        "buffer": 500,
+        "fingerprints": 200,
+    }
+    cfg.update(getattr(settings, "SLOW_QUERIES", {}) or {})
+    return cfg
+
+
+# ----------------------------
+# Call sites and plans
+# ----------------------------
+def call_site(frame=None):
+    """'path:line in function' of the innermost frame in the project's own code."""
+    base = os.path.join(str(settings.BASE_DIR), "")
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base):
+            rel = filename[len(base):]
+            # middleware frames only pass the request on (e.g. a lazy queryset rendered by DRF)
+            if "site-packages" not in rel and not rel.endswith(_SKIP_FILES) and not rel.endswith("middleware.py"):
+                return f"{rel}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def plan_rows(connection, sql, params):
+    """
+    The plan of `sql` on a raw cursor (bypasses the execute wrappers), as
+    [(depth, detail)]: SQLite's EXPLAIN QUERY PLAN tree, or one row per
+    EXPLAIN output line elsewhere.
+    """
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    cursor = connection.create_cursor()
+    try:
+        if connection.vendor == "sqlite":
+            # EXPLAIN does not check the schema cookie, so a statement cached by
+            # sqlite3 keeps its old plan after DDL; key the SQL to the schema version
+            cursor.execute("PRAGMA schema_version")
+            sql = f"{sql} /* schema {cursor.fetchone()[0]} */"
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if connection.vendor != "sqlite":
+        return [(0, " | ".join(str(c) for c in row)) for row in rows]
+    # (id, parent, notused, detail): depth from the parent chain
+    depth = {0: -1}
+    out = []
+    for node_id, parent, _unused, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        out.append((depth[node_id], detail))
+    return out
+
+
+def explain(connection, sql, params):
+    """The plan of `sql` as indented text."""
+    return "\n".join("  " * d + detail for d, detail in plan_rows(connection, sql, params))
+
+
+def _explainable(sql, many):
+    words = sql.split(None, 1)
+    return not many and bool(words) and words[0].upper() in ("SELECT", "WITH")
+
+
+# ----------------------------
+# Ring buffer + per-fingerprint totals
+# ----------------------------
+class SlowQueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, buffer=None):
+        with self._lock:
+            self.recent = deque(maxlen=buffer or _config()["buffer"])
+            self.by_fingerprint = {}
+
+    def needs_plan(self, fp_id, every):
+        with self._lock:
+            agg = self.by_fingerprint.get(fp_id)
+            return agg is None or agg["plan"] is None or time.monotonic() - agg["planned_at"] > every
+
+    def add(self, entry, max_fingerprints):
+        with self._lock:
+            self.recent.append(entry)
+            agg = self.by_fingerprint.get(entry["id"])
+            if agg is None:
+                agg = self.by_fingerprint[entry["id"]] = {
+                    "id": entry["id"], "fingerprint": entry["fingerprint"], "count": 0,
+                    "total_ms": 0.0, "max_ms": 0.0, "sql": entry["sql"], "plan": None,
+                    "planned_at": 0.0, "views": Counter(), "call_sites": Counter(), "last_at": None,
+                }
+            agg["count"] += 1
+            agg["total_ms"] += entry["ms"]
+            if entry["ms"] >= agg["max_ms"]:
+                agg["max_ms"], agg["sql"] = entry["ms"], entry["sql"]  # keep the slowest instance
+            if entry["plan"] is not None:
+                agg["plan"], agg["planned_at"] = entry["plan"], time.monotonic()
+            agg["views"][entry["view"]] += 1
+            agg["call_sites"][entry["call_site"]] += 1
+            agg["last_at"] = entry["at"]
+            if len(self.by_fingerprint) > max_fingerprints:
+                # drop the cheapest fingerprint, not the newest
+                cheapest = min(self.by_fingerprint.values(), key=lambda a: a["total_ms"])
+                del self.by_fingerprint[cheapest["id"]]
+
+    def top(self, n=50):
+        """Fingerprints by total slow time, most first."""
+        with self._lock:
+            rows = sorted(self.by_fingerprint.values(), key=lambda a: a["total_ms"], reverse=True)[:n]
+            return [{
+                "id": a["id"], "fingerprint": a["fingerprint"], "count": a["count"],
+                "total_ms": round(a["total_ms"], 3), "avg_ms": round(a["total_ms"] / a["count"], 3),
+                "max_ms": round(a["max_ms"], 3), "slowest_sql": a["sql"], "plan": a["plan"],
+                "views": dict(a["views"].most_common(5)), "call_sites": dict(a["call_sites"].most_common(5)),
+                "last_at": a["last_at"],
+            } for a in rows]
+
+    def latest(self, n=100):
+        with self._lock:
+            return list(self.recent)[-n:][::-1]
+
+
+log = SlowQueryLog()
+
+
+# ----------------------------
+# execute_wrapper
+# ----------------------------
+class SlowQueryWrapper:
+    def __init__(self, request, cfg):
+        self.request = request
+        self.cfg = cfg
+        self.threshold = cfg["threshold_ms"] / 1000.0
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - t0
+            if elapsed >= self.threshold:
+                try:
+                    self._record(sql, params, many, context["connection"], elapsed)
+                except Exception:
+                    logger.exception("could not record a slow query")
+
+    def _record(self, sql, params, many, connection, elapsed):
+        fp = fingerprint(sql)
+        fp_id = fingerprint_id(fp)
+        plan = None
+        if self.cfg["explain"] and _explainable(sql, many) and log.needs_plan(fp_id, self.cfg["explain_every"]):
+            try:
+                plan = explain(connection, sql, params)
+            except Exception as e:
+                plan = f"<EXPLAIN failed: {e}>"
+
+        match = getattr(self.request, "resolver_match", None)
+        entry = {
+            "id": fp_id,
+            "at": timezone.now().isoformat(timespec="milliseconds"),
+            "ms": round(elapsed * 1000.0, 3),
+            "fingerprint": fp[:MAX_SQL],
+            "sql": sql[:MAX_SQL],
+            "params": repr(params)[:500],
+            "view": match.view_name if match else self.request.path,
+            "call_site": call_site(),
+            "plan": plan,
+        }
+        log.add(entry, self.cfg["fingerprints"])
+        logger.warning("slow query %.1f ms [%s] %s at %s: %s",
+                       entry["ms"], fp_id, entry["view"], entry["call_site"], entry["sql"][:300])
+
+
+class SlowQueryMiddleware:
+    """Installs SlowQueryWrapper on every connection for the request; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cfg = _config()
+        if not cfg["enabled"]:
+            return self.get_response(request)
+        wrapper = SlowQueryWrapper(request, cfg)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(wrapper))
+            return self.get_response(request)
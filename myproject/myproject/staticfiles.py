@@ -0,0 +1,156 @@
+# myproject/staticfiles.py
+"""
+Static asset pipeline.
+
+`collectstatic` is the build step: PrecompressedManifestStaticFilesStorage
+fingerprints every file (ManifestStaticFilesStorage) and then writes `.gz`
+and `.br` siblings next to each compressible asset in STATIC_ROOT.
+
+`serve` hands those files out, picking the precompressed variant from the
+request's Accept-Encoding and marking fingerprinted names as immutable.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles import views as staticfiles_views
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli  # optional: `pip install Brotli`
+    HAS_BROTLI = True
+except Exception:
+    brotli = None
+    HAS_BROTLI = False
+
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico",
+    ".ttf", ".otf", ".eot",
+}
+MIN_COMPRESS_SIZE = 256          # bytes; tiny files are not worth an extra round of headers
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 60
+
+# Preference order when the client accepts several encodings.
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+# ----------------------------
+# Build step (collectstatic)
+# ----------------------------
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also precompresses assets to gzip and brotli.
+    Compressed files are only kept when they are actually smaller.
+    """
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if self._should_compress(name):
+                for encoding, suffix in ENCODINGS:
+                    if self._compress(name, encoding, suffix):
+                        yield name + suffix, None, True
+
+    def stored_name(self, name):
+        # Templates reference a few assets that are never collected
+        # (e.g. default-avatar.png); fall back to the plain name instead of a 500.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def _should_compress(self, name):
+        ext = os.path.splitext(name)[1].lower()
+        if ext not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return False
+        return self.size(name) >= MIN_COMPRESS_SIZE
+
+    def _compress(self, name, encoding, suffix):
+        if encoding == "br" and not HAS_BROTLI:
+            return False
+        with self.open(name) as fh:
+            raw = fh.read()
+        if encoding == "br":
+            data = brotli.compress(raw, quality=11)
+        else:
+            data = gzip.compress(raw, compresslevel=9, mtime=0)
+        if len(data) >= len(raw):
+            return False
+        path = self.path(name) + suffix
+        with open(path, "wb") as out:
+            out.write(data)
+        return True
+
+
+# ----------------------------
+# Serving path
+# ----------------------------
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if token:
+            accepted.add(token.lower())
+    return accepted
+
+
+def _is_fingerprinted(path):
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None) or {}
+    return path in hashed_files.values() and path not in hashed_files
+
+
+def serve(request, path):
+    """
+    Serve a file from STATIC_ROOT, preferring `<file>.br` / `<file>.gz` when
+    the client accepts them. Fingerprinted names get a one-year immutable
+    Cache-Control; anything else is cached briefly.
+    In DEBUG, files that were never collected fall back to the finders.
+    """
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = safe_join(str(settings.STATIC_ROOT), path)
+    except Exception:
+        raise Http404("Invalid path")
+
+    if not os.path.isfile(fullpath):
+        if settings.DEBUG:
+            return staticfiles_views.serve(request, path, insecure=True)
+        raise Http404("File not found")
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    chosen, encoding = fullpath, None
+    accepted = _accepted_encodings(request)
+    for enc, suffix in ENCODINGS:
+        if enc in accepted and os.path.isfile(fullpath + suffix):
+            chosen, encoding = fullpath + suffix, enc
+            break
+
+    stat = os.stat(chosen)
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(chosen, "rb"), content_type=content_type or "application/octet-stream")
+        response["Content-Length"] = stat.st_size
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Vary"] = "Accept-Encoding"
+    if _is_fingerprinted(path):
+        response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={MUTABLE_MAX_AGE}"
+    return response
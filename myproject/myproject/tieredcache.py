@@ -0,0 +1,136 @@
+# myproject/tieredcache.py
+"""
+Two-tier caching: a small in-process LRU in front of a Django cache.
+
+The local tier saves the round trip to a shared cache (Redis) for hot
+keys. It is per worker and only expires by TTL or explicit delete, so it
+can serve a value for up to `ttl` seconds after another worker changed or
+deleted it; keep that TTL short, or put a version in the key that is read
+from the shared tier.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_MISS = object()
+
+
+def is_shared(alias):
+    """
+    False when the `alias` backend lives in this process (LocMemCache,
+    DummyCache): another worker never sees what is written there, so a
+    version bump in it cannot retire their copies.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+class LocalLRU:
+    """
+    Thread-safe LRU with a per-entry deadline. Values are pickled, like
+    LocMemCache does, so callers can mutate what they get back.
+    """
+
+    def __init__(self, maxsize=10_000, ttl=60.0, name="local"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()  # key -> (deadline, pickled value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] <= time.monotonic():
+                del self._data[key]
+                item = None
+            elif item is not None:
+                self._data.move_to_end(key)
+        metrics.cache_lookup(self.name, item is not None)
+        return default if item is None else pickle.loads(item[1])
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISS)
+            if value is not _MISS:
+                found[key] = value
+        return found
+
+    def set(self, key, value, ttl=None):
+        deadline = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (deadline, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    The subset of the Django cache API the session store uses, reading
+    local-then-shared and writing through to both.
+    """
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key, default=None):
+        value = self.local.get(key, _MISS)
+        if value is _MISS:
+            value = self.shared.get(key, _MISS)
+            if value is _MISS:
+                return default
+            self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout=None):
+        self.shared.set(key, value, timeout)
+        self.local.set(key, value, timeout)
+
+    def delete(self, key):
+        self.local.delete(key)
+        return self.shared.delete(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISS) is not _MISS
+
+    # the async session API (aload/asave/...) goes through these
+    async def aget(self, key, default=None):
+        value = self.local.get(key, _MISS)
+        if value is _MISS:
+            value = await self.shared.aget(key, _MISS)
+            if value is _MISS:
+                return default
+            self.local.set(key, value)
+        return value
+
+    async def aset(self, key, value, timeout=None):
+        await self.shared.aset(key, value, timeout)
+        self.local.set(key, value, timeout)
+
+    async def adelete(self, key):
+        self.local.delete(key)
+        return await self.shared.adelete(key)
+
+    def __str__(self):
+        return f"TieredCache({self.local.name} -> {self.shared})"
@@ -1,9 +1,13 @@
 # config/urls.py (project-level)
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from myproject import metrics, staticfiles
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
@@ -18,7 +22,13 @@ urlpatterns = [
     
     #Admin Dashboard
     path("admin-dash/", include("admindashboard.urls", namespace="admindashboard")),
+
+    # Prometheus scrape endpoint (see myproject/metrics.py)
+    path("metrics", metrics.metrics_view, name="metrics"),
 ]
 
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# Fingerprinted + precompressed assets (see myproject/staticfiles.py)
+urlpatterns += [
+    re_path(r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")), staticfiles.serve, name="static"),
+]
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
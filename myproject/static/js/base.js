@@ -0,0 +1,193 @@
+// static/js/base.js
+// Shared helpers (CSRF, fetch, notif badge, global like/save handlers, delete modal).
+// Loaded on every page after the Bootstrap bundle.
+
+// --- CSRF + fetch helpers ---
+function getCookie(name) {
+  let cookieValue = null;
+  if (document.cookie && document.cookie !== '') {
+    const cookies = document.cookie.split(';');
+    for (let i=0; i<cookies.length; i++) {
+      const cookie = cookies[i].trim();
+      if (cookie.substring(0, name.length + 1) === (name + '=')) {
+        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+        break;
+      }
+    }
+  }
+  return cookieValue;
+}
+const CSRF_TOKEN = getCookie('csrftoken');
+
+async function apiFetch(url, {method='GET', data=null, headers={}} = {}) {
+  const opts = { method, headers: { 'X-Requested-With': 'XMLHttpRequest', ...headers } };
+  if (!['GET','HEAD'].includes(method)) {
+    if (headers['Content-Type'] !== 'application/x-www-form-urlencoded') {
+      opts.headers['Content-Type'] = 'application/json';
+      if (data) opts.body = JSON.stringify(data);
+    } else {
+      // when explicitly using x-www-form-urlencoded
+      opts.body = new URLSearchParams(data || {});
+    }
+    if (CSRF_TOKEN) opts.headers['X-CSRFToken'] = CSRF_TOKEN;
+  }
+  const res = await fetch(url, opts);
+  let json = null; try { json = await res.json(); } catch(_){}
+  return { ok: res.ok, status: res.status, data: json };
+}
+
+// --- Toasts (initialize after bootstrap is available) ---
+document.addEventListener("DOMContentLoaded", function () {
+  document.querySelectorAll('.toast').forEach(function (el) {
+    new bootstrap.Toast(el).show();
+  });
+});
+
+// --- Notification badge helpers (single implementation) ---
+function getBadgeEl(){ return document.getElementById('notif-badge'); }
+function setBadgeCount(n){
+  const el = getBadgeEl(); if(!el) return;
+  if(n > 0){
+    el.textContent = n > 99 ? '99+' : String(n);
+    el.classList.remove('d-none');
+  }else{
+    el.textContent = '';
+    el.classList.add('d-none');
+  }
+}
+async function refreshNotifBadge(){
+  try{
+    const res = await fetch('/api/notifications/unread_count/', {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' },
+      credentials: 'same-origin',
+      cache: 'no-store'
+    });
+    if(!res.ok) return;
+    const { count } = await res.json();
+    setBadgeCount(count || 0);
+  }catch(_){}
+}
+window.refreshNotifBadge = refreshNotifBadge;
+
+document.addEventListener('DOMContentLoaded', () => {
+  refreshNotifBadge();
+  // setInterval(refreshNotifBadge, 30000); // optional polling
+});
+
+// --- Global like/save (event delegation) ---
+document.addEventListener('click', async (e) => {
+  // LIKE
+  const likeBtn = e.target.closest('.like-btn');
+  if (likeBtn) {
+    const postId = likeBtn.dataset.id;
+    likeBtn.disabled = true;
+    try {
+      const { ok, data } = await apiFetch(`/posts/${postId}/like/`, { method: 'POST' });
+      if (ok && data) {
+        // count
+        const countEl = document.getElementById(`like-count-${postId}`);
+        if (countEl && typeof data.likes_count !== 'undefined') countEl.textContent = data.likes_count;
+
+        // icon/state
+        const i = likeBtn.querySelector('i');
+        if (data.liked) {
+          likeBtn.classList.remove('btn-outline-primary');
+          likeBtn.classList.add('btn-primary');
+          if (i) i.className = 'fa-solid fa-thumbs-up me-1';
+        } else {
+          likeBtn.classList.add('btn-outline-primary');
+          likeBtn.classList.remove('btn-primary');
+          if (i) i.className = 'fa-regular fa-thumbs-up me-1';
+        }
+      }
+    } finally {
+      likeBtn.disabled = false;
+    }
+    return;
+  }
+
+  // SAVE (if you add a .save-btn in your card)
+  const saveBtn = e.target.closest('.save-btn');
+  if (saveBtn) {
+    const postId = saveBtn.dataset.id;
+    saveBtn.disabled = true;
+    try {
+      const { ok, data } = await apiFetch(`/posts/${postId}/save/`, { method: 'POST' });
+      if (ok && data) {
+        const countEl = document.getElementById(`save-count-${postId}`);
+        if (countEl && typeof data.saves_count !== 'undefined') countEl.textContent = data.saves_count;
+
+        const i = saveBtn.querySelector('i');
+        if (data.saved) {
+          saveBtn.classList.remove('btn-outline-secondary');
+          saveBtn.classList.add('btn-secondary');
+          if (i) i.className = 'fa-solid fa-bookmark me-1';
+        } else {
+          saveBtn.classList.add('btn-outline-secondary');
+          saveBtn.classList.remove('btn-secondary');
+          if (i) i.className = 'fa-regular fa-bookmark me-1';
+        }
+      }
+    } finally {
+      saveBtn.disabled = false;
+    }
+    return;
+  }
+});
+
+// --- Delete post modal (AJAX, delegated so lazily loaded cards work too) ---
+document.addEventListener('submit', async function (e) {
+  const form = e.target.closest('.delete-post-form');
+  if (!form) return;
+  e.preventDefault();
+  const postId = form.dataset.postId;
+  const url = form.getAttribute('action');
+
+  try {
+    const res = await fetch(url, {
+      method: 'POST',
+      headers: {
+        'X-CSRFToken': CSRF_TOKEN,
+        'X-Requested-With': 'XMLHttpRequest'
+      }
+    });
+
+    if (res.status === 204) {
+      // Close modal
+      const modalEl = form.closest('.modal');
+      const modal = bootstrap.Modal.getInstance(modalEl) || new bootstrap.Modal(modalEl);
+      modal.hide();
+
+      // Remove the card
+      const card = document.getElementById(`post-card-${postId}`);
+      if (card) card.remove();
+    } else if (res.status === 403) {
+      alert('You can delete only your own post.');
+    } else {
+      window.location.reload();
+    }
+  } catch (err) {
+    console.error(err);
+    window.location.reload();
+  }
+});
+
+// --- "Load more" fragments (e.g. profile posts): swap the button for the next batch ---
+document.addEventListener('click', async (e) => {
+  const btn = e.target.closest('.load-more');
+  if (!btn) return;
+  const wrap = btn.closest('.load-more-wrap') || btn;
+  btn.disabled = true;
+  try {
+    const res = await fetch(btn.dataset.url, {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' },
+      credentials: 'same-origin'
+    });
+    if (!res.ok) { btn.disabled = false; return; }
+    wrap.insertAdjacentHTML('beforebegin', await res.text());
+    wrap.remove();
+  } catch (err) {
+    console.error(err);
+    btn.disabled = false;
+  }
+});
@@ -0,0 +1,150 @@
+// static/js/notifications.js
+// Notifications page: detail modal, mark read, delete (DRF endpoints).
+// Relies on apiFetch() from base.js.
+
+/* ---------- Small DOM helpers ---------- */
+function markRowAsRead(row) {
+  row?.classList.remove('list-group-item-warning');
+  const badge = document.getElementById('notif-badge');
+  if (badge && !badge.classList.contains('d-none')) {
+    const cur = parseInt(badge.textContent || '0', 10);
+    if (!Number.isNaN(cur) && cur > 0) {
+      const next = cur - 1;
+      badge.textContent = String(next);
+      if (next <= 0) badge.classList.add('d-none');
+    }
+  }
+}
+function removeRow(row) {
+  row?.parentNode?.removeChild(row);
+  if (!document.querySelector('#notif-list .list-group-item')) {
+    const empty = document.createElement('div');
+    empty.className = 'alert alert-light border';
+    empty.textContent = 'No notifications.';
+    document.getElementById('notif-list').appendChild(empty);
+  }
+}
+function clearAllRows() {
+  document.getElementById('notif-list').innerHTML = '<div class="alert alert-light border">No notifications.</div>';
+}
+
+/* ---------- API endpoints ---------- */
+async function fetchDetail(id)   { return apiFetch(`/api/notifications/${id}/`, { method: 'GET' }); }
+async function patchRead(id)     { return apiFetch(`/api/notifications/${id}/`, { method: 'PATCH', data: { is_read: true } }); }
+async function deleteItem(id)    { return apiFetch(`/api/notifications/${id}/`, { method: 'DELETE' }); }
+async function markAllRead()     { return apiFetch(`/api/notifications/mark_all_read/`, { method: 'POST', data: {} }); }
+async function deleteAll()       { return apiFetch(`/api/notifications/delete_all/`, { method: 'POST', data: {} }); }
+
+/* ---------- Modal rendering (expects serializer extra fields) ---------- */
+function esc(text) {
+  const div = document.createElement('div');
+  div.textContent = text ?? '';
+  return div.innerHTML;
+}
+function renderDetailIntoModal(payload) {
+  const body = document.getElementById('notif-detail-body');
+  if (!payload) { body.innerHTML = '<div class="text-danger small">No data.</div>'; return; }
+
+  const actorName  = payload.actor_name || payload.actor_email || 'Someone';
+  const actorUrl   = payload.actor_profile_url || null;
+  const verb       = payload.verb || 'did something';
+  const createdH   = payload.created_at_human || '';     // e.g. “3 minutes ago”
+  const targetUrl  = payload.target_url || null;         // post link
+  const preview    = payload.preview || null;            // comment/post excerpt
+  const post       = payload.target_post || null;        // { id,url,text,photo_url,created_at_human,author_* }
+
+  const actorHTML = actorUrl
+    ? `<a href="${actorUrl}" class="fw-semibold text-decoration-none">${esc(actorName)}</a>`
+    : `<strong>${esc(actorName)}</strong>`;
+
+  let top = `${actorHTML} ${esc(verb)}`;
+  if (targetUrl) top += ` <a href="${targetUrl}" class="text-decoration-none">your post</a>`;
+
+  let html = `
+    <div class="mb-2">${top}</div>
+    ${createdH ? `<div class="text-muted small mb-2">${esc(createdH)} </div>` : ''}
+
+  `;
+
+  if (post) {
+    html += `
+      <div class="card border-0 shadow-sm bg-primary-subtle">
+        <div class="card-body">
+          <div class="d-flex justify-content-between align-items-center mb-1">
+            <div>
+              ${post.author_profile_url
+                ? `<a href="${post.author_profile_url}" class="fw-semibold text-decoration-none">${esc(post.author_name || '')}</a>`
+                : `<span class="fw-semibold">${esc(post.author_name || '')}</span>`}
+              ${post.created_at_human ? `<div class="text-muted small">${esc(post.created_at_human)}</div>` : ''}
+            </div>
+            ${post.url ? `<a href="${post.url}" class="btn btn-sm btn-outline-primary">Open post</a>` : ''}
+          </div>
+          ${post.text ? `<p class="mb-2">${esc(post.text)}</p>` : ''}
+          ${post.photo_url ? `<img src="${post.photo_url}" alt="Post image" class="img-fluid rounded">` : ''}
+        </div>
+      </div>
+    `;
+  }
+
+  body.innerHTML = html;
+}
+
+/* ---------- Click handlers ---------- */
+document.addEventListener('click', async (e) => {
+  const row = e.target.closest('.list-group-item');
+
+  // View detail: open modal + mark as read
+  if (e.target.closest('.view-detail')) {
+    const id = e.target.closest('.view-detail').dataset.id;
+    const modal = new bootstrap.Modal(document.getElementById('notifDetailModal'));
+    document.getElementById('notif-detail-body').innerHTML = '<div class="text-muted small ">Loading…</div>';
+    modal.show();
+
+    try {
+      const { ok, data } = await fetchDetail(id);
+      if (ok) renderDetailIntoModal(data);
+      else document.getElementById('notif-detail-body').innerHTML = '<div class="text-danger small">Failed to load.</div>';
+    } catch (err) {
+      document.getElementById('notif-detail-body').innerHTML = '<div class="text-danger small">Error occurred.</div>';
+    }
+
+    try {
+      const { ok } = await patchRead(id);
+      if (ok) markRowAsRead(row);
+    } catch (_) {}
+  }
+
+  // Delete a single notification
+  if (e.target.closest('.delete-item')) {
+    const btn = e.target.closest('.delete-item');
+    const id = btn.dataset.id;
+    btn.disabled = true;
+    try {
+      const { ok } = await deleteItem(id);
+      if (ok) removeRow(row); else btn.disabled = false;
+    } catch (err) {
+      btn.disabled = false;
+      console.error(err);
+    }
+  }
+
+  // Bulk: mark all as read
+  if (e.target.id === 'read-all-drf') {
+    e.preventDefault();
+    const b = e.target; b.disabled = true;
+    try {
+      const { ok } = await markAllRead();
+      if (ok) document.querySelectorAll('#notif-list .list-group-item').forEach(markRowAsRead);
+    } finally { b.disabled = false; }
+  }
+
+  // Bulk: delete all
+  if (e.target.id === 'delete-all-drf') {
+    e.preventDefault();
+    const b = e.target; b.disabled = true;
+    try {
+      const { ok } = await deleteAll();
+      if (ok) clearAllRows();
+    } finally { b.disabled = false; }
+  }
+});